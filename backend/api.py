@@ -5,10 +5,13 @@ from typing import List, Optional
 import json
 import logging
 import time
+import asyncio
 from backend.services.remotion_service import RemotionService
+from backend.services.local_render_service import LocalRenderService
 from backend.services.s3_service import S3Service
 from broll_analyzer import BrollAnalyzer
 from utils import FFmpegUtils
+from utils.http_client import HttpClient
 import os
 import uuid
 from pydantic import BaseModel
@@ -47,6 +50,30 @@ app.add_middleware(
 # Initialize services
 remotion_service = RemotionService()
 s3_service = S3Service()
+local_render_service = LocalRenderService(s3_service)
+
+async def warm_broll_analyzer():
+    """Create the shared BrollAnalyzer and validate its credentials off the request path"""
+    if not os.getenv('PEXELS_API_KEY'):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+        analyzer = await loop.run_in_executor(None, lambda: BrollAnalyzer.shared(artifact_store=s3_service))
+        await analyzer.validate_credentials_async()
+    except Exception as e:
+        logger.error(f"Failed to initialize BrollAnalyzer: {str(e)}")
+        logger.error(f"Error details: {traceback.format_exc()}")
+
+@app.on_event("startup")
+async def startup():
+    """Open the shared outbound HTTP connection pool and warm up the b-roll analyzer"""
+    await HttpClient.get_session()
+    app.state.broll_warmup = asyncio.create_task(warm_broll_analyzer())
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close pooled outbound HTTP connections"""
+    await HttpClient.close()
 
 class Caption(BaseModel):
     text: str
@@ -96,7 +123,13 @@ async def health_check():
                 }
             )
         
-        return JSONResponse(content={"status": "healthy"})
+        # Cached b-roll credential check; never makes a network call here. Jobs still
+        # caption without b-roll, so a failed check degrades the service rather than failing it
+        broll = BrollAnalyzer.shared_health()
+        if broll['status'] == 'unhealthy':
+            return JSONResponse(content={"status": "degraded", "broll": broll})
+        
+        return JSONResponse(content={"status": "healthy", "broll": broll})
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -198,7 +231,8 @@ async def process_video(
     highlight_type: str = Form("background"),
     broll_enabled: bool = Form(True),
     video_width: int = Form(607),
-    video_height: int = Form(1080)
+    video_height: int = Form(1080),
+    render_engine: str = Form("remotion")
 ):
     try:
         # Get the S3 URL for the input video
@@ -211,6 +245,9 @@ async def process_video(
                 status_code=500,
                 detail=f"Failed to get video URL: {str(e)}"
             )
+        # Reject corrupt or unsupported uploads from their header before downloading them
+        media_info = await s3_service.probe_header(input_key)
+
         # Download video to temp directory
         temp_dir = f"temp_{uuid.uuid4().hex}"
         os.makedirs(temp_dir, exist_ok=True)
@@ -218,11 +255,15 @@ async def process_video(
         await s3_service.download_file(input_key, video_path)
 
         # Get video info including FPS
-        width, height, duration, fps = FFmpegUtils.get_video_info(video_path)
+        if media_info is None:
+            media_info = FFmpegUtils.probe_media(video_path)
+        width, height, duration, fps = (
+            media_info['width'], media_info['height'], media_info['duration'], media_info['fps']
+        )
 
         # Extract audio
         audio_path = os.path.join(temp_dir, f"{input_key}.wav")
-        FFmpegUtils.extract_audio(video_path, audio_path)
+        FFmpegUtils.extract_audio(video_path, audio_path, media_info=media_info)
 
         # Generate captions
         caption_processor = CaptionProcessor(fps=fps)  # Pass the actual FPS
@@ -254,8 +295,16 @@ async def process_video(
                     detail="PEXELS_API_KEY is required for b-roll"
                 )
             
-            broll_analyzer = BrollAnalyzer(pexels_key)
-            logger.info("Initialized BrollAnalyzer")
+            # Shared analyzer; credentials are checked at startup and re-checked only when the result expires
+            broll_analyzer = BrollAnalyzer.shared(pexels_key, artifact_store=s3_service)
+            credentials = await broll_analyzer.validate_credentials_async()
+            if credentials['status'] != 'healthy':
+                # Advisory only: without OpenAI the analyzer falls back to local keywords and unranked
+                # clips, so only a key Pexels definitely rejected rules out b-roll for this job
+                logger.warning(f"B-roll credential check failed: pexels={credentials['pexels']}, openai={credentials['openai']}")
+                if credentials['pexels'].get('auth_failed'):
+                    logger.error("Pexels rejected PEXELS_API_KEY, continuing without b-roll")
+                    return []
             
             # Get b-roll suggestions with parallel processing
             broll_suggestions = await broll_analyzer.get_broll_suggestions_async(
@@ -313,8 +362,30 @@ async def process_video(
             process_broll()
         )
 
-        # Process video using Remotion
         output_key = f"processed/{os.path.basename(input_key)}"
+
+        # Local jobs are composited and captioned on this worker with a single FFmpeg pass
+        if render_engine == "local":
+            logger.info("Rendering video locally with FFmpeg")
+            result = local_render_service.process_video(
+                video_path,
+                output_key,
+                caption_clips,
+                broll_clips=broll_clips,
+                video_width=video_width,
+                video_height=video_height,
+                fps=fps,
+                font=font,
+                color=color,
+                font_size=font_size,
+                highlight_type=highlight_type,
+                video_duration=duration,
+                cleanup_dir=temp_dir
+            )
+            # The render job owns temp_dir and removes it when it finishes
+            return JSONResponse(content=result)
+
+        # Process video using Remotion
         result = remotion_service.process_video(
             video_url, 
             output_key, 
@@ -336,6 +407,8 @@ async def process_video(
         
         return JSONResponse(content=result)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -343,6 +416,8 @@ async def process_video(
 @app.get("/api/check_progress/{render_id}")
 async def check_progress(render_id: str):
     try:
+        if local_render_service.owns(render_id):
+            return local_render_service.check_progress(render_id)
         result = remotion_service.check_progress(render_id)
         return result
     except Exception as e:
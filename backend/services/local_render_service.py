@@ -0,0 +1,275 @@
+import os
+import logging
+import shutil
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from dotenv import load_dotenv
+from utils import FFmpegUtils, build_ass_script, letterbox_filter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Fonts shipped with the Remotion site, so both engines render the same typefaces
+FONTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'remotion', 'public', 'fonts'
+)
+
+class LocalRenderService:
+    """Render captions and b-roll on the worker with a single FFmpeg pass instead of Remotion Lambda"""
+
+    def __init__(self, s3_service=None, max_workers: int = None):
+        self.s3_service = s3_service
+        self.max_workers = max_workers or int(os.getenv('LOCAL_RENDER_WORKERS', '2'))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='local-render')
+        self.renders: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        logger.info(f"Initialized LocalRenderService with {self.max_workers} workers, fonts dir: {FONTS_DIR}")
+
+    @staticmethod
+    def _escape_filter_value(value: str) -> str:
+        """Quote a value (typically a path) for use inside an FFmpeg filter graph option"""
+        return "'" + value.replace('\\', '/').replace("'", "'\\''") + "'"
+
+    @staticmethod
+    def _even(value: int) -> int:
+        """libx264 with yuv420p needs even frame dimensions"""
+        return max(2, int(value) - int(value) % 2)
+
+    def build_filter_graph(self, broll_clips: List[Dict], width: int, height: int, fps: float,
+                           subtitles_path: Optional[str] = None) -> str:
+        """
+        Build one filter_complex graph that composites every b-roll insert over the main video
+
+        Input 0 is the main video and input i + 1 is broll_clips[i]. Each insert is trimmed
+        to its slot, conformed to the composition fps, scaled and cropped to cover the frame,
+        given alpha fades of transitionDuration frames at both ends (a crossfade against the
+        main video) and shifted to startFrame before being overlaid. Captions are burned in
+        last so they sit above the b-roll, like the Remotion composition.
+        
+        With LOCAL_RENDER_FIT=letterbox the main video is scaled and padded to keep its whole
+        picture instead of being cropped.
+        """
+        # Same framing as the Remotion composition: cover the frame, then crop the overflow
+        cover = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1"
+        if os.getenv('LOCAL_RENDER_FIT', 'cover').lower() == 'letterbox':
+            main_fit = letterbox_filter(width, height)
+        else:
+            main_fit = cover
+        chains = [f"[0:v]{main_fit},format=yuv420p[base]"]
+
+        current = 'base'
+        for index, clip in enumerate(broll_clips):
+            start = clip['startFrame'] / fps
+            duration = (clip['endFrame'] - clip['startFrame']) / fps
+            if duration <= 0:
+                continue
+            fade = min((clip.get('transitionDuration') or 0) / fps, duration / 2)
+
+            layer = (
+                f"[{index + 1}:v]trim=duration={duration:.3f},setpts=PTS-STARTPTS,"
+                f"fps={fps},{cover},format=yuva420p"
+            )
+            if fade > 0:
+                layer += (
+                    f",fade=t=in:st=0:d={fade:.3f}:alpha=1"
+                    f",fade=t=out:st={duration - fade:.3f}:d={fade:.3f}:alpha=1"
+                )
+            layer += f",setpts=PTS+{start:.3f}/TB[broll{index}]"
+            chains.append(layer)
+
+            output = f"v{index}"
+            chains.append(
+                f"[{current}][broll{index}]overlay=eof_action=pass:"
+                f"enable='between(t,{start:.3f},{start + duration:.3f})'[{output}]"
+            )
+            current = output
+
+        if subtitles_path:
+            chains.append(
+                f"[{current}]subtitles=filename={self._escape_filter_value(subtitles_path)}"
+                f":fontsdir={self._escape_filter_value(FONTS_DIR)}[vout]"
+            )
+        else:
+            chains.append(f"[{current}]null[vout]")
+
+        return ';'.join(chains)
+
+    def build_command(self, video_path: str, output_path: str, subtitles_path: str,
+                      width: int, height: int, fps: float = 30, broll_clips: List[Dict] = None) -> List[str]:
+        """Build the single-pass FFmpeg command for the main video, b-roll inserts and captions"""
+        broll_clips = broll_clips or []
+
+        cmd = ['ffmpeg', '-i', video_path]
+        for clip in broll_clips:
+            # Only demux as much of each insert as its slot needs
+            duration = (clip['endFrame'] - clip['startFrame']) / fps
+            cmd += ['-t', f"{duration + 1:.3f}", '-i', clip['url']]
+
+        return cmd + [
+            '-filter_complex', self.build_filter_graph(broll_clips, width, height, fps, subtitles_path),
+            '-map', '[vout]',
+            '-map', '0:a?',
+            '-r', f"{fps}",
+            '-c:v', 'libx264',
+            '-preset', os.getenv('LOCAL_RENDER_PRESET', 'veryfast'),
+            '-crf', os.getenv('LOCAL_RENDER_CRF', '20'),
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac',
+            '-b:a', '192k',
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+
+    def render(self, video_path: str, output_path: str, captions: list = None, broll_clips: list = None,
+               video_width: int = None, video_height: int = None, fps: float = 30, font: str = 'Barlow-BlackItalic',
+               color: str = 'white', font_size: int = 48, highlight_type: str = 'background',
+               video_duration: float = None, progress_callback=None) -> Dict:
+        """Render b-roll and captions onto a local video file, returning FFmpeg run statistics"""
+        width = self._even(video_width or 607)
+        height = self._even(video_height or 1080)
+        broll_clips = broll_clips or []
+        logger.info(f"LocalRenderService rendering {video_path} at {width}x{height}, fps={fps}, "
+                    f"{len(broll_clips)} b-roll clips")
+
+        subtitles_path = os.path.splitext(output_path)[0] + '.ass'
+        with open(subtitles_path, 'w', encoding='utf-8') as f:
+            f.write(build_ass_script(
+                captions or [],
+                fps=fps,
+                width=width,
+                height=height,
+                font=font,
+                color=color,
+                font_size=font_size,
+                highlight_type=highlight_type
+            ))
+        logger.info(f"Wrote {len(captions or [])} captions to subtitle script: {subtitles_path}")
+
+        try:
+            cmd = self.build_command(
+                video_path,
+                output_path,
+                subtitles_path,
+                width,
+                height,
+                fps=fps,
+                broll_clips=broll_clips
+            )
+            return FFmpegUtils.run_ffmpeg(
+                cmd,
+                progress_callback=progress_callback,
+                duration=video_duration,
+                label='local_render'
+            )
+        finally:
+            if os.path.exists(subtitles_path):
+                os.remove(subtitles_path)
+
+    def process_video(self, video_path: str, output_key: str, captions: list = None, broll_clips: list = None,
+                      video_width: int = None, video_height: int = None, fps: float = 30, font: str = 'Barlow-BlackItalic',
+                      color: str = 'white', font_size: int = 48, highlight_type: str = 'background',
+                      video_duration: float = None, cleanup_dir: str = None) -> dict:
+        """
+        Start a local render in the background and return a render id compatible with check_progress
+
+        The render is uploaded to S3 under output_key when it finishes. cleanup_dir, if given,
+        is removed once the job is done since it holds the downloaded source video.
+        """
+        render_id = f"local-{uuid.uuid4().hex}"
+        with self.lock:
+            self.renders[render_id] = {'status': 'processing', 'progress': 0.0}
+
+        def update_progress(progress: Dict):
+            if progress.get('percent') is not None:
+                with self.lock:
+                    # Keep a little headroom for the S3 upload
+                    self.renders[render_id]['progress'] = progress['percent'] / 100 * 0.95
+
+        def job():
+            output_path = os.path.join(cleanup_dir or os.path.dirname(video_path) or '.', f"{render_id}.mp4")
+            try:
+                self.render(
+                    video_path,
+                    output_path,
+                    captions,
+                    broll_clips=broll_clips,
+                    video_width=video_width,
+                    video_height=video_height,
+                    fps=fps,
+                    font=font,
+                    color=color,
+                    font_size=font_size,
+                    highlight_type=highlight_type,
+                    video_duration=video_duration,
+                    progress_callback=update_progress
+                )
+
+                logger.info(f"Uploading local render {render_id} to S3: {output_key}")
+                self.s3_service.s3_client.upload_file(output_path, self.s3_service.bucket_name, output_key)
+                url = self.s3_service.generate_presigned_url(output_key, 'get')
+
+                with self.lock:
+                    self.renders[render_id] = {'status': 'done', 'progress': 1.0, 'url': url}
+                logger.info(f"Local render {render_id} complete")
+
+            except Exception as e:
+                logger.error(f"Error in LocalRenderService job {render_id}: {str(e)}")
+                logger.error(f"Stack trace: {traceback.format_exc()}")
+                with self.lock:
+                    self.renders[render_id] = {'status': 'failed', 'error': str(e)}
+            finally:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                if cleanup_dir:
+                    shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+        self.executor.submit(job)
+        logger.info(f"Local render started: {render_id}")
+
+        return {
+            'status': 'processing',
+            'renderId': render_id,
+            'engine': 'local'
+        }
+
+    def owns(self, render_id: str) -> bool:
+        """Whether a render id belongs to this service"""
+        return render_id.startswith('local-')
+
+    def check_progress(self, render_id: str) -> Dict[str, Any]:
+        """Check the progress of a local render, in the same shape as RemotionService.check_progress"""
+        with self.lock:
+            render = dict(self.renders.get(render_id) or {})
+
+        if not render:
+            return {
+                'status': 'failed',
+                'message': f'Unknown render: {render_id}'
+            }
+        if render['status'] == 'done':
+            return {
+                'status': 'done',
+                'message': 'Video processing complete',
+                'url': render['url']
+            }
+        if render['status'] == 'failed':
+            return {
+                'status': 'failed',
+                'message': f"Video processing failed: {render.get('error')}"
+            }
+        return {
+            'status': 'processing',
+            'message': 'Video is being processed',
+            'progress': render.get('progress', 0.0)
+        }
+
+    def cleanup(self):
+        """Stop accepting new renders and wait for running ones"""
+        self.executor.shutdown(wait=True)
@@ -2,17 +2,30 @@ import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError
 import os
+import json
+import asyncio
 from dotenv import load_dotenv
 from fastapi import HTTPException
 import logging
+import tempfile
 import time
 import traceback
+from typing import Any, Dict, Optional
+from utils import FFmpegUtils
+from utils.media_probe import is_iso_bmff, find_moov
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Bytes read from the start of an upload for the header probe
+PROBE_HEAD_BYTES = int(os.getenv('PROBE_HEAD_BYTES', str(1024 * 1024)))
+# Bytes read from the end of non-MP4 containers (cues/index usually live there)
+PROBE_TAIL_BYTES = int(os.getenv('PROBE_TAIL_BYTES', str(256 * 1024)))
+# Larger moov boxes are not worth a ranged read; fall back to the full download
+PROBE_MAX_MOOV_BYTES = int(os.getenv('PROBE_MAX_MOOV_BYTES', str(32 * 1024 * 1024)))
+
 class S3Service:
     def __init__(self):
         try:
@@ -164,6 +177,130 @@ class S3Service:
             logger.error(f"Error downloading file from S3: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Read bytes [start, end] (inclusive) of an S3 object"""
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Range=f"bytes={start}-{end}"
+        )
+        return response['Body'].read()
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """Read a small JSON artifact (e.g. a cache entry), or None if it doesn't exist"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return json.loads(response['Body'].read())
+
+    def put_json(self, key: str, value: Any) -> None:
+        """Write a small JSON artifact, replacing any previous version"""
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=json.dumps(value).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    async def probe_header(self, key: str) -> Optional[Dict]:
+        """
+        Validate an upload from its container header without downloading the media
+        
+        The head of the object (and, for MP4/MOV files whose moov atom sits after
+        the media data, the moov box itself) is range-read into a sparse local file
+        of the same size, which ffprobe can parse as if it were the whole file. The
+        S3 reads and ffprobe run in the default executor, off the event loop.
+        
+        Returns:
+            MediaInfo dictionary from FFmpegUtils.probe_media, plus size and faststart,
+            or None if the header probe is inconclusive (e.g. a fragmented MP4 whose
+            duration lives in its moof boxes, or a transient S3 error) and the caller
+            should fall back to probing the full download
+        
+        Raises:
+            HTTPException: 404 if the object is missing, 415 if the upload is empty
+            or definitely has no video stream FFmpeg can decode
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._probe_header, key)
+
+    def _probe_header(self, key: str) -> Optional[Dict]:
+        """Blocking body of probe_header"""
+        started = time.time()
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] == '404':
+                raise HTTPException(status_code=404, detail="File not found in S3")
+            logger.warning(f"Header probe of {key} couldn't stat the object, falling back to full download: {str(e)}")
+            return None
+        
+        size = head['ContentLength']
+        if size == 0:
+            raise HTTPException(status_code=415, detail="Uploaded file is empty")
+        
+        try:
+            header = self.read_range(key, 0, min(size, PROBE_HEAD_BYTES) - 1)
+            chunks = [(0, header)]
+            is_mp4 = is_iso_bmff(header)
+            faststart = None
+            
+            if is_mp4:
+                moov = find_moov(header, size, lambda start, end: self.read_range(key, start, end))
+                if moov is None:
+                    logger.warning(f"No moov atom found in the header of {key}, falling back to full download")
+                    return None
+                
+                moov_offset, moov_size = moov
+                faststart = moov_offset + moov_size <= len(header)
+                if not faststart:
+                    if moov_size > PROBE_MAX_MOOV_BYTES:
+                        logger.info(f"moov atom of {key} is {moov_size} bytes, skipping header probe")
+                        return None
+                    chunks.append((moov_offset, self.read_range(key, moov_offset, moov_offset + moov_size - 1)))
+            elif size > len(header):
+                tail_start = max(len(header), size - PROBE_TAIL_BYTES)
+                chunks.append((tail_start, self.read_range(key, tail_start, size - 1)))
+        except Exception as e:
+            logger.warning(f"Ranged read for the header probe of {key} failed, falling back to full download: {str(e)}")
+            return None
+        
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(key)[1] or '.mp4') as probe_file:
+            for offset, data in chunks:
+                probe_file.seek(offset)
+                probe_file.write(data)
+            # Unread regions stay as holes in a sparse file
+            probe_file.truncate(size)
+            probe_file.flush()
+            
+            try:
+                media_info = FFmpegUtils.probe_media(probe_file.name)
+            except Exception as e:
+                logger.warning(f"Header probe inconclusive for {key}, falling back to full download: {str(e)}")
+                return None
+        
+        if not media_info['video_codec'] or not media_info['width'] or not media_info['height']:
+            raise HTTPException(status_code=415, detail="Uploaded file has no video stream")
+        decodable = FFmpegUtils.decodable_video_codecs()
+        if decodable is not None and media_info['video_codec'] not in decodable:
+            # Anything the local FFmpeg can decode is accepted, as before the header probe
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported video codec: {media_info['video_codec']}"
+            )
+        if not media_info['duration'] or not media_info['fps']:
+            # Fragmented MP4s keep their timing in moof boxes the probe didn't read
+            logger.info(f"Header probe of {key} found no duration or frame rate, falling back to full download")
+            return None
+        
+        media_info.update({'size': size, 'faststart': faststart})
+        read_bytes = sum(len(data) for _, data in chunks)
+        logger.info(f"Header probe of {key} read {read_bytes} of {size} bytes in {time.time() - started:.3f}s")
+        return media_info
+
     async def upload_file(self, local_path: str, key: str):
         """Upload a file to S3"""
         try:
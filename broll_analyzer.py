@@ -1,25 +1,146 @@
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import logging
 from collections import Counter
 import re
 import requests
 import json
+import copy
+import hashlib
 import traceback
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, BadRequestError, RateLimitError, APIConnectionError, InternalServerError
+import httpx
 import time
 import asyncio
-import aiohttp
+import threading
 from utils import setup_logging, ensure_directory
+from utils.persistent_cache import PersistentCache
+from utils.keywords import normalize_keyword, group_keywords, KeywordGrouper
+from utils.json_stream import JsonArrayStream
+from utils.local_keywords import extract_keywords
+from utils.transcript import format_segments, format_spans, compact_segments, precise_timestamp, transcript_windows, window_owns
+from utils.http_client import HttpClient
+from utils.image_hash import dhash, cluster_hashes
+from utils.contact_sheet import build_contact_sheet
+from utils.broll_index import BrollIndex
+from utils.single_flight import SingleFlight
+from utils.rate_limiter import (
+    RateLimitScheduler, RateLimitedError, parse_retry_after, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+)
+from broll_providers import PexelsProvider, build_providers
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 from PIL import Image
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Vision ranking decisions are reused for the same keyword and candidate set this long
+VISION_CACHE_TTL = float(os.getenv('VISION_CACHE_TTL', str(30 * 24 * 3600)))
+
+# How thumbnails reach the vision model: "url" passes public Pexels URLs at low detail,
+# "inline" downloads and base64-encodes them into the prompt
+VISION_IMAGE_MODE = os.getenv('BROLL_VISION_IMAGE_MODE', 'url')
+
+# "images" sends each candidate as its own image; "contact_sheet" composes them into one
+# labeled grid of square tiles sent at CONTACT_SHEET_DETAIL
+VISION_LAYOUT = os.getenv('BROLL_VISION_LAYOUT', 'images')
+CONTACT_SHEET_TILE_SIZE = int(os.getenv('BROLL_CONTACT_SHEET_TILE', '256'))
+CONTACT_SHEET_DETAIL = os.getenv('BROLL_CONTACT_SHEET_DETAIL', 'low')
+
+# Batched ranking puts several keywords' candidates into one vision call, bounded per request
+# by image count, keyword count and inline payload size
+VISION_BATCHING = os.getenv('BROLL_VISION_BATCHING', 'true').lower() in ('1', 'true', 'yes')
+VISION_BATCH_MAX_IMAGES = int(os.getenv('BROLL_VISION_BATCH_MAX_IMAGES', '40'))
+VISION_BATCH_MAX_KEYWORDS = int(os.getenv('BROLL_VISION_BATCH_MAX_KEYWORDS', '6'))
+VISION_BATCH_MAX_BYTES = int(os.getenv('BROLL_VISION_BATCH_MAX_BYTES', str(12 * 1024 * 1024)))
+
+# Near-duplicate candidates (e.g. several clips from one shoot) are collapsed before vision
+# ranking when their thumbnail dHashes differ by at most this many of 64 bits
+DEDUPE_ENABLED = os.getenv('BROLL_DEDUPE', 'true').lower() in ('1', 'true', 'yes')
+DEDUPE_MAX_DISTANCE = int(os.getenv('BROLL_DEDUPE_MAX_DISTANCE', '8'))
+HASH_THUMBNAIL_SIZE = 64
+THUMBNAIL_HASH_TTL = float(os.getenv('THUMBNAIL_HASH_TTL', str(90 * 24 * 3600)))
+
+# Keywords at least this similar (cosine over hashed n-grams) to a previously approved
+# keyword, for the same orientation, reuse its clip without a Pexels search or vision call
+BROLL_INDEX_ENABLED = os.getenv('BROLL_INDEX', 'true').lower() in ('1', 'true', 'yes')
+BROLL_INDEX_MIN_SIMILARITY = float(os.getenv('BROLL_INDEX_MIN_SIMILARITY', '0.85'))
+
+# How long a successful (or failed) credential check is trusted before it is repeated
+CREDENTIAL_CHECK_TTL = float(os.getenv('BROLL_CREDENTIAL_CHECK_TTL', '900'))
+CREDENTIAL_RETRY_TTL = float(os.getenv('BROLL_CREDENTIAL_RETRY_TTL', '60'))
+
+# Keywords within a job this similar (centroid cosine over their concepts, see
+# utils.keywords.keyword_concepts) share one search,
+# with a distinct clip from its ranked results assigned to each of them
+KEYWORD_GROUPING = os.getenv('BROLL_KEYWORD_GROUPING', 'true').lower() in ('1', 'true', 'yes')
+KEYWORD_GROUP_SIMILARITY = float(os.getenv('BROLL_KEYWORD_GROUP_SIMILARITY', '0.6'))
+
+# Stream the keyword completion and start each keyword's b-roll retrieval as soon as the
+# model has finished writing it, instead of waiting for the whole JSON array
+KEYWORD_STREAMING = os.getenv('BROLL_KEYWORD_STREAMING', 'true').lower() in ('1', 'true', 'yes')
+
+# Long transcripts are split into windows of this many seconds, each extracted by its own
+# concurrent call, with a little overlapping context on each side of a window
+KEYWORD_WINDOW_SECONDS = float(os.getenv('BROLL_KEYWORD_WINDOW_SECONDS', '120'))
+KEYWORD_WINDOW_OVERLAP = float(os.getenv('BROLL_KEYWORD_WINDOW_OVERLAP', '10'))
+KEYWORD_MAX_TOKENS = int(os.getenv('BROLL_KEYWORD_MAX_TOKENS', '800'))
+
+# Merge caption-sized segments into sentence-level spans with whole-second timestamps (fillers
+# stripped) before prompting; suggestions are mapped back to the precise segment starts
+TRANSCRIPT_COMPACTION = os.getenv('BROLL_TRANSCRIPT_COMPACTION', 'true').lower() in ('1', 'true', 'yes')
+COMPACT_SPAN_SECONDS = float(os.getenv('BROLL_COMPACT_SPAN_SECONDS', '15'))
+
+# Keyword extraction mode: 'llm' (OpenAI, falling back to local extraction when it returns
+# nothing or misses the deadline) or 'local' (offline RAKE phrases only, lowest latency)
+KEYWORD_MODE = os.getenv('BROLL_KEYWORD_MODE', 'llm').lower()
+KEYWORD_DEADLINE = float(os.getenv('BROLL_KEYWORD_DEADLINE', '30'))
+KEYWORD_LOCAL_MIN_GAP = float(os.getenv('BROLL_KEYWORD_LOCAL_MIN_GAP', '8'))
+
+# Model used for keyword extraction; bump KEYWORD_PROMPT_VERSION whenever the prompt or its
+# parsing changes so cached suggestions from the old prompt are no longer used
+KEYWORD_MODEL = os.getenv('BROLL_KEYWORD_MODEL', 'gpt-3.5-turbo')
+KEYWORD_PROMPT_VERSION = 1
+
+# LLM keyword suggestions are cached by compacted transcript hash, duration bucket, model and
+# prompt version, locally and (when the API attaches one) in the shared artifact store
+KEYWORD_CACHE_ENABLED = os.getenv('BROLL_KEYWORD_CACHE', 'true').lower() in ('1', 'true', 'yes')
+KEYWORD_CACHE_TTL = float(os.getenv('BROLL_KEYWORD_CACHE_TTL', str(30 * 24 * 3600)))
+KEYWORD_CACHE_DURATION_BUCKET = float(os.getenv('BROLL_KEYWORD_CACHE_DURATION_BUCKET', '5'))
+KEYWORD_CACHE_PREFIX = os.getenv('BROLL_KEYWORD_CACHE_PREFIX', 'cache/keyword-suggestions/')
+
+# OpenAI request timeout (seconds), retries on transient errors and max in-flight async calls
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '60'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '8'))
+
+# Process-wide pacing of async OpenAI calls (see utils.rate_limiter): request rate and the
+# latency above which concurrency backs off (Pexels pacing lives in broll_providers)
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500'))
+OPENAI_LATENCY_TARGET = float(os.getenv('OPENAI_LATENCY_TARGET', '30'))
+
+# Stock footage providers searched for each keyword, in preference order (see broll_providers).
+# With several, they are raced: the first to return at least PROVIDER_RACE_MIN_CANDIDATES
+# clips matching the orientation and duration wins, and after PROVIDER_RACE_DEADLINE seconds
+# the best result so far is used
+STOCK_PROVIDERS = [name.strip() for name in os.getenv('BROLL_STOCK_PROVIDERS', 'pexels').split(',') if name.strip()]
+PROVIDER_RACE_MIN_CANDIDATES = int(os.getenv('BROLL_PROVIDER_RACE_MIN_CANDIDATES', '3'))
+PROVIDER_RACE_DEADLINE = float(os.getenv('BROLL_PROVIDER_RACE_DEADLINE', '8'))
+
+# Worker pool for thumbnail decode/resize/encode so it never runs on the event loop
+IMAGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BROLL_IMAGE_WORKERS', str(min(8, (os.cpu_count() or 2) * 2)))),
+    thread_name_prefix='broll-image'
+)
+
 class BrollAnalyzer:
-    def __init__(self, pexels_api_key: str):
+    _shared: Optional['BrollAnalyzer'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pexels_api_key: str, validate: bool = True):
         logger.info("Initializing BrollAnalyzer")
         
         # Validate API key format
@@ -28,57 +149,326 @@ class BrollAnalyzer:
             raise ValueError("Invalid Pexels API key format - key should be at least 32 characters")
             
         self.pexels_api_key = pexels_api_key
-        self.pexels_base_url = "https://api.pexels.com/videos"
-        
-        # Test the API with a simple search
-        logger.info("Testing Pexels API with a simple search...")
-        try:
-            headers = {"Authorization": self.pexels_api_key}
-            response = requests.get(f"{self.pexels_base_url}/search?query=nature&per_page=1", headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('videos'):
-                    logger.info("✓ Pexels API initialized and tested successfully")
-                    logger.debug(f"Test search returned {len(data['videos'])} videos")
-                else:
-                    raise ValueError("Pexels API test failed - no results returned")
-            else:
-                raise ValueError(f"Pexels API test failed with status code: {response.status_code}")
-                
-        except Exception as e:
-            logger.error(f"Failed to initialize Pexels API: {str(e)}")
-            logger.error(f"API initialization error details: {traceback.format_exc()}")
-            raise
+
+        # Stock footage sources; Pexels is always available for credential checks
+        self.providers = build_providers(STOCK_PROVIDERS, pexels_api_key=pexels_api_key)
+        self.pexels = next((p for p in self.providers if isinstance(p, PexelsProvider)), None) or PexelsProvider(pexels_api_key)
+        if not self.providers:
+            self.providers = [self.pexels]
         
         # Initialize OpenAI client
         openai_key = os.getenv('OPENAI_API_KEY')
         if not openai_key:
             raise ValueError("OPENAI_API_KEY is required")
         try:
-            self.openai_client = OpenAI(api_key=openai_key)
-            logger.info("OpenAI client initialized")
+            self.openai_client = OpenAI(api_key=openai_key, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
+            # Async client with its own connection pool so keyword and vision calls overlap.
+            # Retries are left to _openai_call so 429s reach the shared rate limiter.
+            self.async_openai_client = AsyncOpenAI(
+                api_key=openai_key,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    timeout=OPENAI_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONCURRENCY * 2,
+                        max_keepalive_connections=OPENAI_MAX_CONCURRENCY
+                    )
+                )
+            )
+            logger.info("OpenAI clients initialized")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {str(e)}")
             raise
 
+        # Shared pacing of async provider calls across all jobs in this process
+        self.openai_scheduler = RateLimitScheduler.shared(
+            'openai',
+            rate=OPENAI_REQUESTS_PER_MINUTE / 60,
+            burst=max(OPENAI_MAX_CONCURRENCY, OPENAI_REQUESTS_PER_MINUTE / 6),
+            max_concurrency=OPENAI_MAX_CONCURRENCY,
+            latency_target=OPENAI_LATENCY_TARGET
+        )
+        self.pexels_scheduler = self.pexels.scheduler
+
+        # Process-wide coalescing of identical in-flight searches and vision rankings
+        self.search_flight = SingleFlight.shared('broll_search')
+        self.vision_flight = SingleFlight.shared('vision_ranking')
+
+        # Result of the last async credential check (see validate_credentials_async)
+        self.credential_status: Optional[Dict] = None
+        self._credential_lock = None
+        self._credential_lock_loop = None
+
+        if validate:
+            self._test_pexels_api()
+
         # Minimum time between b-roll suggestions (in seconds)
         self.min_time_between_suggestions = 5.0
 
-    def analyze_multiple_images(self, image_data_list: List[Dict], keyword: str) -> Dict:
-        """Analyze multiple images in a single OpenAI call and select the best one"""
+        # Longest side of thumbnails sent to the vision model
+        self.thumbnail_max_size = int(os.getenv('BROLL_THUMBNAIL_SIZE', '512'))
+        self.vision_image_mode = VISION_IMAGE_MODE
+        self.vision_layout = VISION_LAYOUT
+
+        # Process-wide cache of trimmed Pexels search results
+        self.search_cache = self.pexels.search_cache
+
+        # Process-wide cache of vision ranking decisions
+        self.vision_cache = PersistentCache.shared('vision_ranking', ttl=VISION_CACHE_TTL, max_entries=2000)
+
+        # Process-wide cache of thumbnail perceptual hashes by Pexels video ID
+        self.hash_cache = PersistentCache.shared('thumbnail_hash', ttl=THUMBNAIL_HASH_TTL, max_entries=5000)
+
+        # Process-wide index of vision-approved keyword -> clip selections
+        self.broll_index = BrollIndex.shared() if BROLL_INDEX_ENABLED else None
+
+        # Process-wide cache of LLM keyword suggestions by transcript, and the store shared
+        # with other workers (anything with get_json/put_json, e.g. S3Service), if attached
+        self.keyword_cache = PersistentCache.shared('keyword_suggestions', ttl=KEYWORD_CACHE_TTL, max_entries=500)
+        self.artifact_store = None
+
+    @classmethod
+    def shared(cls, pexels_api_key: str = None, artifact_store=None) -> 'BrollAnalyzer':
+        """Process-wide analyzer reusing API clients and caches across requests
+        
+        Credentials are not checked here; use validate_credentials_async, whose result is cached.
+        An artifact_store (get_json/put_json) shares cached keyword suggestions between workers.
+        """
+        pexels_api_key = pexels_api_key or os.getenv('PEXELS_API_KEY')
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.pexels_api_key != pexels_api_key:
+                cls._shared = cls(pexels_api_key, validate=False)
+            if artifact_store is not None:
+                cls._shared.artifact_store = artifact_store
+            return cls._shared
+
+    @classmethod
+    def shared_health(cls) -> Dict:
+        """Health of the process-wide analyzer, or not_initialized if none was created yet"""
+        instance = cls._shared
+        if instance is None:
+            return {'status': 'not_initialized'}
+        return instance.health()
+
+    def _test_pexels_api(self) -> None:
+        """Blocking Pexels test search used when the analyzer is created with validate=True"""
+        self.pexels.test_connection()
+
+    async def _check_pexels_async(self) -> Dict:
+        """Make one tiny live Pexels search to confirm the API key works"""
+        return await self.pexels.check_async()
+
+    async def _check_openai_async(self) -> Dict:
+        """List models to confirm the OpenAI key works without spending tokens"""
         try:
-            logger.debug(f"Analyzing {len(image_data_list)} images for keyword: {keyword}")
-            
-            if not image_data_list:
-                logger.warning("No images provided for analysis")
-                return {'best_index': -1, 'analysis': 'No images provided'}
-            
-            # Prepare content for OpenAI (text + all images)
-            content = [
-                {
-                    "type": "text", 
-                    "text": f"""Analyze these {len(image_data_list)} images and determine which one best matches the keyword: "{keyword}"
+            await self._openai_call(lambda client: client.models.list(), priority=PRIORITY_LOW)
+            return {'ok': True}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def _credential_check_lock(self) -> asyncio.Lock:
+        """Lock ensuring one credential check at a time, bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._credential_lock is None or self._credential_lock_loop is not loop:
+            self._credential_lock = asyncio.Lock()
+            self._credential_lock_loop = loop
+        return self._credential_lock
+
+    async def validate_credentials_async(self, force: bool = False) -> Dict:
+        """Check the Pexels and OpenAI credentials, reusing the last result until it expires
+        
+        Successful checks are trusted for CREDENTIAL_CHECK_TTL seconds, failed ones for
+        CREDENTIAL_RETRY_TTL, and concurrent callers share a single check.
+        """
+        status = self.credential_status
+        if not force and status and time.time() < status['expires_at']:
+            return status
+
+        async with self._credential_check_lock():
+            status = self.credential_status
+            if not force and status and time.time() < status['expires_at']:
+                return status
+
+            pexels, openai_check = await asyncio.gather(self._check_pexels_async(), self._check_openai_async())
+            healthy = pexels['ok'] and openai_check['ok']
+            checked_at = time.time()
+            self.credential_status = {
+                'status': 'healthy' if healthy else 'unhealthy',
+                'pexels': pexels,
+                'openai': openai_check,
+                'checked_at': checked_at,
+                'expires_at': checked_at + (CREDENTIAL_CHECK_TTL if healthy else CREDENTIAL_RETRY_TTL)
+            }
+            if healthy:
+                logger.info("✓ Pexels and OpenAI credentials validated")
+            else:
+                logger.error(f"B-roll credential check failed: pexels={pexels}, openai={openai_check}")
+            return self.credential_status
+
+    def health(self) -> Dict:
+        """Last credential check plus cache statistics, without making any network calls"""
+        status = self.credential_status
+        return {
+            'status': status['status'] if status else 'pending',
+            'checked_at': status['checked_at'] if status else None,
+            'pexels': status['pexels'] if status else None,
+            'openai': status['openai'] if status else None,
+            'providers': {provider.name: provider.stats() for provider in self.providers},
+            'caches': {
+                'pexels_search': self.search_cache.stats(),
+                'vision_ranking': self.vision_cache.stats(),
+                'thumbnail_hash': self.hash_cache.stats(),
+                'keyword_suggestions': self.keyword_cache.stats()
+            },
+            'index_entries': len(self.broll_index.entries) if self.broll_index is not None else None,
+            'rate_limits': {
+                'openai': self.openai_scheduler.stats(),
+                'pexels': self.pexels_scheduler.stats()
+            }
+        }
+
+    async def _search_providers_async(self, keyword: str, duration: float, orientation: str) -> Optional[List[Dict]]:
+        """Race the stock footage providers for a keyword, returning the winner's normalized videos
+        
+        The first provider (earlier providers win ties) to return at least PROVIDER_RACE_MIN_CANDIDATES
+        clips that pass _filter_candidates wins and the others are cancelled. Once
+        PROVIDER_RACE_DEADLINE passes, the finished result with the most matching clips is taken, or
+        else the next one to finish. Returns None if every provider failed.
+        """
+        if len(self.providers) == 1:
+            return await self.providers[0].search_async(keyword, orientation)
+        
+        tasks = {asyncio.ensure_future(provider.search_async(keyword, orientation)): provider for provider in self.providers}
+        pending = set(tasks)
+        finished: List[Tuple[int, int, str, List[Dict]]] = []
+        cutoff = time.monotonic() + PROVIDER_RACE_DEADLINE
+        try:
+            while pending:
+                timeout = cutoff - time.monotonic()
+                if timeout <= 0 and finished:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=timeout if timeout > 0 else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    provider = tasks[task]
+                    videos = None if task.cancelled() or task.exception() is not None else task.result()
+                    if videos is None:
+                        logger.warning(f"Stock provider '{provider.name}' failed for '{keyword}'")
+                        continue
+                    matching = len(self._filter_candidates(copy.deepcopy(videos), duration, orientation))
+                    finished.append((matching, -self.providers.index(provider), provider.name, videos))
+                winners = [entry for entry in finished if entry[0] >= PROVIDER_RACE_MIN_CANDIDATES]
+                if winners:
+                    matching, _, name, videos = max(winners, key=lambda entry: entry[1])
+                    logger.info(f"Stock provider '{name}' won the race for '{keyword}' with {matching} matching clips")
+                    return videos
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        if not finished:
+            return None
+        matching, _, name, videos = max(finished)
+        logger.info(f"No stock provider reached {PROVIDER_RACE_MIN_CANDIDATES} matching clips for '{keyword}' in time, using '{name}' ({matching})")
+        return videos
+
+    def _search_providers(self, keyword: str, duration: float, orientation: str) -> Optional[List[Dict]]:
+        """Blocking counterpart of _search_providers_async: providers are tried in order"""
+        best = None
+        for provider in self.providers:
+            videos = provider.search(keyword, orientation)
+            if videos is None:
+                continue
+            matching = len(self._filter_candidates(copy.deepcopy(videos), duration, orientation))
+            if matching >= PROVIDER_RACE_MIN_CANDIDATES:
+                return videos
+            if best is None or matching > best[0]:
+                best = (matching, videos)
+        return best[1] if best else None
+
+    async def _openai_call(self, make_request, priority: int = PRIORITY_NORMAL):
+        """Run an async OpenAI request through the shared OpenAI rate limiter
+        
+        make_request receives the async client and returns the request awaitable. 429s are
+        paced and retried by the scheduler; transient connection and 5xx errors are retried here.
+        """
+        async def call():
+            try:
+                return await make_request(self.async_openai_client)
+            except RateLimitError as e:
+                if getattr(e, 'code', None) == 'insufficient_quota':
+                    raise
+                raise RateLimitedError(str(e), parse_retry_after(e.response.headers.get('retry-after')))
+
+        for attempt in range(OPENAI_MAX_RETRIES + 1):
+            try:
+                return await self.openai_scheduler.run(call, priority=priority)
+            except (APIConnectionError, InternalServerError) as e:
+                if attempt == OPENAI_MAX_RETRIES:
+                    raise
+                logger.warning(f"OpenAI request failed ({str(e)}), retrying")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    @staticmethod
+    def _vision_fallback(reason: str) -> Dict:
+        """Analysis result used when the vision call can't be made or parsed"""
+        return {
+            'best_image_index': 0,
+            'comparison_analysis': reason,
+            'overall_confidence': 0.5,
+            'individual_scores': [],
+            'vision_approved': False
+        }
+
+    def _image_content(self, image_data: Dict) -> Dict:
+        """Chat content part for one candidate image"""
+        if image_data.get('base64'):
+            image_url = {"url": f"data:image/jpeg;base64,{image_data['base64']}"}
+        else:
+            # URL mode: the model fetches a small CDN variant itself
+            image_url = {
+                "url": self._thumbnail_variant_url(image_data['url'], self.thumbnail_max_size),
+                "detail": "low"
+            }
+        return {
+            "type": "image_url",
+            "image_url": image_url
+        }
+
+    @staticmethod
+    def _contact_sheet_content(contact_sheet: str) -> Dict:
+        """Chat content part for a base64 contact sheet"""
+        return {
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{contact_sheet}", "detail": CONTACT_SHEET_DETAIL}
+        }
+
+    def _vision_request(self, image_data_list: List[Dict], keyword: str, contact_sheet: str = None) -> Dict:
+        """Build the chat.completions arguments for a multi-image ranking call
+        
+        When a base64 contact sheet is given it replaces the individual images and the
+        model answers with a tile label, which is the same 0-based index.
+        """
+        if contact_sheet:
+            intro = (
+                f"This image is a contact sheet of {len(image_data_list)} images, each tile labeled with its "
+                f"number (0 to {len(image_data_list) - 1}) in the top-left corner. Determine which tile best "
+                f"matches the keyword: \"{keyword}\""
+            )
+            index_hint = "The best_image_index should be the label number of the tile that best matches the keyword."
+        else:
+            intro = f"Analyze these {len(image_data_list)} images and determine which one best matches the keyword: \"{keyword}\""
+            index_hint = "The best_image_index should be the 0-based index of the image that best matches the keyword."
+        
+        # Prepare content for OpenAI (text + all images)
+        content = [
+            {
+                "type": "text", 
+                "text": f"""{intro}
 
 Consider for each image:
 1. Overall relevance to the keyword 
@@ -96,86 +486,477 @@ Respond in JSON format with:
     "comparison_analysis": "string (brief explanation of why this image is the best choice)"
 }}
 
-The best_image_index should be the 0-based index of the image that best matches the keyword."""
-                }
-            ]
-            
+{index_hint}"""
+            }
+        ]
+        
+        if contact_sheet:
+            content.append(self._contact_sheet_content(contact_sheet))
+        else:
             # Add all images to the content
-            for i, image_data in enumerate(image_data_list):
-                content.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_data['base64']}"
-                    }
-                })
+            content.extend(self._image_content(image_data) for image_data in image_data_list)
+        
+        return {
+            'model': "gpt-4o",
+            'messages': [{"role": "user", "content": content}],
+            'max_tokens': 800,
+            'temperature': 0.1
+        }
+
+    @staticmethod
+    def _vision_cache_key(keyword: str, video_ids: List) -> str:
+        """Cache key for a ranking decision: normalized keyword plus the sorted candidate IDs"""
+        return f"{normalize_keyword(keyword)}|{','.join(sorted(str(video_id) for video_id in video_ids))}"
+
+    def _cached_vision_result(self, keyword: str, video_ids: Optional[List]) -> Optional[Dict]:
+        """Return a previous ranking for the same keyword and candidates, re-indexed to this order"""
+        if not video_ids:
+            return None
+        cached = self.vision_cache.get(self._vision_cache_key(keyword, video_ids))
+        if cached is None:
+            return None
+        try:
+            best_index = [str(video_id) for video_id in video_ids].index(str(cached['best_video_id']))
+        except ValueError:
+            return None
+        logger.info(f"Vision ranking cache hit for '{keyword}': video {cached['best_video_id']}")
+        return {
+            'best_image_index': best_index,
+            'comparison_analysis': cached.get('comparison_analysis', 'Cached analysis'),
+            'overall_confidence': cached.get('overall_confidence', 0.5),
+            'individual_scores': [],
+            'vision_approved': True
+        }
+
+    def _store_vision_result(self, keyword: str, video_ids: Optional[List], result: Dict) -> None:
+        """Remember a successfully parsed ranking decision"""
+        best_index = result.get('best_image_index')
+        if not video_ids or not isinstance(best_index, int) or not 0 <= best_index < len(video_ids):
+            return
+        self.vision_cache.set(self._vision_cache_key(keyword, video_ids), {
+            'best_video_id': video_ids[best_index],
+            'comparison_analysis': result.get('comparison_analysis'),
+            'overall_confidence': result.get('overall_confidence', 0.5)
+        })
+
+    @staticmethod
+    def _url_image_data(image_url: str) -> Dict:
+        """Image entry for URL mode; nothing is downloaded unless the model can't fetch it"""
+        return {
+            'url': image_url,
+            'base64': None,
+            'success': True
+        }
+
+    def _unfetchable_images(self, error: Exception, image_data_list: List[Dict]) -> List[int]:
+        """Indices of URL-mode images an OpenAI error says the model could not download"""
+        message = str(error)
+        by_url = [i for i, image_data in enumerate(image_data_list) if not image_data.get('base64')]
+        if not by_url:
+            return []
+
+        failed = [
+            i for i in by_url
+            if image_data_list[i]['url'] in message
+            or self._thumbnail_variant_url(image_data_list[i]['url'], self.thumbnail_max_size) in message
+        ]
+        if failed:
+            return failed
+        # The error is about images but doesn't say which one: inline all URL-mode images
+        if 'image' in message.lower() and ('download' in message.lower() or 'url' in message.lower()):
+            return by_url
+        return []
+
+    def _parse_vision_response(self, content_response: str) -> Optional[Dict]:
+        """Parse the JSON object returned by a multi-image ranking call, or None if it isn't one"""
+        logger.info(f"OpenAI multi-image analysis response: {content_response}")
+        
+        # Parse JSON response
+        try:
+            # Extract JSON from response
+            start = content_response.find('{')
+            end = content_response.rfind('}') + 1
+            if start != -1 and end != 0:
+                json_str = content_response[start:end]
+                result = json.loads(json_str)
+            else:
+                result = json.loads(content_response)
+            if not isinstance(result, dict):
+                logger.error(f"OpenAI multi-image response is not a JSON object: {content_response}")
+                return None
+            
+            logger.debug(f"Multi-image analysis result: {result}")
+            # Only a parsed answer is a vision decision (see _remember_broll)
+            result['vision_approved'] = True
+            return result
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse OpenAI multi-image response: {str(e)}")
+            logger.error(f"Raw response: {content_response}")
+            return None
+
+    def analyze_multiple_images(self, image_data_list: List[Dict], keyword: str, video_ids: List = None) -> Dict:
+        """Analyze multiple images in a single OpenAI call and select the best one
+        
+        When video_ids (one per image) are given, decisions are cached per keyword and candidate set.
+        """
+        try:
+            logger.debug(f"Analyzing {len(image_data_list)} images for keyword: {keyword}")
+            
+            if not image_data_list:
+                logger.warning("No images provided for analysis")
+                return {'best_index': -1, 'analysis': 'No images provided'}
+            
+            cached = self._cached_vision_result(keyword, video_ids)
+            if cached is not None:
+                return cached
+            
+            contact_sheet = None
+            if self.vision_layout == 'contact_sheet' and len(image_data_list) > 1:
+                contact_sheet = self._build_contact_sheet(image_data_list)
             
             # Make the API call
             try:
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": content}],
-                    max_tokens=800,
-                    temperature=0.1
-                )
-                
-                content_response = response.choices[0].message.content.strip()
-                logger.info(f"OpenAI multi-image analysis response: {content_response}")
-                
-                # Parse JSON response
-                try:
-                    # Extract JSON from response
-                    start = content_response.find('{')
-                    end = content_response.rfind('}') + 1
-                    if start != -1 and end != 0:
-                        json_str = content_response[start:end]
-                        result = json.loads(json_str)
-                    else:
-                        result = json.loads(content_response)
-                    
-                    logger.debug(f"Multi-image analysis result: {result}")
-                    return result
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse OpenAI multi-image response: {str(e)}")
-                    logger.error(f"Raw response: {content_response}")
-                    # Fallback: return first image as best
-                    return {
-                        'best_image_index': 0,
-                        'comparison_analysis': 'Failed to parse analysis, using first image',
-                        'overall_confidence': 0.5,
-                        'individual_scores': []
-                    }
+                image_data_list = list(image_data_list)
+                for attempt in range(3):
+                    try:
+                        response = self.openai_client.chat.completions.create(
+                            **self._vision_request(image_data_list, keyword, contact_sheet)
+                        )
+                        break
+                    except BadRequestError as e:
+                        failed = self._unfetchable_images(e, image_data_list)
+                        if not failed or attempt == 2:
+                            raise
+                        # Inline only the images the model couldn't fetch and retry
+                        logger.warning(f"Vision model could not fetch {len(failed)} image URLs, inlining them")
+                        for i in failed:
+                            image_data = self.download_and_process_image(image_data_list[i]['url'])
+                            if not image_data['success']:
+                                raise
+                            image_data_list[i] = image_data
+                result = self._parse_vision_response(response.choices[0].message.content.strip())
+                if result is None:
+                    # Not cached, so the next job with these candidates asks again
+                    return self._vision_fallback('Failed to parse analysis, using first image')
+                self._store_vision_result(keyword, video_ids, result)
+                return result
                     
             except Exception as e:
                 logger.error(f"OpenAI multi-image API call failed: {str(e)}")
-                return {
-                    'best_image_index': 0,
-                    'comparison_analysis': 'API call failed, using first image',
-                    'overall_confidence': 0.5,
-                    'individual_scores': []
-                }
+                return self._vision_fallback('API call failed, using first image')
                 
         except Exception as e:
             logger.error(f"Error in analyze_multiple_images: {str(e)}")
-            return {
-                'best_image_index': 0,
-                'comparison_analysis': 'Analysis failed, using first image',
-                'overall_confidence': 0.5,
-                'individual_scores': []
-            }
+            return self._vision_fallback('Analysis failed, using first image')
 
-    def download_and_process_image(self, image_url: str) -> Dict:
-        """Download and process a single image for analysis"""
+    def _vision_flight_key(self, keyword: str, video_ids: Optional[List]) -> Optional[str]:
+        """Single-flight key for a ranking; None (no sharing) without candidate IDs"""
+        if not video_ids:
+            return None
+        return f"{self.vision_layout}|{self._vision_cache_key(keyword, video_ids)}"
+
+    async def analyze_multiple_images_async(self, image_data_list: List[Dict], keyword: str, video_ids: List = None) -> Dict:
+        """Async version of analyze_multiple_images on the shared async OpenAI client
+        
+        Concurrent rankings of the same keyword and candidates share one vision call.
+        """
+        return await self.vision_flight.do(
+            self._vision_flight_key(keyword, video_ids),
+            lambda: self._analyze_multiple_images_async(image_data_list, keyword, video_ids)
+        )
+
+    async def _analyze_multiple_images_async(self, image_data_list: List[Dict], keyword: str, video_ids: List = None) -> Dict:
+        """Uncoalesced body of analyze_multiple_images_async"""
         try:
-            # Download the image
-            response = requests.get(image_url, timeout=10)
-            response.raise_for_status()
-            image_data = response.content
+            logger.debug(f"Analyzing {len(image_data_list)} images for keyword: {keyword}")
+            
+            if not image_data_list:
+                logger.warning("No images provided for analysis")
+                return {'best_index': -1, 'analysis': 'No images provided'}
+            
+            cached = self._cached_vision_result(keyword, video_ids)
+            if cached is not None:
+                return cached
             
-            # Convert image to base64
+            contact_sheet = None
+            if self.vision_layout == 'contact_sheet' and len(image_data_list) > 1:
+                contact_sheet = await self._build_contact_sheet_async(image_data_list)
+            
+            try:
+                image_data_list = list(image_data_list)
+                for attempt in range(3):
+                    try:
+                        request = self._vision_request(image_data_list, keyword, contact_sheet)
+                        response = await self._openai_call(
+                            lambda client: client.chat.completions.create(**request)
+                        )
+                        break
+                    except BadRequestError as e:
+                        failed = self._unfetchable_images(e, image_data_list)
+                        if not failed or attempt == 2:
+                            raise
+                        # Inline only the images the model couldn't fetch and retry
+                        logger.warning(f"Vision model could not fetch {len(failed)} image URLs, inlining them")
+                        inlined = await asyncio.gather(*[
+                            self.download_and_process_image_async(image_data_list[i]['url']) for i in failed
+                        ])
+                        if not all(image_data['success'] for image_data in inlined):
+                            raise
+                        for i, image_data in zip(failed, inlined):
+                            image_data_list[i] = image_data
+                result = self._parse_vision_response(response.choices[0].message.content.strip())
+                if result is None:
+                    # Not cached, so the next job with these candidates asks again
+                    return self._vision_fallback('Failed to parse analysis, using first image')
+                self._store_vision_result(keyword, video_ids, result)
+                return result
+                    
+            except Exception as e:
+                logger.error(f"OpenAI multi-image API call failed: {str(e)}")
+                return self._vision_fallback('API call failed, using first image')
+                
+        except Exception as e:
+            logger.error(f"Error in analyze_multiple_images_async: {str(e)}")
+            return self._vision_fallback('Analysis failed, using first image')
+
+    def _plan_vision_batches(self, entries: List[Dict]) -> List[List[int]]:
+        """Group ranking entries, in order, into requests within the image, keyword and payload limits"""
+        batches = []
+        current, images, payload = [], 0, 0
+        for i, entry in enumerate(entries):
+            if entry.get('contact_sheet'):
+                entry_images, entry_payload = 1, len(entry['contact_sheet'])
+            else:
+                entry_images = len(entry['image_data_list'])
+                entry_payload = sum(len(image_data.get('base64') or image_data['url']) for image_data in entry['image_data_list'])
+            
+            if current and (
+                images + entry_images > VISION_BATCH_MAX_IMAGES
+                or len(current) >= VISION_BATCH_MAX_KEYWORDS
+                or payload + entry_payload > VISION_BATCH_MAX_BYTES
+            ):
+                batches.append(current)
+                current, images, payload = [], 0, 0
+            current.append(i)
+            images += entry_images
+            payload += entry_payload
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_vision_request(self, entries: List[Dict]) -> Dict:
+        """Build the chat.completions arguments ranking several keywords' candidates in one call"""
+        content = [
+            {
+                "type": "text",
+                "text": f"""You are choosing b-roll footage for {len(entries)} keywords. Each keyword below is followed by its own candidate images; image indices restart at 0 for every keyword.
+
+For each keyword, compare only its own candidates and select the ONE that best represents it. Consider:
+- Overall relevance to the keyword
+- How clearly the image shows the concept
+- How well it would work as b-roll footage
+
+Respond in JSON format with exactly one entry per keyword:
+{{
+    "results": [
+        {{
+            "keyword_index": int (the number of the keyword),
+            "best_image_index": int (0-based index, or tile label, of the best image for that keyword),
+            "comparison_analysis": "string (brief explanation of why this image is the best choice)"
+        }}
+    ]
+}}"""
+            }
+        ]
+        
+        for k, entry in enumerate(entries):
+            count = len(entry['image_data_list'])
+            if entry.get('contact_sheet'):
+                content.append({
+                    "type": "text",
+                    "text": f"Keyword {k}: \"{entry['keyword']}\" - one contact sheet of {count} tiles labeled 0 to {count - 1}"
+                })
+                content.append(self._contact_sheet_content(entry['contact_sheet']))
+            else:
+                content.append({
+                    "type": "text",
+                    "text": f"Keyword {k}: \"{entry['keyword']}\" - {count} images, indices 0 to {count - 1} in order"
+                })
+                content.extend(self._image_content(image_data) for image_data in entry['image_data_list'])
+        
+        return {
+            'model': "gpt-4o",
+            'messages': [{"role": "user", "content": content}],
+            'max_tokens': 200 + 150 * len(entries),
+            'temperature': 0.1
+        }
+
+    def _parse_batch_vision_response(self, content_response: str, entries: List[Dict]) -> Dict[int, Dict]:
+        """Parse a batched ranking answer into per-keyword results, keyed by entry position"""
+        logger.info(f"OpenAI batched image analysis response: {content_response}")
+        
+        try:
+            start = content_response.find('{')
+            end = content_response.rfind('}') + 1
+            result = json.loads(content_response[start:end] if start != -1 and end != 0 else content_response)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse OpenAI batched image response: {str(e)}")
+            return {}
+        
+        parsed = {}
+        for item in result.get('results', []) if isinstance(result, dict) else []:
+            try:
+                keyword_index = int(item['keyword_index'])
+                best_index = int(item['best_image_index'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if keyword_index in parsed or not 0 <= keyword_index < len(entries):
+                continue
+            if not 0 <= best_index < len(entries[keyword_index]['image_data_list']):
+                continue
+            parsed[keyword_index] = {
+                'best_image_index': best_index,
+                'comparison_analysis': item.get('comparison_analysis', 'No analysis available'),
+                'overall_confidence': item.get('overall_confidence', 0.5),
+                'individual_scores': [],
+                'vision_approved': True
+            }
+        return parsed
+
+    async def _rank_batch_async(self, entries: List[Dict]) -> Dict[int, Dict]:
+        """Run one batched ranking call; returns the keywords it answered, or {} on failure"""
+        try:
+            request = self._batch_vision_request(entries)
+            response = await self._openai_call(lambda client: client.chat.completions.create(**request))
+            return self._parse_batch_vision_response(response.choices[0].message.content.strip(), entries)
+        except Exception as e:
+            logger.error(f"Batched vision call for {len(entries)} keywords failed: {str(e)}")
+            return {}
+
+    async def _rank_batched_async(self, candidate_sets: List[Dict], indices: List[int], results: List[Optional[Dict]]) -> None:
+        """Rank the given candidate sets in batched vision calls, filling results for those answered"""
+        entries = [
+            {
+                'keyword': candidate_sets[i]['keyword'],
+                'image_data_list': candidate_sets[i]['image_data_list'],
+                'contact_sheet': None
+            }
+            for i in indices
+        ]
+        if self.vision_layout == 'contact_sheet':
+            sheets = await asyncio.gather(*[
+                self._build_contact_sheet_async(entry['image_data_list'])
+                if len(entry['image_data_list']) > 1 else asyncio.sleep(0, result=None)
+                for entry in entries
+            ])
+            for entry, sheet in zip(entries, sheets):
+                entry['contact_sheet'] = sheet
+        
+        batches = self._plan_vision_batches(entries)
+        logger.info(f"Ranking {len(entries)} keywords in {len(batches)} batched vision calls")
+        answers = await asyncio.gather(*[
+            self._rank_batch_async([entries[j] for j in batch]) for batch in batches
+        ])
+        for batch, answer in zip(batches, answers):
+            for k, j in enumerate(batch):
+                if k in answer:
+                    i = indices[j]
+                    results[i] = answer[k]
+                    self._store_vision_result(candidate_sets[i]['keyword'], candidate_sets[i]['video_ids'], answer[k])
+
+    async def rank_candidate_sets_async(self, candidate_sets: List[Dict]) -> List[Dict]:
+        """Rank several keywords' candidates with as few vision calls as the request limits allow
+        
+        Each set comes from _collect_candidates_async. Cached decisions are reused, identical rankings
+        already in flight are joined, and keywords a batch fails to answer fall back to
+        analyze_multiple_images_async. Returns one analysis per set.
+        """
+        results: List[Optional[Dict]] = [None] * len(candidate_sets)
+        pending = []
+        for i, candidates in enumerate(candidate_sets):
+            cached = self._cached_vision_result(candidates['keyword'], candidates['video_ids'])
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        
+        # Join rankings of the same candidates already in flight (in this job or another one)
+        # and lead the rest; led rankings are published even if the batch fails
+        claimed: Dict[str, asyncio.Future] = {}
+        leading: List[Tuple[int, str, asyncio.Future]] = []
+        joined: List[Tuple[int, asyncio.Future]] = []
+        for i in pending:
+            key = self._vision_flight_key(candidate_sets[i]['keyword'], candidate_sets[i]['video_ids'])
+            if key in claimed:
+                joined.append((i, claimed[key]))
+                continue
+            future, leader = self.vision_flight.claim(key)
+            claimed[key] = future
+            if leader:
+                leading.append((i, key, future))
+            else:
+                joined.append((i, future))
+        
+        try:
+            if len(leading) > 1:
+                await self._rank_batched_async(candidate_sets, [i for i, _, _ in leading], results)
+        finally:
+            for i, key, future in leading:
+                self.vision_flight.resolve(key, future, results[i])
+        
+        shared = await asyncio.gather(*[self.vision_flight.wait(future) for _, future in joined])
+        for (i, _), result in zip(joined, shared):
+            results[i] = result
+        
+        unranked = [i for i, result in enumerate(results) if result is None]
+        if unranked:
+            if len(leading) > 1:
+                logger.warning(f"{len(unranked)} keywords missing from batched vision ranking, ranking them individually")
+            fallbacks = await asyncio.gather(*[
+                self.analyze_multiple_images_async(
+                    candidate_sets[i]['image_data_list'],
+                    candidate_sets[i]['keyword'],
+                    video_ids=candidate_sets[i]['video_ids']
+                )
+                for i in unranked
+            ])
+            for i, result in zip(unranked, fallbacks):
+                results[i] = result
+        return results
+
+    @staticmethod
+    def _thumbnail_variant_url(image_url: str, max_size: int) -> str:
+        """Ask the Pexels image CDN for a variant no larger than max_size instead of the full preview"""
+        parsed = urlparse(image_url)
+        if parsed.netloc != 'images.pexels.com':
+            return image_url
+
+        query = dict(parse_qsl(parsed.query))
+        width = int(query['w']) if query.get('w', '').isdigit() else None
+        height = int(query['h']) if query.get('h', '').isdigit() else None
+        if width and height:
+            # Keep the requested crop's aspect ratio, just smaller
+            scale = min(1.0, max_size / max(width, height))
+            query['w'], query['h'] = str(max(1, int(width * scale))), str(max(1, int(height * scale)))
+        elif width or height:
+            query['w' if width else 'h'] = str(min(width or height, max_size))
+        else:
+            query['w'] = str(max_size)
+        query.setdefault('auto', 'compress')
+        query.setdefault('cs', 'tinysrgb')
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    @staticmethod
+    def _process_image_bytes(image_url: str, image_data: bytes, max_size: int) -> Dict:
+        """Decode, downscale and base64-encode thumbnail bytes (CPU-bound, safe to run in a worker thread)"""
+        try:
             image = Image.open(BytesIO(image_data))
+            # JPEG draft mode decodes directly at a reduced scale (1/2, 1/4, 1/8)
+            image.draft('RGB', (max_size, max_size))
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
             # Resize if too large (OpenAI has size limits)
-            max_size = 1024
             if max(image.size) > max_size:
                 image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
             
@@ -190,6 +971,26 @@ The best_image_index should be the 0-based index of the image that best matches
                 'success': True
             }
             
+        except Exception as e:
+            logger.error(f"Failed to process image from {image_url}: {str(e)}")
+            return {
+                'url': image_url,
+                'base64': None,
+                'success': False,
+                'error': str(e)
+            }
+
+    def download_and_process_image(self, image_url: str) -> Dict:
+        """Download and process a single image for analysis"""
+        try:
+            # Download the image
+            response = HttpClient.get_sync_session().get(
+                self._thumbnail_variant_url(image_url, self.thumbnail_max_size),
+                timeout=HttpClient.sync_timeout()
+            )
+            response.raise_for_status()
+            return self._process_image_bytes(image_url, response.content, self.thumbnail_max_size)
+            
         except Exception as e:
             logger.error(f"Failed to download/process image from {image_url}: {str(e)}")
             return {
@@ -199,13 +1000,166 @@ The best_image_index should be the 0-based index of the image that best matches
                 'error': str(e)
             }
 
-    def get_keywords_from_openai(self, text: str, video_duration: float = None) -> List[Dict[str, float]]:
-        """Use OpenAI to analyze text and suggest keywords for b-roll footage"""
+    async def download_and_process_image_async(self, image_url: str) -> Dict:
+        """Fetch a thumbnail on the shared session and preprocess it off the event loop"""
         try:
-            duration_constraint = f"\nThe video is {video_duration:.2f} seconds long. Only suggest timestamps between 0 and {video_duration:.2f} seconds." if video_duration else ""
+            session = await HttpClient.get_session()
+            async with session.get(self._thumbnail_variant_url(image_url, self.thumbnail_max_size)) as response:
+                response.raise_for_status()
+                image_data = await response.read()
             
-            prompt = f"""Analyze this transcript and suggest specific keywords for finding relevant b-roll footage on Pexels.
-            The transcript includes timestamps in the format [start_time - end_time] before each segment.
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                IMAGE_EXECUTOR,
+                self._process_image_bytes,
+                image_url,
+                image_data,
+                self.thumbnail_max_size
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to download/process image from {image_url}: {str(e)}")
+            return {
+                'url': image_url,
+                'base64': None,
+                'success': False,
+                'error': str(e)
+            }
+
+    def _fetch_thumbnail(self, image_url: str, max_size: int) -> bytes:
+        """Download the raw bytes of a CDN thumbnail variant no larger than max_size"""
+        response = HttpClient.get_sync_session().get(
+            self._thumbnail_variant_url(image_url, max_size),
+            timeout=HttpClient.sync_timeout()
+        )
+        response.raise_for_status()
+        return response.content
+
+    async def _fetch_thumbnail_async(self, image_url: str, max_size: int) -> bytes:
+        """Async version of _fetch_thumbnail on the shared session"""
+        session = await HttpClient.get_session()
+        async with session.get(self._thumbnail_variant_url(image_url, max_size)) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    def _build_contact_sheet(self, image_data_list: List[Dict]) -> Optional[str]:
+        """Compose the candidates into one labeled grid, returned base64-encoded
+        
+        URL-mode entries are fetched at tile size. Returns None (send separate images) on failure.
+        """
+        try:
+            images = [
+                base64.b64decode(image_data['base64']) if image_data.get('base64')
+                else self._fetch_thumbnail(image_data['url'], CONTACT_SHEET_TILE_SIZE)
+                for image_data in image_data_list
+            ]
+            sheet = build_contact_sheet(images, tile_size=CONTACT_SHEET_TILE_SIZE)
+            logger.debug(f"Built contact sheet of {len(images)} tiles ({len(sheet)} bytes)")
+            return base64.b64encode(sheet).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Failed to build contact sheet, sending separate images: {str(e)}")
+            return None
+
+    async def _build_contact_sheet_async(self, image_data_list: List[Dict]) -> Optional[str]:
+        """Async version of _build_contact_sheet; composition runs in the image worker pool"""
+        async def image_bytes(image_data):
+            if image_data.get('base64'):
+                return base64.b64decode(image_data['base64'])
+            return await self._fetch_thumbnail_async(image_data['url'], CONTACT_SHEET_TILE_SIZE)
+
+        try:
+            images = await asyncio.gather(*[image_bytes(image_data) for image_data in image_data_list])
+            sheet = await asyncio.get_running_loop().run_in_executor(
+                IMAGE_EXECUTOR, build_contact_sheet, list(images), CONTACT_SHEET_TILE_SIZE
+            )
+            logger.debug(f"Built contact sheet of {len(images)} tiles ({len(sheet)} bytes)")
+            return base64.b64encode(sheet).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Failed to build contact sheet, sending separate images: {str(e)}")
+            return None
+
+    def _thumbnail_hash(self, video: Dict) -> Optional[str]:
+        """Perceptual hash of a candidate's thumbnail, cached by video ID"""
+        cache_key = str(video['id'])
+        cached = self.hash_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            image_hash = dhash(self._fetch_thumbnail(video['image_url'], HASH_THUMBNAIL_SIZE))
+        except Exception as e:
+            logger.warning(f"Failed to hash thumbnail for video {video['id']}: {str(e)}")
+            return None
+        if image_hash:
+            self.hash_cache.set(cache_key, image_hash)
+        return image_hash
+
+    async def _thumbnail_hash_async(self, video: Dict) -> Optional[str]:
+        """Async version of _thumbnail_hash; decoding runs in the image worker pool"""
+        cache_key = str(video['id'])
+        cached = self.hash_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            image_data = await self._fetch_thumbnail_async(video['image_url'], HASH_THUMBNAIL_SIZE)
+            image_hash = await asyncio.get_running_loop().run_in_executor(IMAGE_EXECUTOR, dhash, image_data)
+        except Exception as e:
+            logger.warning(f"Failed to hash thumbnail for video {video['id']}: {str(e)}")
+            return None
+        if image_hash:
+            self.hash_cache.set(cache_key, image_hash)
+        return image_hash
+
+    @staticmethod
+    def _collapse_duplicates(videos: List[Dict], hashes: List[Optional[str]], keyword: str) -> List[Dict]:
+        """Keep the first (highest ranked) video of each near-duplicate cluster"""
+        clusters = cluster_hashes(hashes, DEDUPE_MAX_DISTANCE)
+        if len(clusters) == len(videos):
+            return videos
+
+        kept = []
+        for cluster in clusters:
+            representative = videos[cluster[0]]
+            representative['duplicate_ids'] = [videos[i]['id'] for i in cluster[1:]]
+            kept.append(representative)
+        logger.info(f"Collapsed {len(videos)} candidates for '{keyword}' into {len(kept)} after near-duplicate removal")
+        return kept
+
+    def dedupe_candidates(self, videos: List[Dict], keyword: str) -> List[Dict]:
+        """Drop near-identical candidates by thumbnail perceptual hash before vision analysis"""
+        if not DEDUPE_ENABLED or len(videos) < 2:
+            return videos
+        try:
+            hashes = [self._thumbnail_hash(video) if video['image_url'] else None for video in videos]
+            return self._collapse_duplicates(videos, hashes, keyword)
+        except Exception as e:
+            logger.error(f"Near-duplicate removal failed, keeping all candidates: {str(e)}")
+            return videos
+
+    async def dedupe_candidates_async(self, videos: List[Dict], keyword: str) -> List[Dict]:
+        """Async version of dedupe_candidates hashing all thumbnails concurrently"""
+        if not DEDUPE_ENABLED or len(videos) < 2:
+            return videos
+        try:
+            hashes = await asyncio.gather(*[
+                self._thumbnail_hash_async(video) if video['image_url'] else asyncio.sleep(0, result=None)
+                for video in videos
+            ])
+            return self._collapse_duplicates(videos, list(hashes), keyword)
+        except Exception as e:
+            logger.error(f"Near-duplicate removal failed, keeping all candidates: {str(e)}")
+            return videos
+
+    def _keywords_request(self, text: str, video_duration: float = None, window: Optional[Dict] = None) -> Dict:
+        """Build the chat.completions arguments for keyword extraction"""
+        duration_constraint = f"\nThe video is {video_duration:.2f} seconds long. Only suggest timestamps between 0 and {video_duration:.2f} seconds." if video_duration else ""
+        if window and (window['start'] is not None or window['end'] is not None):
+            # Overlapping context outside the window is covered by the neighbouring request
+            window_start = window['start'] or 0.0
+            window_end = f"{window['end']:.2f}" if window['end'] is not None else "the end of the excerpt"
+            duration_constraint += f"\nThis is an excerpt of a longer video. Only suggest timestamps between {window_start:.2f} and {window_end} seconds; the lines outside that range are context only."
+        
+        prompt = f"""Analyze this transcript and suggest specific keywords for finding relevant b-roll footage on Pexels.
+            Each line of the transcript starts with its timestamp in seconds in square brackets.
             Consider the overall context and themes of the video.
             For each suggestion, provide:
             1. A specific, visual keyword good for finding stock footage
@@ -224,43 +1178,150 @@ The best_image_index should be the 0-based index of the image that best matches
             Transcript to analyze:
             {text}
             """
-            
+        
+        return {
+            'model': KEYWORD_MODEL,
+            'messages': [
+                {"role": "system", "content": "You are a video editor's assistant, expert at finding relevant b-roll footage. You must respond with ONLY a JSON array of objects with 'keyword', 'timestamp', 'confidence', and 'explanation' fields."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.3,
+            'max_tokens': KEYWORD_MAX_TOKENS
+        }
+
+    def _parse_keywords_response(self, content: str) -> List[Dict[str, float]]:
+        """Parse the JSON array of keyword suggestions returned by the model"""
+        logger.debug(f"OpenAI raw response: {content}")
+        
+        # Try to extract JSON if the response contains extra text
+        try:
+            # Find the first '[' and last ']' to extract the JSON array
+            start = content.find('[')
+            end = content.rfind(']') + 1
+            if start != -1 and end != 0:
+                json_str = content[start:end]
+            else:
+                json_str = content
+                
+            result = json.loads(json_str)
+            if isinstance(result, dict) and 'keywords' in result:
+                keywords = result['keywords']
+            else:
+                keywords = result  # Assume the model returned the array directly
+            logger.info(f"OpenAI suggested keywords: {keywords}")
+            return keywords
+        except json.JSONDecodeError as json_error:
+            # A completion cut off by max_tokens still holds every object finished before the cut
+            salvaged = JsonArrayStream().feed(content)
+            if salvaged:
+                logger.warning(f"OpenAI response was truncated, keeping {len(salvaged)} complete suggestions: {str(json_error)}")
+                return salvaged
+            logger.error(f"Failed to parse OpenAI response as JSON: {str(json_error)}")
+            logger.error(f"Raw response was: {content}")
+            return []
+
+    def _keyword_cache_key(self, segments: List[Dict], video_duration: float = None, windowed: bool = True) -> str:
+        """
+        Hash of everything that determines the LLM's keyword suggestions for a transcript
+
+        The windowed (async) and single-call (sync) paths prompt differently, so
+        they never share entries.
+        """
+        if windowed:
+            transcript = format_spans(compact_segments(segments, COMPACT_SPAN_SECONDS))
+            windows = [KEYWORD_WINDOW_SECONDS, KEYWORD_WINDOW_OVERLAP, TRANSCRIPT_COMPACTION]
+        else:
+            transcript = format_segments(segments)
+            windows = 'single_call'
+        material = json.dumps({
+            'transcript': transcript,
+            'duration_bucket': int(video_duration // KEYWORD_CACHE_DURATION_BUCKET) if video_duration else None,
+            'model': KEYWORD_MODEL,
+            'prompt_version': KEYWORD_PROMPT_VERSION,
+            'windows': windows
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def load_cached_keywords(self, key: str) -> Optional[List[Dict]]:
+        """Cached suggestions for a transcript key, from the local cache or the shared store"""
+        suggestions = self.keyword_cache.get(key)
+        if suggestions is not None:
+            logger.info(f"Reusing {len(suggestions)} cached keyword suggestions ({key[:12]})")
+            return suggestions
+        if self.artifact_store is None:
+            return None
+        try:
+            record = self.artifact_store.get_json(f"{KEYWORD_CACHE_PREFIX}{key}.json")
+        except Exception as e:
+            logger.warning(f"Shared keyword cache read failed for {key[:12]}: {str(e)}")
+            return None
+        if not record or not record.get('suggestions'):
+            return None
+        suggestions = record['suggestions']
+        self.keyword_cache.set(key, suggestions)
+        logger.info(f"Reusing {len(suggestions)} keyword suggestions from the shared cache ({key[:12]})")
+        return suggestions
+
+    def store_cached_keywords(self, key: str, suggestions: List[Dict]) -> None:
+        """Remember a complete set of LLM suggestions locally and in the shared store"""
+        self.keyword_cache.set(key, suggestions)
+        if self.artifact_store is None:
+            return
+        try:
+            self.artifact_store.put_json(f"{KEYWORD_CACHE_PREFIX}{key}.json", {
+                'model': KEYWORD_MODEL,
+                'prompt_version': KEYWORD_PROMPT_VERSION,
+                'created_at': time.time(),
+                'suggestions': suggestions
+            })
+        except Exception as e:
+            logger.warning(f"Shared keyword cache write failed for {key[:12]}: {str(e)}")
+
+    def get_keywords_locally(self, segments: List[Dict], video_duration: float = None) -> List[Dict[str, float]]:
+        """Extract keyword suggestions offline from the transcript segments, without OpenAI"""
+        try:
+            suggestions = extract_keywords(segments, KEYWORD_LOCAL_MIN_GAP, max_span_seconds=COMPACT_SPAN_SECONDS)
+            if video_duration:
+                suggestions = [suggestion for suggestion in suggestions if suggestion['timestamp'] < video_duration]
+            logger.info(f"Local keyword suggestions: {[suggestion['keyword'] for suggestion in suggestions]}")
+            return suggestions
+        except Exception as e:
+            logger.error(f"Local keyword extraction failed: {str(e)}")
+            logger.error(f"Error details: {traceback.format_exc()}")
+            return []
+
+    def get_keywords_from_openai(self, text: str, video_duration: float = None) -> List[Dict[str, float]]:
+        """Use OpenAI to analyze text and suggest keywords for b-roll footage"""
+        try:
             logger.debug(f"Sending transcript to OpenAI: {text}")
             try:
                 response = self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a video editor's assistant, expert at finding relevant b-roll footage. You must respond with ONLY a JSON array of objects with 'keyword', 'timestamp', 'confidence', and 'explanation' fields."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=500
+                    **self._keywords_request(text, video_duration)
                 )
+                return self._parse_keywords_response(response.choices[0].message.content.strip())
                 
-                content = response.choices[0].message.content.strip()
-                logger.debug(f"OpenAI raw response: {content}")
-                
-                # Try to extract JSON if the response contains extra text
-                try:
-                    # Find the first '[' and last ']' to extract the JSON array
-                    start = content.find('[')
-                    end = content.rfind(']') + 1
-                    if start != -1 and end != 0:
-                        json_str = content[start:end]
-                    else:
-                        json_str = content
-                        
-                    result = json.loads(json_str)
-                    if isinstance(result, dict) and 'keywords' in result:
-                        keywords = result['keywords']
-                    else:
-                        keywords = result  # Assume the model returned the array directly
-                    logger.info(f"OpenAI suggested keywords: {keywords}")
-                    return keywords
-                except json.JSONDecodeError as json_error:
-                    logger.error(f"Failed to parse OpenAI response as JSON: {str(json_error)}")
-                    logger.error(f"Raw response was: {content}")
-                    return []
+            except Exception as api_error:
+                logger.error(f"OpenAI API call failed: {str(api_error)}")
+                logger.error(f"API error details: {traceback.format_exc()}")
+                return []
+            
+        except Exception as e:
+            logger.error(f"Error getting keywords from OpenAI: {str(e)}")
+            logger.error(f"Error details: {traceback.format_exc()}")
+            return []
+
+    async def get_keywords_from_openai_async(self, text: str, video_duration: float = None, window: Optional[Dict] = None) -> List[Dict[str, float]]:
+        """Async version of get_keywords_from_openai that doesn't block the event loop"""
+        try:
+            logger.debug(f"Sending transcript to OpenAI: {text}")
+            try:
+                # Keyword extraction gates the whole job, so it jumps the queue
+                request = self._keywords_request(text, video_duration, window)
+                response = await self._openai_call(
+                    lambda client: client.chat.completions.create(**request),
+                    priority=PRIORITY_HIGH
+                )
+                return self._parse_keywords_response(response.choices[0].message.content.strip())
                 
             except Exception as api_error:
                 logger.error(f"OpenAI API call failed: {str(api_error)}")
@@ -272,6 +1333,253 @@ The best_image_index should be the 0-based index of the image that best matches
             logger.error(f"Error details: {traceback.format_exc()}")
             return []
 
+    async def stream_keywords_from_openai_async(self, text: str, video_duration: float = None, window: Optional[Dict] = None):
+        """Async generator yielding keyword suggestions as the streamed completion finishes each one"""
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        seen = set()
+        
+        async def consume(client):
+            parser = JsonArrayStream()
+            stream = await client.chat.completions.create(**self._keywords_request(text, video_duration, window), stream=True)
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for suggestion in parser.feed(chunk.choices[0].delta.content):
+                    queue.put_nowait(suggestion)
+        
+        async def produce():
+            try:
+                await self._openai_call(consume, priority=PRIORITY_HIGH)
+            except Exception as api_error:
+                logger.error(f"OpenAI streaming API call failed: {str(api_error)}")
+                logger.error(f"API error details: {traceback.format_exc()}")
+            finally:
+                queue.put_nowait(done)
+        
+        logger.debug(f"Streaming transcript to OpenAI: {text}")
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                suggestion = await queue.get()
+                if suggestion is done:
+                    break
+                if not isinstance(suggestion, dict) or not suggestion.get('keyword') or not isinstance(suggestion.get('timestamp'), (int, float)):
+                    logger.warning(f"Skipping malformed streamed suggestion: {suggestion}")
+                    continue
+                # A retried stream replays suggestions that were already yielded
+                key = (normalize_keyword(suggestion['keyword']), suggestion['timestamp'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                suggestion.setdefault('confidence', 0.5)
+                suggestion.setdefault('explanation', '')
+                logger.info(f"OpenAI streamed keyword: {suggestion['keyword']} at {suggestion['timestamp']}s")
+                yield suggestion
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    @staticmethod
+    def _window_suggestion_key(suggestion: Dict) -> Tuple[str, float]:
+        """Identity of a suggestion when merging windows: its keyword at (about) the same time"""
+        return normalize_keyword(suggestion['keyword']), round(float(suggestion['timestamp']), 1)
+
+    def _keyword_windows(self, segments: List[Dict]) -> List[Dict]:
+        """Prompt windows over the transcript, compacted into sentence-level spans if enabled"""
+        if not TRANSCRIPT_COMPACTION:
+            return transcript_windows(segments, KEYWORD_WINDOW_SECONDS, KEYWORD_WINDOW_OVERLAP)
+        spans = compact_segments(segments, COMPACT_SPAN_SECONDS)
+        windows = transcript_windows(spans, KEYWORD_WINDOW_SECONDS, KEYWORD_WINDOW_OVERLAP, formatter=format_spans)
+        for window in windows:
+            window['compacted'] = True
+        logger.info(f"Compacted {len(segments)} transcript segments into {len(spans)} spans")
+        return windows
+
+    @staticmethod
+    def _pin_timestamp(window: Dict, suggestion: Dict) -> Dict:
+        """Replace a timestamp given against compacted spans with the precise segment start"""
+        if window.get('compacted'):
+            suggestion['timestamp'] = precise_timestamp(window['segments'], suggestion['timestamp'], suggestion['keyword'])
+        return suggestion
+
+    async def get_window_keywords_async(self, windows: List[Dict], video_duration: float = None, deadline: Optional[float] = None,
+                                        outcome: Optional[Dict] = None) -> List[Dict[str, float]]:
+        """Extract keywords from every transcript window concurrently and merge them in time order
+        
+        Each window keeps only the suggestions inside the range it owns, so the overlapping
+        context never produces the same suggestion twice, and repeats are dropped by timestamp.
+        Windows still running after deadline seconds are abandoned. If given, outcome['incomplete']
+        is set to the number of windows that missed the deadline or produced nothing.
+        """
+        if not windows:
+            # Nothing left to prompt with (e.g. a transcript of only fillers)
+            if outcome is not None:
+                outcome['incomplete'] = 0
+            return []
+        tasks = [
+            asyncio.ensure_future(self.get_keywords_from_openai_async(window['text'], video_duration, window))
+            for window in windows
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        if pending:
+            logger.warning(f"{len(pending)} of {len(tasks)} keyword windows missed the {deadline:g}s deadline")
+            for task in pending:
+                task.cancel()
+        merged = []
+        seen = set()
+        incomplete = len(pending)
+        for window, task in zip(windows, tasks):
+            if task not in done:
+                continue
+            suggestions = task.result()
+            if not suggestions:
+                incomplete += 1
+            for suggestion in suggestions:
+                if not isinstance(suggestion, dict) or not suggestion.get('keyword') or not isinstance(suggestion.get('timestamp'), (int, float)):
+                    logger.warning(f"Skipping malformed suggestion: {suggestion}")
+                    continue
+                if not window_owns(window, suggestion['timestamp']):
+                    continue
+                self._pin_timestamp(window, suggestion)
+                key = self._window_suggestion_key(suggestion)
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(suggestion)
+        merged.sort(key=lambda suggestion: suggestion['timestamp'])
+        if outcome is not None:
+            outcome['incomplete'] = incomplete
+        if len(windows) > 1:
+            logger.info(f"Merged {len(merged)} keyword suggestions from {len(windows)} transcript windows")
+        return merged
+
+    async def stream_window_keywords_async(self, windows: List[Dict], video_duration: float = None, outcome: Optional[Dict] = None):
+        """Async generator merging the streamed suggestions of every transcript window as they arrive
+        
+        If given, outcome['incomplete'] counts the windows whose stream failed or produced nothing.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        seen = set()
+        if outcome is not None:
+            outcome['incomplete'] = 0
+        
+        async def pump(window):
+            produced = 0
+            try:
+                async for suggestion in self.stream_keywords_from_openai_async(window['text'], video_duration, window):
+                    produced += 1
+                    if window_owns(window, suggestion['timestamp']):
+                        queue.put_nowait(self._pin_timestamp(window, suggestion))
+            except Exception as e:
+                logger.error(f"Keyword stream for transcript window failed: {str(e)}")
+                produced = 0
+            finally:
+                if not produced and outcome is not None:
+                    outcome['incomplete'] += 1
+                queue.put_nowait(done)
+        
+        pumps = [asyncio.ensure_future(pump(window)) for window in windows]
+        remaining = len(pumps)
+        try:
+            while remaining:
+                suggestion = await queue.get()
+                if suggestion is done:
+                    remaining -= 1
+                    continue
+                key = self._window_suggestion_key(suggestion)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield suggestion
+        finally:
+            for task in pumps:
+                if not task.done():
+                    task.cancel()
+
+    def _indexed_broll(self, keyword: str, orientation: str) -> Optional[List[Dict]]:
+        """Reuse the clip approved for a sufficiently similar keyword, if the index has one"""
+        if self.broll_index is None:
+            return None
+        try:
+            match = self.broll_index.lookup(keyword, orientation, BROLL_INDEX_MIN_SIMILARITY)
+        except Exception as e:
+            logger.warning(f"B-roll index lookup failed for '{keyword}': {str(e)}")
+            return None
+        if match is None:
+            return None
+
+        video = match['video']
+        video.update({
+            'relevance_score': 1.0,
+            'confidence': match['similarity'],
+            'analysis': f"Reused clip approved for '{match['keyword']}' (similarity {match['similarity']:.2f})",
+            'is_best_match': True,
+            'reused_from': match['keyword']
+        })
+        logger.info(f"Reusing approved b-roll {video.get('id')} for '{keyword}' (matched '{match['keyword']}', similarity {match['similarity']:.2f})")
+        return [video]
+
+    def _remember_broll(self, keyword: str, orientation: str, best_video: Optional[Dict]) -> None:
+        """Add a vision-approved selection to the b-roll index
+        
+        Fallback picks (vision call failed or unparseable) are never indexed.
+        """
+        if self.broll_index is None or not best_video or not best_video.get('vision_approved'):
+            return
+        if best_video.get('reused_from') or best_video.get('grouped_with'):
+            return
+        try:
+            self.broll_index.add(keyword, orientation, {
+                key: best_video.get(key) for key in ('id', 'url', 'width', 'height', 'duration', 'fps', 'image_url')
+            })
+        except Exception as e:
+            logger.warning(f"Failed to add '{keyword}' to the b-roll index: {str(e)}")
+
+    def _group_suggestions(self, suggestions: List[Dict], indices: List[int]) -> List[List[int]]:
+        """Cluster the given suggestions by keyword similarity, most confident member first"""
+        ordered = sorted(indices, key=lambda i: suggestions[i].get('confidence', 0), reverse=True)
+        try:
+            clusters = group_keywords([suggestions[i]['keyword'] for i in ordered], KEYWORD_GROUP_SIMILARITY)
+        except Exception as e:
+            logger.warning(f"Keyword grouping failed, searching every keyword: {str(e)}")
+            return [[i] for i in indices]
+        
+        groups = [[ordered[j] for j in cluster] for cluster in clusters]
+        for group in groups:
+            if len(group) > 1:
+                logger.info(f"Grouped keywords {[suggestions[i]['keyword'] for i in group]} into one search")
+        return groups
+
+    def _distribute_broll(self, suggestions: List[Dict], group: List[int], broll_results: List[Dict]) -> Dict[int, List[Dict]]:
+        """Give each suggestion of a keyword group its own clip from the group's ranked results
+        
+        The lead keyword keeps the vision pick; the others take the next distinct candidates in
+        rank order. Members left without a distinct clip get no b-roll rather than a repeat.
+        """
+        if len(group) == 1:
+            return {group[0]: broll_results}
+        
+        lead_keyword = suggestions[group[0]]['keyword']
+        distributed = {}
+        for j, i in enumerate(group):
+            if j >= len(broll_results):
+                logger.warning(f"No distinct b-roll left for '{suggestions[i]['keyword']}' in the '{lead_keyword}' group")
+                distributed[i] = []
+                continue
+            options = copy.deepcopy(broll_results[j:] + broll_results[:j])
+            for k, video in enumerate(options):
+                video['is_best_match'] = k == 0
+            if j > 0:
+                options[0].update({
+                    'grouped_with': lead_keyword,
+                    'vision_approved': False,
+                    'analysis': f"Distinct clip from the shared search for '{lead_keyword}'"
+                })
+            distributed[i] = options
+        return distributed
+
     def get_broll_suggestions(self, segments: List[Dict], video_duration: float = None, video_width: int = None, video_height: int = None, fps: float = 30.0) -> List[Dict]:
         """Generate b-roll suggestions for the entire video transcript"""
         logger.info("Starting b-roll suggestions generation...")
@@ -284,14 +1592,22 @@ The best_image_index should be the 0-based index of the image that best matches
         logger.info(f"Video orientation: {orientation} ({video_width}x{video_height})")
         
         # Combine all segments into a single transcript with timestamps
-        transcript = "\n".join([
-            f"[{segment['start']:.2f}s - {segment['end']:.2f}s] {segment['text']}"
-            for segment in segments
-        ])
+        transcript = format_segments(segments)
         logger.info(f"Combined transcript length: {len(transcript)} characters")
         
-        # Get keywords and timestamps from OpenAI
-        suggestions = self.get_keywords_from_openai(transcript, video_duration)
+        # Get keywords and timestamps from OpenAI (or its cache), or offline when it fails or local mode is selected
+        suggestions = []
+        if KEYWORD_MODE != 'local':
+            cache_key = self._keyword_cache_key(segments, video_duration, windowed=False) if KEYWORD_CACHE_ENABLED else None
+            cached = self.load_cached_keywords(cache_key) if cache_key else None
+            if cached:
+                suggestions = copy.deepcopy(cached)
+            else:
+                suggestions = self.get_keywords_from_openai(transcript, video_duration)
+                if suggestions and cache_key:
+                    self.store_cached_keywords(cache_key, copy.deepcopy(suggestions))
+        if not suggestions:
+            suggestions = self.get_keywords_locally(segments, video_duration)
         if not suggestions:
             logger.warning("No b-roll suggestions generated from transcript")
             return []
@@ -315,19 +1631,22 @@ The best_image_index should be the 0-based index of the image that best matches
                     logger.warning(f"Skipping suggestion at {timestamp:.2f}s as it's beyond video duration ({video_duration:.2f}s)")
                     continue
                 
-                logger.info(f"Searching for b-roll at {timestamp:.2f}s with keyword: {keyword}")
-                broll_results = self.search_broll(
-                    keyword, 
-                    5.0,
-                    orientation=orientation,
-                    target_width=video_width,
-                    target_height=video_height,
-                    target_fps=fps
-                )
+                broll_results = self._indexed_broll(keyword, orientation)
+                if broll_results is None:
+                    logger.info(f"Searching for b-roll at {timestamp:.2f}s with keyword: {keyword}")
+                    broll_results = self.search_broll(
+                        keyword, 
+                        5.0,
+                        orientation=orientation,
+                        target_width=video_width,
+                        target_height=video_height,
+                        target_fps=fps
+                    )
                 
                 if broll_results:
                     # Get the best video from the analyzed results
                     best_video = self.get_best_broll_video(broll_results, keyword)
+                    self._remember_broll(keyword, orientation, best_video)
                     
                     final_suggestion = {
                         'timestamp': timestamp,
@@ -349,11 +1668,175 @@ The best_image_index should be the 0-based index of the image that best matches
                 logger.error(f"Error details: {traceback.format_exc()}")
                 continue
         
+        if self.broll_index is not None:
+            self.broll_index.save()
+        
         logger.info(f"Successfully processed {len(final_suggestions)} b-roll suggestions")
         return final_suggestions
 
+    def _filter_candidates(self, videos: List[Dict], duration: float, orientation: str) -> List[Dict]:
+        """Turn normalized provider results into candidate video objects, dropping short or wrongly oriented clips"""
+        videos_with_images = []
+        
+        for video in videos:
+            try:
+                # Get the highest quality video file
+                video_files = video.get('video_files', [])
+                if not video_files:
+                    continue
+                
+                # Sort by quality (prefer HD)
+                video_files.sort(key=lambda x: x.get('width', 0) * x.get('height', 0), reverse=True)
+                video_file = video_files[0]
+                
+                # Extract FPS from URL if available
+                fps_match = re.search(r'(\d+)fps', video_file.get('link', ''))
+                video_fps = int(fps_match.group(1)) if fps_match else None
+                
+                # Skip if video is too short
+                if video.get('duration', 0) < duration:
+                    logger.debug(f"Skipping video with duration {video.get('duration')}s (too short)")
+                    continue
+                
+                # Skip if orientation doesn't match
+                if orientation == "portrait" and video.get('width', 0) >= video.get('height', 0):
+                    logger.debug("Skipping landscape video (portrait requested)")
+                    continue
+                elif orientation == "landscape" and video.get('width', 0) < video.get('height', 0):
+                    logger.debug("Skipping portrait video (landscape requested)")
+                    continue
+                
+                # Get video thumbnail for analysis
+                image_url = video.get('image', '')
+                if not image_url:
+                    # Try to get image from video_files
+                    for vf in video_files:
+                        if vf.get('file_type', '').startswith('image'):
+                            image_url = vf.get('link', '')
+                            break
+                
+                # Create video object
+                video_obj = {
+                    'id': video.get('id'),
+                    'provider': video.get('provider', 'pexels'),
+                    'url': video_file.get('link'),
+                    'width': video_file.get('width'),
+                    'height': video_file.get('height'),
+                    'duration': video.get('duration'),
+                    'fps': video_fps,
+                    'image_url': image_url,
+                    'video_index': len(videos_with_images)  # Track original position
+                }
+                
+                videos_with_images.append(video_obj)
+                
+            except Exception as e:
+                logger.error(f"Error processing video: {str(e)}")
+                continue
+        
+        return videos_with_images
+
+    def _apply_analysis(self, videos_with_images: List[Dict], valid_video_indices: List[int], analysis_result: Optional[Dict]) -> List[Dict]:
+        """Score candidates from a vision ranking result and return them best first
+        
+        analysis_result is None when no thumbnail could be analyzed.
+        """
+        if analysis_result is None:
+            logger.warning("No images could be processed for analysis")
+            # Fallback: return all videos with default scores
+            for video in videos_with_images:
+                video.update({
+                    'relevance_score': 0.5,
+                    'confidence': 0.0,
+                    'analysis': 'No image available for analysis',
+                    'is_best_match': False,
+                    'vision_approved': False
+                })
+            return videos_with_images
+        
+        # Process the analysis results
+        best_index = analysis_result.get('best_image_index', 0)
+        comparison_analysis = analysis_result.get('comparison_analysis', 'No analysis available')
+        overall_confidence = analysis_result.get('overall_confidence', 0.5)
+        individual_scores = analysis_result.get('individual_scores', [])
+        
+        logger.info(f"Analysis complete. Best image index: {best_index}")
+        logger.info(f"Overall confidence: {overall_confidence:.3f}")
+        logger.info(f"Comparison analysis: {comparison_analysis}")
+        
+        # Create a mapping from analysis index to video index
+        analysis_to_video_map = {}
+        for i, video_idx in enumerate(valid_video_indices):
+            analysis_to_video_map[i] = video_idx
+        
+        # Find the best video based on analysis
+        if best_index in analysis_to_video_map:
+            best_video_index = analysis_to_video_map[best_index]
+            best_video = videos_with_images[best_video_index]
+            
+            # Add analysis data to the best video
+            best_video.update({
+                'relevance_score': 1.0,  # Best video gets highest score
+                'confidence': overall_confidence,
+                'analysis': comparison_analysis,
+                'is_best_match': True,
+                'vision_approved': bool(analysis_result.get('vision_approved'))
+            })
+            
+            # Add analysis data to other videos
+            for i, video_idx in enumerate(valid_video_indices):
+                if i != best_index:
+                    video = videos_with_images[video_idx]
+                    # Find individual score if available
+                    individual_score = next((score for score in individual_scores if score.get('index') == i), None)
+                    
+                    video.update({
+                        'relevance_score': individual_score.get('relevance_score', 0.5) if individual_score else 0.5,
+                        'confidence': overall_confidence,
+                        'analysis': individual_score.get('brief_analysis', 'Analyzed but not selected as best') if individual_score else 'Analyzed but not selected as best',
+                        'is_best_match': False,
+                        'vision_approved': False
+                    })
+            
+            # Add default analysis for videos without images
+            for i, video in enumerate(videos_with_images):
+                if i not in valid_video_indices:
+                    video.update({
+                        'relevance_score': 0.3,
+                        'confidence': 0.0,
+                        'analysis': 'No image available for analysis',
+                        'is_best_match': False,
+                        'vision_approved': False
+                    })
+            
+            # Sort videos by relevance score (best video first)
+            videos_with_images.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+            
+            # Filter out videos with very low relevance scores
+            min_relevance_threshold = 0.3
+            filtered_videos = [
+                video for video in videos_with_images 
+                if video.get('relevance_score', 0) >= min_relevance_threshold
+            ]
+            
+            logger.info(f"Found {len(filtered_videos)} videos with relevance score >= {min_relevance_threshold}")
+            logger.info(f"Best video ID: {best_video['id']} (Score: {best_video['relevance_score']:.3f})")
+            return filtered_videos
+        
+        logger.error(f"Best image index {best_index} not found in valid video indices")
+        # Fallback: return all videos with default scores
+        for video in videos_with_images:
+            video.update({
+                'relevance_score': 0.5,
+                'confidence': 0.0,
+                'analysis': 'Analysis failed, using default score',
+                'is_best_match': False,
+                'vision_approved': False
+            })
+        return videos_with_images
+
     def search_broll(self, keyword: str, duration: float, orientation: str = "horizontal", target_width: int = None, target_height: int = None, target_fps: float = None) -> List[Dict]:
-        """Search for b-roll footage using Pexels API"""
+        """Search for b-roll footage using the configured stock footage providers"""
         try:
             logger.info(f"Searching for b-roll with keyword: {keyword} (orientation: {orientation})")
             
@@ -362,102 +1845,24 @@ The best_image_index should be the 0-based index of the image that best matches
             if rounded_fps:
                 logger.info(f"Target FPS: {target_fps} (rounded to {rounded_fps})")
             
-            # Search for videos
-            logger.debug(f"Making Pexels API call with keyword: {keyword}")
-            try:
-                headers = {"Authorization": self.pexels_api_key}
-                response = requests.get(
-                    f"{self.pexels_base_url}/search",
-                    params={
-                        "query": keyword,
-                        "per_page": 10,  # Increased to get more options to filter
-                        "orientation": orientation
-                    },
-                    headers=headers
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Pexels API call failed with status code: {response.status_code}")
-                    logger.error(f"Response: {response.text}")
-                    return []
-                
-                data = response.json()
-                videos = data.get('videos', [])
-                logger.debug(f"API call successful, got {len(videos)} videos")
-                
-            except Exception as api_error:
-                logger.error(f"Pexels API call failed: {str(api_error)}")
-                logger.error(f"API error details: {traceback.format_exc()}")
+            # Search for videos, falling through the providers in preference order
+            videos = self._search_providers(keyword, duration, orientation)
+            if videos is None:
                 return []
             
             if not videos:
                 logger.warning(f"No videos found for keyword: {keyword}")
                 return []
             
-            # Filter and process videos with multi-image analysis
-            filtered_videos = []
-            videos_with_images = []
-            
             # First pass: collect all videos and their images
-            for video in videos:
-                try:
-                    # Get the highest quality video file
-                    video_files = video.get('video_files', [])
-                    if not video_files:
-                        continue
-                    
-                    # Sort by quality (prefer HD)
-                    video_files.sort(key=lambda x: x.get('width', 0) * x.get('height', 0), reverse=True)
-                    video_file = video_files[0]
-                    
-                    # Extract FPS from URL if available
-                    fps_match = re.search(r'(\d+)fps', video_file.get('link', ''))
-                    video_fps = int(fps_match.group(1)) if fps_match else None
-                    
-                    # Skip if video is too short
-                    if video.get('duration', 0) < duration:
-                        logger.debug(f"Skipping video with duration {video.get('duration')}s (too short)")
-                        continue
-                    
-                    # Skip if orientation doesn't match
-                    if orientation == "portrait" and video.get('width', 0) >= video.get('height', 0):
-                        logger.debug("Skipping landscape video (portrait requested)")
-                        continue
-                    elif orientation == "landscape" and video.get('width', 0) < video.get('height', 0):
-                        logger.debug("Skipping portrait video (landscape requested)")
-                        continue
-                    
-                    # Get video thumbnail for analysis
-                    image_url = video.get('image', '')
-                    if not image_url:
-                        # Try to get image from video_files
-                        for vf in video_files:
-                            if vf.get('file_type', '').startswith('image'):
-                                image_url = vf.get('link', '')
-                                break
-                    
-                    # Create video object
-                    video_obj = {
-                        'id': video.get('id'),
-                        'url': video_file.get('link'),
-                        'width': video_file.get('width'),
-                        'height': video_file.get('height'),
-                        'duration': video.get('duration'),
-                        'fps': video_fps,
-                        'image_url': image_url,
-                        'video_index': len(videos_with_images)  # Track original position
-                    }
-                    
-                    videos_with_images.append(video_obj)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing video: {str(e)}")
-                    continue
-            
+            videos_with_images = self._filter_candidates(videos, duration, orientation)
             if not videos_with_images:
                 logger.warning("No videos passed initial filtering")
                 return []
             
+            # Collapse near-duplicate clips so each look is only sent to the vision model once
+            videos_with_images = self.dedupe_candidates(videos_with_images, keyword)
+            
             # Download and process all images
             logger.info(f"Downloading and processing {len(videos_with_images)} images for analysis")
             image_data_list = []
@@ -465,7 +1870,10 @@ The best_image_index should be the 0-based index of the image that best matches
             
             for i, video in enumerate(videos_with_images):
                 if video['image_url']:
-                    image_data = self.download_and_process_image(video['image_url'])
+                    if self.vision_image_mode == 'url':
+                        image_data = self._url_image_data(video['image_url'])
+                    else:
+                        image_data = self.download_and_process_image(video['image_url'])
                     if image_data['success']:
                         image_data_list.append(image_data)
                         valid_video_indices.append(i)
@@ -476,106 +1884,140 @@ The best_image_index should be the 0-based index of the image that best matches
                     logger.warning(f"No image URL for video {video['id']}")
             
             # Analyze all images together if we have any
+            analysis_result = None
             if image_data_list:
                 logger.info(f"Analyzing {len(image_data_list)} images with OpenAI Vision")
-                analysis_result = self.analyze_multiple_images(image_data_list, keyword)
-                
-                # Process the analysis results
-                best_index = analysis_result.get('best_image_index', 0)
-                comparison_analysis = analysis_result.get('comparison_analysis', 'No analysis available')
-                overall_confidence = analysis_result.get('overall_confidence', 0.5)
-                individual_scores = analysis_result.get('individual_scores', [])
-                
-                logger.info(f"Analysis complete. Best image index: {best_index}")
-                logger.info(f"Overall confidence: {overall_confidence:.3f}")
-                logger.info(f"Comparison analysis: {comparison_analysis}")
-                
-                # Create a mapping from analysis index to video index
-                analysis_to_video_map = {}
-                for i, video_idx in enumerate(valid_video_indices):
-                    analysis_to_video_map[i] = video_idx
-                
-                # Find the best video based on analysis
-                if best_index in analysis_to_video_map:
-                    best_video_index = analysis_to_video_map[best_index]
-                    best_video = videos_with_images[best_video_index]
-                    
-                    # Add analysis data to the best video
-                    best_video.update({
-                        'relevance_score': 1.0,  # Best video gets highest score
-                        'confidence': overall_confidence,
-                        'analysis': comparison_analysis,
-                        'is_best_match': True
-                    })
-                    
-                    # Add analysis data to other videos
-                    for i, video_idx in enumerate(valid_video_indices):
-                        if i != best_index:
-                            video = videos_with_images[video_idx]
-                            # Find individual score if available
-                            individual_score = next((score for score in individual_scores if score.get('index') == i), None)
-                            
-                            video.update({
-                                'relevance_score': individual_score.get('relevance_score', 0.5) if individual_score else 0.5,
-                                'confidence': overall_confidence,
-                                'analysis': individual_score.get('brief_analysis', 'Analyzed but not selected as best') if individual_score else 'Analyzed but not selected as best',
-                                'is_best_match': False
-                            })
-                    
-                    # Add default analysis for videos without images
-                    for i, video in enumerate(videos_with_images):
-                        if i not in valid_video_indices:
-                            video.update({
-                                'relevance_score': 0.3,
-                                'confidence': 0.0,
-                                'analysis': 'No image available for analysis',
-                                'is_best_match': False
-                            })
-                    
-                    # Sort videos by relevance score (best video first)
-                    videos_with_images.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-                    
-                    # Filter out videos with very low relevance scores
-                    min_relevance_threshold = 0.3
-                    filtered_videos = [
-                        video for video in videos_with_images 
-                        if video.get('relevance_score', 0) >= min_relevance_threshold
-                    ]
-                    
-                    logger.info(f"Found {len(filtered_videos)} videos with relevance score >= {min_relevance_threshold}")
-                    logger.info(f"Best video ID: {best_video['id']} (Score: {best_video['relevance_score']:.3f})")
-                    
-                else:
-                    logger.error(f"Best image index {best_index} not found in valid video indices")
-                    # Fallback: return all videos with default scores
-                    for video in videos_with_images:
-                        video.update({
-                            'relevance_score': 0.5,
-                            'confidence': 0.0,
-                            'analysis': 'Analysis failed, using default score',
-                            'is_best_match': False
-                        })
-                    filtered_videos = videos_with_images
-                    
-            else:
-                logger.warning("No images could be processed for analysis")
-                # Fallback: return all videos with default scores
-                for video in videos_with_images:
-                    video.update({
-                        'relevance_score': 0.5,
-                        'confidence': 0.0,
-                        'analysis': 'No image available for analysis',
-                        'is_best_match': False
-                    })
-                filtered_videos = videos_with_images
+                analysis_result = self.analyze_multiple_images(
+                    image_data_list,
+                    keyword,
+                    video_ids=[videos_with_images[i]['id'] for i in valid_video_indices]
+                )
             
-            return filtered_videos
+            return self._apply_analysis(videos_with_images, valid_video_indices, analysis_result)
             
         except Exception as e:
             logger.error(f"Error in search_broll: {str(e)}")
             logger.error(f"Error details: {traceback.format_exc()}")
             return []
 
+    async def _resolve_broll_async(self, suggestions: List[Dict], video_duration: float, orientation: str, video_width: int, video_height: int, fps: float) -> Dict[int, List[Dict]]:
+        """Find b-roll results for every in-range suggestion, keyed by suggestion index"""
+        # Keywords close to previously approved ones reuse that clip without search or vision
+        in_range = [
+            i for i, suggestion in enumerate(suggestions)
+            if not (video_duration and suggestion['timestamp'] >= video_duration)
+        ]
+        prefetched = {}
+        for i in in_range:
+            reused = self._indexed_broll(suggestions[i]['keyword'], orientation)
+            if reused:
+                prefetched[i] = reused
+        
+        # Near-duplicate keywords share one search, led by the most confident keyword
+        remaining = [i for i in in_range if i not in prefetched]
+        groups = self._group_suggestions(suggestions, remaining) if KEYWORD_GROUPING else [[i] for i in remaining]
+        search_keywords = [suggestions[group[0]]['keyword'] for group in groups]
+        
+        # In batched mode all groups' candidates are ranked together in a few vision calls
+        if VISION_BATCHING:
+            group_results = await self.search_broll_batch_async(
+                search_keywords,
+                5.0,
+                orientation=orientation,
+                target_width=video_width,
+                target_height=video_height,
+                target_fps=fps
+            )
+        else:
+            group_results = await asyncio.gather(*[
+                self.search_broll_async(
+                    keyword,
+                    5.0,
+                    orientation=orientation,
+                    target_width=video_width,
+                    target_height=video_height,
+                    target_fps=fps
+                )
+                for keyword in search_keywords
+            ])
+        for group, broll_results in zip(groups, group_results):
+            prefetched.update(self._distribute_broll(suggestions, group, broll_results))
+        return prefetched
+
+    async def _stream_broll_async(self, windows: List[Dict], video_duration: float, orientation: str, video_width: int, video_height: int, fps: float,
+                                  deadline: Optional[float] = None, outcome: Optional[Dict] = None) -> Tuple[List[Dict], Dict[int, List[Dict]]]:
+        """Stream keyword suggestions and start each one's b-roll retrieval as soon as it is complete
+        
+        Keywords served by the approved-clip index need no retrieval, and keywords similar to an
+        already launched one join its group. In batched mode only candidate collection overlaps the
+        stream and all groups are ranked together once it ends. The stream is cut off after deadline
+        seconds, keeping the suggestions received so far (outcome['incomplete'] is then non-zero).
+        Returns the suggestions and their b-roll results keyed by suggestion index.
+        """
+        suggestions: List[Dict] = []
+        prefetched: Dict[int, List[Dict]] = {}
+        groups: List[Dict] = []
+        # Same centroid assignment as _group_suggestions, fed in arrival order; its clusters line up with groups
+        grouper = KeywordGrouper(KEYWORD_GROUP_SIMILARITY) if KEYWORD_GROUPING else None
+        
+        outcome = outcome if outcome is not None else {}
+        stream = self.stream_window_keywords_async(windows, video_duration, outcome)
+        cutoff = time.monotonic() + deadline if deadline is not None else None
+        while True:
+            try:
+                timeout = max(0.0, cutoff - time.monotonic()) if cutoff is not None else None
+                suggestion = await asyncio.wait_for(stream.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                logger.warning(f"Keyword stream missed the {deadline:g}s deadline, keeping {len(suggestions)} suggestions")
+                await stream.aclose()
+                outcome['incomplete'] = outcome.get('incomplete', 0) + 1
+                break
+            i = len(suggestions)
+            suggestions.append(suggestion)
+            keyword = suggestion['keyword']
+            if video_duration and suggestion['timestamp'] >= video_duration:
+                continue
+            
+            reused = self._indexed_broll(keyword, orientation)
+            if reused:
+                prefetched[i] = reused
+                continue
+            
+            if grouper is not None:
+                cluster = grouper.add(keyword)
+                if cluster < len(groups):
+                    group = groups[cluster]
+                    logger.info(f"Grouped streamed keyword '{keyword}' with '{suggestions[group['members'][0]]['keyword']}'")
+                    group['members'].append(i)
+                    continue
+            
+            logger.info(f"Starting b-roll retrieval for streamed keyword: {keyword}")
+            if VISION_BATCHING:
+                task = asyncio.ensure_future(self._collect_candidates_async(keyword, 5.0, orientation, fps))
+            else:
+                task = asyncio.ensure_future(self.search_broll_async(
+                    keyword,
+                    5.0,
+                    orientation=orientation,
+                    target_width=video_width,
+                    target_height=video_height,
+                    target_fps=fps
+                ))
+            groups.append({'members': [i], 'task': task})
+        
+        outcomes = await asyncio.gather(*[group['task'] for group in groups], return_exceptions=True)
+        if VISION_BATCHING:
+            keywords = [suggestions[group['members'][0]]['keyword'] for group in groups]
+            group_results = await self._rank_collected_async(keywords, list(outcomes))
+        else:
+            group_results = [[] if isinstance(outcome, Exception) else outcome for outcome in outcomes]
+        
+        for group, broll_results in zip(groups, group_results):
+            prefetched.update(self._distribute_broll(suggestions, group['members'], broll_results))
+        return suggestions, prefetched
+
     async def get_broll_suggestions_async(self, segments: List[Dict], video_duration: float = None, video_width: int = None, video_height: int = None, fps: float = 30.0) -> List[Dict]:
         """Async version of get_broll_suggestions with parallel processing of multiple keywords"""
         logger.info("Starting async b-roll suggestions generation...")
@@ -587,15 +2029,37 @@ The best_image_index should be the 0-based index of the image that best matches
         orientation = "portrait" if is_vertical else "landscape"
         logger.info(f"Video orientation: {orientation} ({video_width}x{video_height})")
         
-        # Combine all segments into a single transcript with timestamps
-        transcript = "\n".join([
-            f"[{segment['start']:.2f}s - {segment['end']:.2f}s] {segment['text']}"
-            for segment in segments
-        ])
-        logger.info(f"Combined transcript length: {len(transcript)} characters")
+        suggestions = []
+        prefetched = None
+        cache_key = None
+        if KEYWORD_MODE != 'local' and KEYWORD_CACHE_ENABLED:
+            # Restyles and retries of the same video skip the LLM entirely
+            cache_key = self._keyword_cache_key(segments, video_duration)
+            cached = await asyncio.get_running_loop().run_in_executor(None, self.load_cached_keywords, cache_key)
+            suggestions = copy.deepcopy(cached) if cached else []
         
-        # Get keywords and timestamps from OpenAI (this is still sequential as it's one API call)
-        suggestions = self.get_keywords_from_openai(transcript, video_duration)
+        if KEYWORD_MODE != 'local' and not suggestions:
+            # Split the timestamped transcript into windows extracted concurrently, so a long
+            # video neither truncates one huge completion nor waits on it
+            windows = self._keyword_windows(segments)
+            logger.info(f"Combined transcript length: {sum(len(window['text']) for window in windows)} characters in {len(windows)} windows")
+            
+            outcome: Dict = {}
+            if KEYWORD_STREAMING:
+                # Retrieval for each keyword starts while the model is still writing the others
+                suggestions, prefetched = await self._stream_broll_async(windows, video_duration, orientation, video_width, video_height, fps,
+                                                                         deadline=KEYWORD_DEADLINE, outcome=outcome)
+            else:
+                # Get keywords and timestamps from OpenAI (one API call per window, awaited without blocking the loop)
+                suggestions = await self.get_window_keywords_async(windows, video_duration, deadline=KEYWORD_DEADLINE, outcome=outcome)
+            if not suggestions:
+                logger.warning("OpenAI produced no keyword suggestions in time, falling back to local extraction")
+            elif cache_key and not outcome.get('incomplete'):
+                # Only complete results are cached, so a retry can recover windows that failed
+                asyncio.get_running_loop().run_in_executor(None, self.store_cached_keywords, cache_key, copy.deepcopy(suggestions))
+        if not suggestions:
+            suggestions = self.get_keywords_locally(segments, video_duration)
+            prefetched = None
         if not suggestions:
             logger.warning("No b-roll suggestions generated from transcript")
             return []
@@ -603,8 +2067,11 @@ The best_image_index should be the 0-based index of the image that best matches
         logger.info(f"Generated {len(suggestions)} b-roll suggestions")
         logger.debug(f"Raw suggestions: {json.dumps(suggestions, indent=2)}")
         
+        if prefetched is None:
+            prefetched = await self._resolve_broll_async(suggestions, video_duration, orientation, video_width, video_height, fps)
+        
         # Process each keyword's search_broll in parallel
-        async def process_keyword(suggestion):
+        async def process_keyword(suggestion, broll_results=None):
             try:
                 keyword = suggestion['keyword']
                 timestamp = suggestion['timestamp']
@@ -618,19 +2085,21 @@ The best_image_index should be the 0-based index of the image that best matches
                     logger.warning(f"Skipping suggestion at {timestamp:.2f}s as it's beyond video duration ({video_duration:.2f}s)")
                     return None
                 
-                logger.info(f"Searching for b-roll at {timestamp:.2f}s with keyword: {keyword}")
-                broll_results = await self.search_broll_async(
-                    keyword, 
-                    5.0,
-                    orientation=orientation,
-                    target_width=video_width,
-                    target_height=video_height,
-                    target_fps=fps
-                )
+                if broll_results is None:
+                    logger.info(f"Searching for b-roll at {timestamp:.2f}s with keyword: {keyword}")
+                    broll_results = await self.search_broll_async(
+                        keyword, 
+                        5.0,
+                        orientation=orientation,
+                        target_width=video_width,
+                        target_height=video_height,
+                        target_fps=fps
+                    )
                 
                 if broll_results:
                     # Get the best video from the analyzed results
                     best_video = self.get_best_broll_video(broll_results, keyword)
+                    self._remember_broll(keyword, orientation, best_video)
                     
                     final_suggestion = {
                         'timestamp': timestamp,
@@ -654,236 +2123,173 @@ The best_image_index should be the 0-based index of the image that best matches
                 return None
         
         # Process all suggestions in parallel
-        tasks = [process_keyword(suggestion) for suggestion in suggestions]
+        tasks = [process_keyword(suggestion, prefetched.get(i)) for i, suggestion in enumerate(suggestions)]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Filter out None results and exceptions
         final_suggestions = [result for result in results if result is not None and not isinstance(result, Exception)]
         
+        if self.broll_index is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.broll_index.save)
+        
         logger.info(f"Successfully processed {len(final_suggestions)} b-roll suggestions")
+        logger.info(f"Pexels search cache stats: {self.search_cache.stats()}")
+        logger.info(f"Vision ranking cache stats: {self.vision_cache.stats()}")
+        logger.info(f"Thumbnail hash cache stats: {self.hash_cache.stats()}")
+        logger.info(f"Single-flight stats: search={self.search_flight.stats()}, vision={self.vision_flight.stats()}")
+        logger.info(f"Rate limiter stats: openai={self.openai_scheduler.stats()}, pexels={self.pexels_scheduler.stats()}")
         return final_suggestions
 
+    def _search_flight_key(self, stage: str, keyword: str, duration: float, orientation: str) -> str:
+        """Single-flight key for a keyword search; the same search yields the same candidates"""
+        providers = ','.join(provider.name for provider in self.providers)
+        return f"{stage}|{normalize_keyword(keyword)}|{orientation}|{providers}|{duration}|{self.vision_image_mode}|{self.vision_layout}"
+
+    async def _collect_candidates_async(self, keyword: str, duration: float, orientation: str, target_fps: float = None) -> Optional[Dict]:
+        """Search, filter, dedupe and prepare thumbnails for one keyword, ready for vision ranking
+        
+        Returns None when no candidate survives filtering. Concurrent identical collections share one run.
+        """
+        return await self.search_flight.do(
+            self._search_flight_key('candidates', keyword, duration, orientation),
+            lambda: self._collect_candidates_uncoalesced_async(keyword, duration, orientation, target_fps)
+        )
+
+    async def _collect_candidates_uncoalesced_async(self, keyword: str, duration: float, orientation: str, target_fps: float = None) -> Optional[Dict]:
+        """Uncoalesced body of _collect_candidates_async"""
+        logger.info(f"Async searching for b-roll with keyword: {keyword} (orientation: {orientation})")
+        
+        # Round target FPS to nearest whole number
+        rounded_fps = round(target_fps) if target_fps else None
+        if rounded_fps:
+            logger.info(f"Target FPS: {target_fps} (rounded to {rounded_fps})")
+        
+        # Search for videos, racing the providers so a slow one doesn't hold up the job
+        videos = await self._search_providers_async(keyword, duration, orientation)
+        if videos is None:
+            return None
+        
+        if not videos:
+            logger.warning(f"No videos found for keyword: {keyword}")
+            return None
+        
+        # First pass: collect all videos and their images
+        videos_with_images = self._filter_candidates(videos, duration, orientation)
+        if not videos_with_images:
+            logger.warning("No videos passed initial filtering")
+            return None
+        
+        # Collapse near-duplicate clips so each look is only sent to the vision model once
+        videos_with_images = await self.dedupe_candidates_async(videos_with_images, keyword)
+        
+        # Download and process all images
+        logger.info(f"Downloading and processing {len(videos_with_images)} images for analysis")
+        image_data_list = []
+        valid_video_indices = []
+        
+        # Fetch all thumbnails concurrently; decoding happens in the image worker pool
+        indices_with_images = [i for i, video in enumerate(videos_with_images) if video['image_url']]
+        for video in videos_with_images:
+            if not video['image_url']:
+                logger.warning(f"No image URL for video {video['id']}")
+        
+        if self.vision_image_mode == 'url':
+            fetched = [self._url_image_data(videos_with_images[i]['image_url']) for i in indices_with_images]
+        else:
+            fetched = await asyncio.gather(*[
+                self.download_and_process_image_async(videos_with_images[i]['image_url'])
+                for i in indices_with_images
+            ])
+        for i, image_data in zip(indices_with_images, fetched):
+            if image_data['success']:
+                image_data_list.append(image_data)
+                valid_video_indices.append(i)
+                logger.debug(f"Successfully processed image {i+1}/{len(videos_with_images)}")
+            else:
+                logger.warning(f"Failed to process image for video {videos_with_images[i]['id']}: {image_data.get('error', 'Unknown error')}")
+        
+        return {
+            'keyword': keyword,
+            'videos': videos_with_images,
+            'image_data_list': image_data_list,
+            'valid_video_indices': valid_video_indices,
+            'video_ids': [videos_with_images[i]['id'] for i in valid_video_indices]
+        }
+
     async def search_broll_async(self, keyword: str, duration: float, orientation: str = "horizontal", target_width: int = None, target_height: int = None, target_fps: float = None) -> List[Dict]:
-        """Async version of search_broll using aiohttp for parallel API calls"""
+        """Async version of search_broll using the shared aiohttp session for parallel API calls
+        
+        Concurrent identical searches, from this job or others, share one search and ranking.
+        """
+        return await self.search_flight.do(
+            self._search_flight_key('search', keyword, duration, orientation),
+            lambda: self._search_broll_async(keyword, duration, orientation, target_width, target_height, target_fps)
+        )
+
+    async def _search_broll_async(self, keyword: str, duration: float, orientation: str = "horizontal", target_width: int = None, target_height: int = None, target_fps: float = None) -> List[Dict]:
+        """Uncoalesced body of search_broll_async"""
         try:
-            logger.info(f"Async searching for b-roll with keyword: {keyword} (orientation: {orientation})")
-            
-            # Round target FPS to nearest whole number
-            rounded_fps = round(target_fps) if target_fps else None
-            if rounded_fps:
-                logger.info(f"Target FPS: {target_fps} (rounded to {rounded_fps})")
-            
-            # Search for videos using aiohttp
-            logger.debug(f"Making async Pexels API call with keyword: {keyword}")
-            try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {"Authorization": self.pexels_api_key}
-                    params = {
-                        "query": keyword,
-                        "per_page": 10,
-                        "orientation": orientation
-                    }
-                    
-                    async with session.get(f"{self.pexels_base_url}/search", params=params, headers=headers) as response:
-                        if response.status != 200:
-                            logger.error(f"Pexels API call failed with status code: {response.status}")
-                            return []
-                        
-                        data = await response.json()
-                        videos = data.get('videos', [])
-                        logger.debug(f"API call successful, got {len(videos)} videos")
-                    
-            except Exception as api_error:
-                logger.error(f"Pexels API call failed: {str(api_error)}")
-                logger.error(f"API error details: {traceback.format_exc()}")
-                return []
-            
-            if not videos:
-                logger.warning(f"No videos found for keyword: {keyword}")
-                return []
-            
-            # Process videos (this part remains the same as it's CPU-bound)
-            filtered_videos = []
-            videos_with_images = []
-            
-            # First pass: collect all videos and their images
-            for video in videos:
-                try:
-                    # Get the highest quality video file
-                    video_files = video.get('video_files', [])
-                    if not video_files:
-                        continue
-                    
-                    # Sort by quality (prefer HD)
-                    video_files.sort(key=lambda x: x.get('width', 0) * x.get('height', 0), reverse=True)
-                    video_file = video_files[0]
-                    
-                    # Extract FPS from URL if available
-                    fps_match = re.search(r'(\d+)fps', video_file.get('link', ''))
-                    video_fps = int(fps_match.group(1)) if fps_match else None
-                    
-                    # Skip if video is too short
-                    if video.get('duration', 0) < duration:
-                        logger.debug(f"Skipping video with duration {video.get('duration')}s (too short)")
-                        continue
-                    
-                    # Skip if orientation doesn't match
-                    if orientation == "portrait" and video.get('width', 0) >= video.get('height', 0):
-                        logger.debug("Skipping landscape video (portrait requested)")
-                        continue
-                    elif orientation == "landscape" and video.get('width', 0) < video.get('height', 0):
-                        logger.debug("Skipping portrait video (landscape requested)")
-                        continue
-                    
-                    # Get video thumbnail for analysis
-                    image_url = video.get('image', '')
-                    if not image_url:
-                        # Try to get image from video_files
-                        for vf in video_files:
-                            if vf.get('file_type', '').startswith('image'):
-                                image_url = vf.get('link', '')
-                                break
-                    
-                    # Create video object
-                    video_obj = {
-                        'id': video.get('id'),
-                        'url': video_file.get('link'),
-                        'width': video_file.get('width'),
-                        'height': video_file.get('height'),
-                        'duration': video.get('duration'),
-                        'fps': video_fps,
-                        'image_url': image_url,
-                        'video_index': len(videos_with_images)
-                    }
-                    
-                    videos_with_images.append(video_obj)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing video: {str(e)}")
-                    continue
-            
-            if not videos_with_images:
-                logger.warning("No videos passed initial filtering")
+            candidates = await self._collect_candidates_async(keyword, duration, orientation, target_fps)
+            if candidates is None:
                 return []
             
-            # Download and process all images
-            logger.info(f"Downloading and processing {len(videos_with_images)} images for analysis")
-            image_data_list = []
-            valid_video_indices = []
-            
-            for i, video in enumerate(videos_with_images):
-                if video['image_url']:
-                    image_data = self.download_and_process_image(video['image_url'])
-                    if image_data['success']:
-                        image_data_list.append(image_data)
-                        valid_video_indices.append(i)
-                        logger.debug(f"Successfully processed image {i+1}/{len(videos_with_images)}")
-                    else:
-                        logger.warning(f"Failed to process image for video {video['id']}: {image_data.get('error', 'Unknown error')}")
-                else:
-                    logger.warning(f"No image URL for video {video['id']}")
-            
             # Analyze all images together if we have any
-            if image_data_list:
-                logger.info(f"Analyzing {len(image_data_list)} images with OpenAI Vision")
-                analysis_result = self.analyze_multiple_images(image_data_list, keyword)
-                
-                # Process the analysis results
-                best_index = analysis_result.get('best_image_index', 0)
-                comparison_analysis = analysis_result.get('comparison_analysis', 'No analysis available')
-                overall_confidence = analysis_result.get('overall_confidence', 0.5)
-                individual_scores = analysis_result.get('individual_scores', [])
-                
-                logger.info(f"Analysis complete. Best image index: {best_index}")
-                logger.info(f"Overall confidence: {overall_confidence:.3f}")
-                logger.info(f"Comparison analysis: {comparison_analysis}")
-                
-                # Create a mapping from analysis index to video index
-                analysis_to_video_map = {}
-                for i, video_idx in enumerate(valid_video_indices):
-                    analysis_to_video_map[i] = video_idx
-                
-                # Find the best video based on analysis
-                if best_index in analysis_to_video_map:
-                    best_video_index = analysis_to_video_map[best_index]
-                    best_video = videos_with_images[best_video_index]
-                    
-                    # Add analysis data to the best video
-                    best_video.update({
-                        'relevance_score': 1.0,  # Best video gets highest score
-                        'confidence': overall_confidence,
-                        'analysis': comparison_analysis,
-                        'is_best_match': True
-                    })
-                    
-                    # Add analysis data to other videos
-                    for i, video_idx in enumerate(valid_video_indices):
-                        if i != best_index:
-                            video = videos_with_images[video_idx]
-                            # Find individual score if available
-                            individual_score = next((score for score in individual_scores if score.get('index') == i), None)
-                            
-                            video.update({
-                                'relevance_score': individual_score.get('relevance_score', 0.5) if individual_score else 0.5,
-                                'confidence': overall_confidence,
-                                'analysis': individual_score.get('brief_analysis', 'Analyzed but not selected as best') if individual_score else 'Analyzed but not selected as best',
-                                'is_best_match': False
-                            })
-                    
-                    # Add default analysis for videos without images
-                    for i, video in enumerate(videos_with_images):
-                        if i not in valid_video_indices:
-                            video.update({
-                                'relevance_score': 0.3,
-                                'confidence': 0.0,
-                                'analysis': 'No image available for analysis',
-                                'is_best_match': False
-                            })
-                    
-                    # Sort videos by relevance score (best video first)
-                    videos_with_images.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-                    
-                    # Filter out videos with very low relevance scores
-                    min_relevance_threshold = 0.3
-                    filtered_videos = [
-                        video for video in videos_with_images 
-                        if video.get('relevance_score', 0) >= min_relevance_threshold
-                    ]
-                    
-                    logger.info(f"Found {len(filtered_videos)} videos with relevance score >= {min_relevance_threshold}")
-                    logger.info(f"Best video ID: {best_video['id']} (Score: {best_video['relevance_score']:.3f})")
-                    
-                else:
-                    logger.error(f"Best image index {best_index} not found in valid video indices")
-                    # Fallback: return all videos with default scores
-                    for video in videos_with_images:
-                        video.update({
-                            'relevance_score': 0.5,
-                            'confidence': 0.0,
-                            'analysis': 'Analysis failed, using default score',
-                            'is_best_match': False
-                        })
-                    filtered_videos = videos_with_images
-                    
-            else:
-                logger.warning("No images could be processed for analysis")
-                # Fallback: return all videos with default scores
-                for video in videos_with_images:
-                    video.update({
-                        'relevance_score': 0.5,
-                        'confidence': 0.0,
-                        'analysis': 'No image available for analysis',
-                        'is_best_match': False
-                    })
-                filtered_videos = videos_with_images
+            analysis_result = None
+            if candidates['image_data_list']:
+                logger.info(f"Analyzing {len(candidates['image_data_list'])} images with OpenAI Vision")
+                analysis_result = await self.analyze_multiple_images_async(
+                    candidates['image_data_list'],
+                    keyword,
+                    video_ids=candidates['video_ids']
+                )
             
-            return filtered_videos
+            return self._apply_analysis(candidates['videos'], candidates['valid_video_indices'], analysis_result)
             
         except Exception as e:
             logger.error(f"Error in async search_broll: {str(e)}")
             logger.error(f"Error details: {traceback.format_exc()}")
             return []
 
+    async def search_broll_batch_async(self, keywords: List[str], duration: float, orientation: str = "horizontal", target_width: int = None, target_height: int = None, target_fps: float = None) -> List[List[Dict]]:
+        """Search b-roll for several keywords, ranking all their candidates in as few vision calls as possible
+        
+        Returns one result list per keyword, in order, each shaped like search_broll_async's result.
+        """
+        collected = await asyncio.gather(*[
+            self._collect_candidates_async(keyword, duration, orientation, target_fps)
+            for keyword in keywords
+        ], return_exceptions=True)
+        return await self._rank_collected_async(keywords, list(collected))
+
+    async def _rank_collected_async(self, keywords: List[str], collected: List) -> List[List[Dict]]:
+        """Rank collected candidate sets (None or an exception where collection failed) and apply the decisions"""
+        candidate_sets = []
+        for keyword, candidates in zip(keywords, collected):
+            if isinstance(candidates, Exception):
+                logger.error(f"Error collecting b-roll candidates for '{keyword}': {str(candidates)}")
+                candidates = None
+            candidate_sets.append(candidates)
+        
+        to_rank = [candidates for candidates in candidate_sets if candidates and candidates['image_data_list']]
+        analyses = await self.rank_candidate_sets_async(to_rank)
+        analysis_by_set = {id(candidates): analysis for candidates, analysis in zip(to_rank, analyses)}
+        
+        results = []
+        for candidates in candidate_sets:
+            if candidates is None:
+                results.append([])
+                continue
+            try:
+                results.append(self._apply_analysis(
+                    candidates['videos'],
+                    candidates['valid_video_indices'],
+                    analysis_by_set.get(id(candidates))
+                ))
+            except Exception as e:
+                logger.error(f"Error applying analysis for '{candidates['keyword']}': {str(e)}")
+                results.append([])
+        return results
+
     def get_best_broll_video(self, videos: List[Dict], keyword: str) -> Dict:
         """Select the best b-roll video from a list of analyzed videos"""
         if not videos:
@@ -0,0 +1,302 @@
+import os
+import abc
+import time
+import inspect
+import logging
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from utils.persistent_cache import PersistentCache
+from utils.keywords import normalize_keyword
+from utils.http_client import HttpClient
+from utils.rate_limiter import RateLimitScheduler, RateLimitedError, parse_retry_after, PRIORITY_NORMAL, PRIORITY_LOW
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pexels search results are reused across jobs for this long
+PEXELS_CACHE_TTL = float(os.getenv('PEXELS_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Process-wide pacing of Pexels API calls (see utils.rate_limiter)
+PEXELS_REQUESTS_PER_HOUR = float(os.getenv('PEXELS_REQUESTS_PER_HOUR', '200'))
+PEXELS_MAX_CONCURRENCY = int(os.getenv('PEXELS_MAX_CONCURRENCY', '8'))
+
+# Longest a search waits out Pexels 429s before its keyword goes without b-roll
+PEXELS_MAX_THROTTLE_WAIT = float(os.getenv('PEXELS_MAX_THROTTLE_WAIT', '30'))
+
+class StockFootageProvider(abc.ABC):
+    """
+    A stock footage search API the b-roll pipeline can draw candidates from
+
+    ``search`` and ``search_async`` return normalized candidate records, or None
+    if the API call failed (an empty list means the search found nothing). Each
+    record is a dict with:
+
+    - 'id': unique across providers (providers other than Pexels prefix theirs
+      with their name, since caches and the vision ranking key on it)
+    - 'provider': the provider's name
+    - 'width', 'height', 'duration': of the clip, in pixels and seconds
+    - 'image': thumbnail URL
+    - 'video_files': list of {'link', 'width', 'height', 'file_type'}, best first
+
+    Register new providers with ``register_provider`` so they can be enabled
+    through BROLL_STOCK_PROVIDERS.
+    """
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def search(self, keyword: str, orientation: str, per_page: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Blocking search; see the class docstring for the record format"""
+
+    @abc.abstractmethod
+    async def search_async(self, keyword: str, orientation: str, per_page: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Non-blocking search; see the class docstring for the record format"""
+
+    async def check_async(self) -> Dict[str, Any]:
+        """
+        Cheap live check that the provider's credentials work
+
+        Returns {'ok': bool}, plus 'error' on failure and 'auth_failed': True
+        when the provider definitely rejected the credentials (as opposed to a
+        transient error).
+        """
+        return {'ok': True}
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache and pacing counters for the health endpoint"""
+        return {}
+
+# Factories for the providers that can be enabled by name, called with the analyzer's options
+PROVIDER_REGISTRY: Dict[str, Callable[..., StockFootageProvider]] = {}
+
+def register_provider(name: str, provider_class: Type[StockFootageProvider],
+                      factory: Optional[Callable[..., StockFootageProvider]] = None) -> None:
+    """
+    Make a provider available to build_providers under name
+
+    Args:
+        name: Name used in BROLL_STOCK_PROVIDERS
+        provider_class: The provider's class; it must implement every abstract method
+        factory: Builds the provider from the analyzer's options; defaults to
+            calling provider_class(**options)
+
+    Raises:
+        TypeError: If provider_class isn't a complete StockFootageProvider
+    """
+    if not (isinstance(provider_class, type) and issubclass(provider_class, StockFootageProvider)):
+        raise TypeError(f"Stock footage provider '{name}' must subclass StockFootageProvider")
+    if inspect.isabstract(provider_class):
+        missing = ', '.join(sorted(provider_class.__abstractmethods__))
+        raise TypeError(f"Stock footage provider '{name}' doesn't implement: {missing}")
+    PROVIDER_REGISTRY[name] = factory or provider_class
+
+def build_providers(names: List[str], **options) -> List[StockFootageProvider]:
+    """
+    Instantiate the named providers, in order
+
+    Args:
+        names: Registered provider names; unknown names are skipped with a warning
+        **options: Passed to every factory (e.g. pexels_api_key), which takes what it needs
+
+    Returns:
+        The providers, in the order given (earlier ones win ties when racing)
+    """
+    providers = []
+    for name in names:
+        factory = PROVIDER_REGISTRY.get(name)
+        if factory is None:
+            logger.warning(f"Unknown stock footage provider '{name}', skipping it")
+            continue
+        providers.append(factory(**options))
+    return providers
+
+class PexelsProvider(StockFootageProvider):
+    """Pexels video search, cached across jobs and paced by the shared 'pexels' rate limiter"""
+
+    name = 'pexels'
+    base_url = "https://api.pexels.com/videos"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+        # Process-wide cache of trimmed search results
+        self.search_cache = PersistentCache.shared('pexels_search', ttl=PEXELS_CACHE_TTL, max_entries=2000)
+
+        # Shared pacing of async calls across all jobs in this process
+        self.scheduler = RateLimitScheduler.shared(
+            'pexels',
+            rate=PEXELS_REQUESTS_PER_HOUR / 3600,
+            burst=PEXELS_REQUESTS_PER_HOUR,
+            max_concurrency=PEXELS_MAX_CONCURRENCY,
+            max_wait=PEXELS_MAX_THROTTLE_WAIT
+        )
+
+    @staticmethod
+    def cache_key(keyword: str, orientation: str, per_page: int) -> str:
+        """Cache key for a Pexels search"""
+        return f"{normalize_keyword(keyword)}|{orientation}|{per_page}"
+
+    @classmethod
+    def normalize(cls, videos: List[Dict]) -> List[Dict]:
+        """Keep only the Pexels video fields the b-roll pipeline reads"""
+        trimmed = [
+            {
+                'id': video.get('id'),
+                'provider': cls.name,
+                'width': video.get('width'),
+                'height': video.get('height'),
+                'duration': video.get('duration'),
+                'image': video.get('image'),
+                'video_files': [
+                    {
+                        'link': vf.get('link'),
+                        'width': vf.get('width'),
+                        'height': vf.get('height'),
+                        'file_type': vf.get('file_type')
+                    }
+                    for vf in video.get('video_files', [])
+                ]
+            }
+            for video in videos
+        ]
+        # Store files best-first so cached entries already match the order search_broll expects
+        for video in trimmed:
+            video['video_files'].sort(key=lambda x: (x.get('width') or 0) * (x.get('height') or 0), reverse=True)
+        return trimmed
+
+    def test_connection(self) -> None:
+        """Blocking test search; raises ValueError if the API key doesn't work"""
+        logger.info("Testing Pexels API with a simple search...")
+        try:
+            headers = {"Authorization": self.api_key}
+            response = HttpClient.get_sync_session().get(
+                f"{self.base_url}/search?query=nature&per_page=1",
+                headers=headers,
+                timeout=HttpClient.sync_timeout()
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('videos'):
+                    logger.info("✓ Pexels API initialized and tested successfully")
+                    logger.debug(f"Test search returned {len(data['videos'])} videos")
+                else:
+                    raise ValueError("Pexels API test failed - no results returned")
+            else:
+                raise ValueError(f"Pexels API test failed with status code: {response.status_code}")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize Pexels API: {str(e)}")
+            logger.error(f"API initialization error details: {traceback.format_exc()}")
+            raise
+
+    async def check_async(self) -> Dict[str, Any]:
+        """Make one tiny live Pexels search to confirm the API key works"""
+        try:
+            status, data = await self.scheduler.run(
+                lambda: self._get('/search', {'query': 'nature', 'per_page': 1}),
+                priority=PRIORITY_LOW
+            )
+            if status in (401, 403):
+                return {'ok': False, 'auth_failed': True, 'error': f"Pexels API rejected the API key (status code: {status})"}
+            if status != 200:
+                return {'ok': False, 'error': f"Pexels API test failed with status code: {status}"}
+            if not data.get('videos'):
+                return {'ok': False, 'error': "Pexels API test failed - no results returned"}
+            return {'ok': True}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    async def _get(self, path: str, params: Dict) -> Tuple[int, Optional[Dict]]:
+        """One Pexels API GET on the shared session; raises RateLimitedError on 429"""
+        session = await HttpClient.get_session()
+        async with session.get(
+            f"{self.base_url}{path}",
+            params=params,
+            headers={"Authorization": self.api_key}
+        ) as response:
+            if response.status == 429:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                reset = response.headers.get('X-Ratelimit-Reset')
+                if retry_after is None and reset and reset.isdigit():
+                    retry_after = max(0.0, int(reset) - time.time())
+                raise RateLimitedError("Pexels API rate limit exceeded", retry_after)
+            if response.status != 200:
+                return response.status, None
+            return response.status, await response.json()
+
+    def search(self, keyword: str, orientation: str, per_page: int = 10) -> Optional[List[Dict]]:
+        """Search Pexels videos through the search cache, returning None if the API call failed"""
+        cache_key = self.cache_key(keyword, orientation, per_page)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Pexels search cache hit for '{cache_key}' ({len(cached)} videos)")
+            return cached
+
+        logger.debug(f"Making Pexels API call with keyword: {keyword}")
+        try:
+            headers = {"Authorization": self.api_key}
+            response = HttpClient.get_sync_session().get(
+                f"{self.base_url}/search",
+                params={
+                    "query": keyword,
+                    "per_page": per_page,  # Increased to get more options to filter
+                    "orientation": orientation
+                },
+                headers=headers,
+                timeout=HttpClient.sync_timeout()
+            )
+
+            if response.status_code != 200:
+                logger.error(f"Pexels API call failed with status code: {response.status_code}")
+                logger.error(f"Response: {response.text}")
+                return None
+
+            videos = self.normalize(response.json().get('videos', []))
+            logger.debug(f"API call successful, got {len(videos)} videos")
+
+        except Exception as api_error:
+            logger.error(f"Pexels API call failed: {str(api_error)}")
+            logger.error(f"API error details: {traceback.format_exc()}")
+            return None
+
+        self.search_cache.set(cache_key, videos)
+        return videos
+
+    async def search_async(self, keyword: str, orientation: str, per_page: int = 10) -> Optional[List[Dict]]:
+        """Async Pexels search through the search cache, returning None if the API call failed"""
+        cache_key = self.cache_key(keyword, orientation, per_page)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Pexels search cache hit for '{cache_key}' ({len(cached)} videos)")
+            return cached
+
+        logger.debug(f"Making async Pexels API call with keyword: {keyword}")
+        try:
+            params = {
+                "query": keyword,
+                "per_page": per_page,
+                "orientation": orientation
+            }
+
+            status, data = await self.scheduler.run(lambda: self._get('/search', params), priority=PRIORITY_NORMAL)
+            if status != 200:
+                logger.error(f"Pexels API call failed with status code: {status}")
+                return None
+
+            videos = self.normalize(data.get('videos', []))
+            logger.debug(f"API call successful, got {len(videos)} videos")
+
+        except Exception as api_error:
+            logger.error(f"Pexels API call failed: {str(api_error)}")
+            logger.error(f"API error details: {traceback.format_exc()}")
+            return None
+
+        self.search_cache.set(cache_key, videos)
+        return videos
+
+    def stats(self) -> Dict[str, Any]:
+        """Search cache and rate limiter counters"""
+        return {'search_cache': self.search_cache.stats(), 'rate_limit': self.scheduler.stats()}
+
+register_provider(PexelsProvider.name, PexelsProvider, lambda pexels_api_key=None, **options: PexelsProvider(pexels_api_key))
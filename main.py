@@ -1,13 +1,13 @@
 import os
 from moviepy.editor import VideoFileClip, CompositeVideoClip, ColorClip, TextClip
-from moviepy.video.fx.all import resize, fadein, fadeout
+from moviepy.video.fx.all import fadein, fadeout
 import requests
 from dotenv import load_dotenv
 import tempfile
 import logging
 from caption_processor import CaptionProcessor
 from broll_analyzer import BrollAnalyzer
-from utils import setup_logging, ensure_directory, TempDirManager, FFmpegUtils
+from utils import setup_logging, ensure_directory, TempDirManager, FFmpegUtils, letterbox_clip
 import traceback
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
@@ -281,35 +281,5 @@ def resize(clip, width=None, height=None, newsize=None):
     else:
         target_width, target_height = width, height
     
-    def resizer(pic, target_size):
-        pilim = Image.fromarray(pic)
-        original_width, original_height = pilim.size
-        
-        # Calculate aspect ratios
-        target_ratio = target_width / target_height
-        original_ratio = original_width / original_height
-        
-        # Calculate new dimensions while maintaining aspect ratio
-        if original_ratio > target_ratio:
-            # Image is wider than target
-            new_width = target_width
-            new_height = int(target_width / original_ratio)
-        else:
-            # Image is taller than target
-            new_height = target_height
-            new_width = int(target_height * original_ratio)
-        
-        # Resize the image
-        resized_pil = pilim.resize((new_width, new_height), Image.LANCZOS)
-        
-        # Create a new image with the target size and paste the resized image in the center
-        new_im = Image.new('RGB', (target_width, target_height), (0, 0, 0))
-        paste_x = (target_width - new_width) // 2
-        paste_y = (target_height - new_height) // 2
-        new_im.paste(resized_pil, (paste_x, paste_y))
-        
-        return np.array(new_im)
-    
-    fl = lambda pic: resizer(pic.astype('uint8'), (target_width, target_height))
-    newclip = clip.fl_image(fl)
-    return newclip 
\ No newline at end of file
+    # Geometry is computed once per clip; each frame gets its own letterboxed array
+    return letterbox_clip(clip, target_width, target_height)
@@ -0,0 +1,45 @@
+import pytest
+from utils.keywords import group_keywords, KeywordGrouper
+
+# Default of BROLL_KEYWORD_GROUP_SIMILARITY in broll_analyzer
+GROUP_SIMILARITY = 0.6
+
+def cluster_of(clusters, keywords, keyword):
+    """The keywords in the cluster containing keyword"""
+    index = keywords.index(keyword)
+    return next([keywords[i] for i in cluster] for cluster in clusters if index in cluster)
+
+def test_groups_overlapping_lifting_keywords():
+    keywords = ['woman lifting weights', 'lifting dumbbells', 'weight training']
+    clusters = group_keywords(keywords, GROUP_SIMILARITY)
+    assert 'lifting dumbbells' in cluster_of(clusters, keywords, 'woman lifting weights')
+
+@pytest.mark.parametrize('first, second', [
+    ('healthy breakfast', 'healthy meal prep'),
+    ('running on beach', 'person running'),
+    ('busy city street', 'city skyline'),
+    ('empty gym', 'gym workout'),
+    ('sunset over the ocean', 'sunset beach'),
+])
+def test_keeps_shots_sharing_one_word_apart(first, second):
+    clusters = group_keywords([first, second], GROUP_SIMILARITY)
+    assert len(clusters) == 2
+
+def test_groups_plurals_synonyms_and_function_words():
+    keywords = ['gym workout', 'city skyline', 'gym workouts', 'jogging on the beach', 'running on beach']
+    clusters = group_keywords(keywords, GROUP_SIMILARITY)
+    assert clusters == [[0, 2], [1], [3, 4]]
+
+def test_grouper_matches_group_keywords_when_fed_incrementally():
+    keywords = [
+        'woman lifting weights', 'healthy breakfast', 'lifting dumbbells', 'city skyline',
+        'healthy meal prep', 'city skyline at night', 'man lifting weights', 'running on beach'
+    ]
+    grouper = KeywordGrouper(GROUP_SIMILARITY)
+    for keyword in keywords:
+        grouper.add(keyword)
+    assert grouper.clusters == group_keywords(keywords, GROUP_SIMILARITY)
+
+def test_keyword_without_content_words_starts_its_own_cluster():
+    clusters = group_keywords(['the', 'on the', 'beach'], GROUP_SIMILARITY)
+    assert clusters == [[0], [1], [2]]
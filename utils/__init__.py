@@ -3,5 +3,8 @@
 from .logging import setup_logging, ensure_directory
 from .ffmpeg_utils import FFmpegUtils
 from .temp_dir_manager import TempDirManager
+from .ass_subtitles import build_ass_script
+from .letterbox import LetterboxResizer, letterbox_clip, letterbox_filter
 
-__all__ = ['setup_logging', 'ensure_directory', 'FFmpegUtils', 'TempDirManager'] 
\ No newline at end of file
+__all__ = ['setup_logging', 'ensure_directory', 'FFmpegUtils', 'TempDirManager', 'build_ass_script',
+           'LetterboxResizer', 'letterbox_clip', 'letterbox_filter']
@@ -0,0 +1,202 @@
+import re
+import logging
+from typing import List, Dict, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Highlight colour used by the Remotion CaptionVideo composition (#FFFF00)
+HIGHLIGHT_COLOR = '#FFFF00'
+
+# CSS colour names accepted by the frontend colour picker
+NAMED_COLORS = {
+    'white': (255, 255, 255),
+    'black': (0, 0, 0),
+    'yellow': (255, 255, 0),
+    'red': (255, 0, 0),
+    'green': (0, 128, 0),
+    'lime': (0, 255, 0),
+    'blue': (0, 0, 255),
+    'orange': (255, 165, 0),
+    'purple': (128, 0, 128),
+    'pink': (255, 192, 203),
+    'cyan': (0, 255, 255),
+    'magenta': (255, 0, 255),
+    'gray': (128, 128, 128),
+    'grey': (128, 128, 128),
+}
+
+def parse_color(color: str) -> Tuple[int, int, int]:
+    """
+    Parse a CSS-style colour (name, #RGB, #RRGGBB or rgb(r, g, b)) into an RGB tuple
+
+    Args:
+        color: Colour string as sent by the frontend
+
+    Returns:
+        Tuple of (red, green, blue); unknown colours fall back to white
+    """
+    value = (color or '').strip().lower()
+
+    if value in NAMED_COLORS:
+        return NAMED_COLORS[value]
+
+    if value.startswith('#'):
+        hex_value = value[1:]
+        if len(hex_value) == 3:
+            hex_value = ''.join(c * 2 for c in hex_value)
+        if len(hex_value) == 6 and re.fullmatch(r'[0-9a-f]{6}', hex_value):
+            return tuple(int(hex_value[i:i + 2], 16) for i in (0, 2, 4))
+
+    match = re.fullmatch(r'rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*(?:,\s*[\d.]+\s*)?\)', value)
+    if match:
+        return tuple(min(255, int(c)) for c in match.groups())
+
+    logger.warning(f"Unrecognised caption colour '{color}', falling back to white")
+    return NAMED_COLORS['white']
+
+def ass_color(color: str, alpha: int = 0) -> str:
+    """Convert a CSS-style colour into an ASS &HAABBGGRR colour literal"""
+    red, green, blue = parse_color(color)
+    return f"&H{alpha:02X}{blue:02X}{green:02X}{red:02X}"
+
+def ass_tag_color(color: str) -> str:
+    """Convert a CSS-style colour into the &HBBGGRR& form used by inline override tags"""
+    red, green, blue = parse_color(color)
+    return f"&H{blue:02X}{green:02X}{red:02X}&"
+
+def format_ass_time(seconds: float) -> str:
+    """Format seconds as an ASS timestamp (H:MM:SS.cc)"""
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+def escape_ass_text(text: str) -> str:
+    """Escape caption text so it can't be interpreted as ASS override tags"""
+    text = (text or '').replace('\\', '').replace('{', '(').replace('}', ')')
+    return ' '.join(text.split())
+
+def font_style(font: str) -> Tuple[str, int, int]:
+    """
+    Map a font name such as "Montserrat-SemiBoldItalic" onto an ASS family, weight and italic flag
+
+    The Remotion composition renders every caption bold (900 for "Black" variants)
+    and switches to italic when the font name says so; this mirrors that.
+    """
+    family = (font or 'Barlow').split('-')[0]
+    weight = 900 if 'Black' in (font or '') else -1
+    italic = -1 if 'Italic' in (font or '') else 0
+    return family, weight, italic
+
+def _word_intervals(caption: Dict, start: float, end: float) -> List[Tuple[float, float, Optional[int]]]:
+    """Split a caption's display window into intervals tagged with the highlighted word index"""
+    words = caption.get('words') or []
+    intervals = []
+    cursor = start
+    for index, word in enumerate(words):
+        word_start = max(start, min(end, float(word['start'])))
+        word_end = max(word_start, min(end, float(word['end'])))
+        if word_start > cursor:
+            intervals.append((cursor, word_start, None))
+        if word_end > word_start:
+            intervals.append((word_start, word_end, index))
+        cursor = max(cursor, word_end)
+    if cursor < end:
+        intervals.append((cursor, end, None))
+    return intervals
+
+def build_ass_script(captions: List[Dict], fps: float, width: int, height: int,
+                     font: str = 'Barlow-BlackItalic', color: str = 'white',
+                     font_size: int = 48, highlight_type: str = 'background',
+                     position: str = 'bottom') -> str:
+    """
+    Build an ASS subtitle script from CaptionProcessor.create_caption_clips output
+
+    Each caption becomes one Dialogue event per word interval, with override tags
+    highlighting the active word the same way the Remotion composition does:
+    a yellow box behind the word for "background", yellow text for "fill".
+
+    Args:
+        captions: Caption clips with text, startFrame, endFrame and optional words
+        fps: Frame rate the caption frames were computed with
+        width: Output video width in pixels
+        height: Output video height in pixels
+        font: Font name, e.g. "Montserrat-Bold"
+        color: Caption text colour (name, hex or rgb())
+        font_size: Font size relative to a 1080px tall frame
+        highlight_type: "background" or "fill"
+        position: "bottom" or "middle"
+
+    Returns:
+        The complete ASS script as a string
+    """
+    family, weight, italic = font_style(font)
+    scaled_size = max(1, int(round(font_size * (height / 1080))))
+    margin_h = int(width * 0.1)  # captions are limited to 80% of the frame width
+    margin_v = int(height * 0.1) if position == 'bottom' else 0
+    alignment = 2 if position == 'bottom' else 5
+
+    text_color = ass_color(color)
+    shadow_color = ass_color('black', alpha=0x66)
+
+    if highlight_type == 'background':
+        # BorderStyle 3 draws an opaque box in OutlineColour; it is kept fully
+        # transparent and only revealed behind the highlighted word
+        border_style, outline_color, outline, shadow = 3, ass_color(HIGHLIGHT_COLOR, alpha=0xFF), 4, 0
+    else:
+        border_style, outline_color, outline, shadow = 1, shadow_color, 0, 2
+
+    lines = [
+        '[Script Info]',
+        'ScriptType: v4.00+',
+        f'PlayResX: {width}',
+        f'PlayResY: {height}',
+        'WrapStyle: 0',
+        'ScaledBorderAndShadow: yes',
+        '',
+        '[V4+ Styles]',
+        'Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, '
+        'Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, '
+        'Shadow, Alignment, MarginL, MarginR, MarginV, Encoding',
+        f'Style: Caption,{family},{scaled_size},{text_color},{text_color},{outline_color},{shadow_color},'
+        f'{weight},{italic},0,0,100,100,0,0,{border_style},{outline},{shadow},{alignment},'
+        f'{margin_h},{margin_h},{margin_v},1',
+        '',
+        '[Events]',
+        'Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text',
+    ]
+
+    for caption in captions:
+        start = caption['startFrame'] / fps
+        end = caption['endFrame'] / fps
+        if end <= start:
+            continue
+
+        words = caption.get('words') or []
+        if not words:
+            lines.append(
+                f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Caption,,0,0,0,,"
+                f"{escape_ass_text(caption.get('text', ''))}"
+            )
+            continue
+
+        for interval_start, interval_end, active in _word_intervals(caption, start, end):
+            parts = []
+            for index, word in enumerate(words):
+                text = escape_ass_text(word.get('text', ''))
+                if not text:
+                    continue
+                if index == active and highlight_type == 'background':
+                    parts.append(f"{{\\3a&H00&}}{text}{{\\3a&HFF&}}")
+                elif index == active:
+                    parts.append(f"{{\\c{ass_tag_color(HIGHLIGHT_COLOR)}}}{text}{{\\c{ass_tag_color(color)}}}")
+                else:
+                    parts.append(text)
+            lines.append(
+                f"Dialogue: 0,{format_ass_time(interval_start)},{format_ass_time(interval_end)},"
+                f"Caption,,0,0,0,,{' '.join(parts)}"
+            )
+
+    return '\n'.join(lines) + '\n'
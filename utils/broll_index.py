@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .keywords import normalize_keyword, keyword_vector
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Default location of the approved b-roll index, next to the persistent cache
+DEFAULT_INDEX_PATH = os.getenv('BROLL_INDEX_PATH', os.path.join('cache', 'broll_index.npz'))
+
+class BrollIndex:
+    """
+    Cosine-similarity index from keywords to previously approved b-roll clips
+
+    Each (normalized keyword, orientation) pair keeps its latest approved clip.
+    Vectors live in a preallocated NumPy matrix that grows by doubling, so adds
+    are amortised O(1) and a lookup is one matrix-vector product. The index is
+    saved atomically to a single .npz file when it has unsaved changes.
+    Use ``BrollIndex.shared`` to get the process-wide instance.
+    """
+
+    _instance: Optional['BrollIndex'] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = DEFAULT_INDEX_PATH, dim: int = 1024, max_entries: int = 50000):
+        self.path = path
+        self.dim = dim
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        self.vectors = np.zeros((64, dim), dtype=np.float32)
+        self.dirty = False
+        self._load()
+        logger.info(f"Initialized b-roll index with {len(self.entries)} approved clips (dim={dim}, path={path})")
+
+    @classmethod
+    def shared(cls, **kwargs) -> 'BrollIndex':
+        """Get the process-wide index, loading it from disk on first use"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(**kwargs)
+            return cls._instance
+
+    @staticmethod
+    def _entry_key(normalized: str, orientation: str) -> str:
+        return f"{orientation}|{normalized}"
+
+    def _load(self) -> None:
+        """Load a previously saved index, ignoring files built with another dimension"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                vectors = data['vectors']
+                entries = json.loads(str(data['entries']))
+            if vectors.shape[1] != self.dim or len(entries) != vectors.shape[0]:
+                logger.warning(f"B-roll index at {self.path} doesn't match dim={self.dim}, starting empty")
+                return
+            self.vectors = np.zeros((max(64, len(entries) * 2), self.dim), dtype=np.float32)
+            self.vectors[:len(entries)] = vectors
+            self.entries = entries
+            self.positions = {
+                self._entry_key(entry['normalized'], entry['orientation']): i for i, entry in enumerate(entries)
+            }
+        except Exception as e:
+            logger.warning(f"Failed to load b-roll index from {self.path}, starting empty: {str(e)}")
+
+    def add(self, keyword: str, orientation: str, video: Dict[str, Any]) -> None:
+        """Record an approved clip for a keyword, replacing the previous one for the same keyword"""
+        normalized = normalize_keyword(keyword)
+        if not normalized:
+            return
+        key = self._entry_key(normalized, orientation)
+        entry = {
+            'keyword': keyword,
+            'normalized': normalized,
+            'orientation': orientation,
+            'video': video,
+            'updated_at': time.time()
+        }
+        with self.lock:
+            position = self.positions.get(key)
+            if position is not None:
+                self.entries[position] = entry
+            else:
+                if len(self.entries) >= self.max_entries:
+                    logger.debug("B-roll index is full, not adding new keywords")
+                    return
+                position = len(self.entries)
+                if position >= self.vectors.shape[0]:
+                    grown = np.zeros((self.vectors.shape[0] * 2, self.dim), dtype=np.float32)
+                    grown[:position] = self.vectors[:position]
+                    self.vectors = grown
+                self.vectors[position] = keyword_vector(normalized, self.dim)
+                self.entries.append(entry)
+                self.positions[key] = position
+            self.dirty = True
+
+    def search(self, keyword: str, orientation: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the approved keywords most similar to keyword for the same orientation
+
+        Args:
+            keyword: Keyword to look up
+            orientation: Only entries recorded for this orientation are considered
+            top_k: Maximum number of matches
+
+        Returns:
+            Matches best first, each a dict with keyword, similarity and video
+        """
+        query = keyword_vector(keyword, self.dim)
+        if not query.any():
+            return []
+        with self.lock:
+            count = len(self.entries)
+            if count == 0:
+                return []
+            scores = self.vectors[:count] @ query
+            mask = np.array([entry['orientation'] == orientation for entry in self.entries], dtype=bool)
+            scores = np.where(mask, scores, -np.inf)
+            k = min(top_k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {
+                    'keyword': self.entries[i]['keyword'],
+                    'similarity': float(scores[i]),
+                    'video': dict(self.entries[i]['video'])
+                }
+                for i in top if np.isfinite(scores[i])
+            ]
+
+    def lookup(self, keyword: str, orientation: str, min_similarity: float) -> Optional[Dict[str, Any]]:
+        """Best match at or above min_similarity, or None"""
+        matches = self.search(keyword, orientation, top_k=1)
+        if matches and matches[0]['similarity'] >= min_similarity:
+            return matches[0]
+        return None
+
+    def save(self) -> None:
+        """Write the index to disk atomically if it has unsaved changes"""
+        if not self.path:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            count = len(self.entries)
+            vectors = self.vectors[:count].copy()
+            entries = json.dumps(self.entries)
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, vectors=vectors, entries=np.array(entries))
+            os.replace(temp_path, self.path)
+            logger.info(f"Saved b-roll index with {count} approved clips to {self.path}")
+        except Exception as e:
+            logger.warning(f"Failed to save b-roll index to {self.path}: {str(e)}")
+            with self.lock:
+                self.dirty = True
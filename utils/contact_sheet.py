@@ -0,0 +1,81 @@
+import os
+import math
+import logging
+from io import BytesIO
+from typing import List, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Bold face shipped with the Remotion site, used for tile labels
+LABEL_FONT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'remotion', 'public', 'fonts', 'Montserrat-Bold.ttf'
+)
+
+def _label_font(size: int):
+    """Load the label font, falling back to Pillow's built-in bitmap font"""
+    try:
+        return ImageFont.truetype(LABEL_FONT_PATH, size)
+    except (OSError, IOError):
+        return ImageFont.load_default()
+
+def grid_shape(count: int, columns: Optional[int] = None) -> Tuple[int, int]:
+    """(columns, rows) of a near-square grid holding count tiles"""
+    columns = columns or max(1, math.ceil(math.sqrt(count)))
+    return columns, max(1, math.ceil(count / columns))
+
+def build_contact_sheet(images: List[bytes], tile_size: int = 256, columns: Optional[int] = None,
+                        gap: int = 4, quality: int = 80) -> bytes:
+    """
+    Compose thumbnails into a single labeled JPEG grid
+
+    Each image is fitted (letterboxed) into a square tile and labeled with its
+    0-based index in the top-left corner, so a model can answer with the label
+    exactly as it would answer with an image index.
+
+    Args:
+        images: Encoded thumbnail bytes, in label order
+        tile_size: Side of each square tile in pixels
+        columns: Tiles per row; defaults to a near-square grid
+        gap: Black spacing between tiles in pixels
+        quality: JPEG quality of the composed sheet
+
+    Returns:
+        The contact sheet encoded as JPEG bytes
+    """
+    columns, rows = grid_shape(len(images), columns)
+    sheet = Image.new(
+        'RGB',
+        (columns * tile_size + (columns - 1) * gap, rows * tile_size + (rows - 1) * gap),
+        (0, 0, 0)
+    )
+    draw = ImageDraw.Draw(sheet)
+    font = _label_font(max(12, tile_size // 7))
+    padding = max(2, tile_size // 40)
+
+    for index, image_data in enumerate(images):
+        column, row = index % columns, index // columns
+        left, top = column * (tile_size + gap), row * (tile_size + gap)
+
+        try:
+            image = Image.open(BytesIO(image_data))
+            image.draft('RGB', (tile_size, tile_size))
+            image = image.convert('RGB')
+            image.thumbnail((tile_size, tile_size), Image.Resampling.LANCZOS)
+            sheet.paste(image, (left + (tile_size - image.width) // 2, top + (tile_size - image.height) // 2))
+        except Exception as e:
+            logger.warning(f"Failed to place tile {index} on contact sheet: {str(e)}")
+
+        # Label on a solid box so it stays legible over any footage
+        label = str(index)
+        text_left, text_top, text_right, text_bottom = draw.textbbox((0, 0), label, font=font)
+        box_width = text_right - text_left + 2 * padding
+        box_height = text_bottom - text_top + 2 * padding
+        draw.rectangle([left, top, left + box_width, top + box_height], fill=(0, 0, 0))
+        draw.text((left + padding - text_left, top + padding - text_top), label, fill=(255, 255, 0), font=font)
+
+    buffer = BytesIO()
+    sheet.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
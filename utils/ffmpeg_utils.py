@@ -2,13 +2,190 @@ import subprocess
 import json
 import logging
 import os
-from typing import Tuple, Optional
+import sys
+import threading
+import time
+from typing import Tuple, Optional, Dict, List, Callable
 import ffmpeg
 
 # Get logger
 logger = logging.getLogger(__name__)
 
+# Seconds between progress log lines while an FFmpeg job is running
+PROGRESS_LOG_INTERVAL = 5.0
+
+ProgressCallback = Callable[[Dict], None]
+
 class FFmpegUtils:
+    # Video codecs the local FFmpeg build can decode, read once per process
+    _decodable_video_codecs: Optional[frozenset] = None
+    _decodable_lock = threading.Lock()
+
+    @staticmethod
+    def _parse_progress(raw: Dict[str, str], duration: Optional[float] = None) -> Dict:
+        """
+        Convert one block of FFmpeg ``-progress`` key=value pairs into typed metrics
+
+        Args:
+            raw: Key/value pairs collected up to (and including) the ``progress`` key
+            duration: Expected output duration in seconds, used to compute a percentage
+
+        Returns:
+            Dictionary with frame, fps, bitrate_kbps, out_time, speed, total_size,
+            percent and state
+        """
+        def to_float(value: Optional[str]) -> Optional[float]:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+
+        # out_time_us is authoritative; older builds report microseconds as out_time_ms
+        out_time_us = to_float(raw.get('out_time_us')) or to_float(raw.get('out_time_ms'))
+        out_time = out_time_us / 1_000_000 if out_time_us is not None else None
+
+        bitrate = raw.get('bitrate', '')
+        speed = raw.get('speed', '')
+
+        progress = {
+            'frame': int(to_float(raw.get('frame')) or 0),
+            'fps': to_float(raw.get('fps')),
+            'bitrate_kbps': to_float(bitrate.replace('kbits/s', '').strip()) if bitrate else None,
+            'out_time': out_time,
+            'speed': to_float(speed.rstrip('x').strip()) if speed else None,
+            'total_size': int(to_float(raw.get('total_size')) or 0),
+            'state': raw.get('progress', 'continue'),
+            'percent': None
+        }
+        if duration and out_time is not None:
+            progress['percent'] = max(0.0, min(100.0, out_time / duration * 100))
+        if progress['state'] == 'end' and duration:
+            progress['percent'] = 100.0
+        return progress
+
+    @staticmethod
+    def run_ffmpeg(cmd: List[str], progress_callback: Optional[ProgressCallback] = None,
+                   duration: Optional[float] = None, label: str = 'ffmpeg') -> Dict:
+        """
+        Run an FFmpeg command with a machine-readable progress channel
+
+        ``-progress pipe:1`` is injected so FFmpeg reports frame, fps, bitrate,
+        out_time and speed on stdout while stderr is drained in the background
+        for error reporting. Once the child exits its CPU time and peak RSS are
+        collected from the kernel's rusage for that process.
+
+        Args:
+            cmd: Full FFmpeg command line, starting with the ``ffmpeg`` binary
+            progress_callback: Called with each parsed progress dictionary
+            duration: Expected output duration in seconds, enables ``percent``
+            label: Short name for the stage, used in log lines
+
+        Returns:
+            Dictionary with wall_time, cpu_user, cpu_system, cpu_time,
+            peak_rss_mb, frames, speed and the last progress snapshot
+        """
+        full_cmd = [cmd[0], '-nostats', '-progress', 'pipe:1'] + list(cmd[1:])
+        logger.info(f"Running FFmpeg command ({label}): {' '.join(full_cmd)}")
+
+        started = time.monotonic()
+        process = subprocess.Popen(
+            full_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+
+        # Drain stderr concurrently so a chatty encoder can't fill the pipe and deadlock us
+        stderr_lines: List[str] = []
+        stderr_thread = threading.Thread(
+            target=lambda: stderr_lines.extend(process.stderr),
+            daemon=True
+        )
+        stderr_thread.start()
+
+        last_progress: Dict = {}
+        last_log = started
+        block: Dict[str, str] = {}
+        try:
+            for line in process.stdout:
+                key, sep, value = line.strip().partition('=')
+                if not sep:
+                    continue
+                block[key] = value.strip()
+                if key != 'progress':
+                    continue
+
+                last_progress = FFmpegUtils._parse_progress(block, duration)
+                block = {}
+
+                if progress_callback:
+                    try:
+                        progress_callback(last_progress)
+                    except Exception as e:
+                        logger.warning(f"FFmpeg progress callback failed ({label}): {str(e)}")
+
+                now = time.monotonic()
+                if now - last_log >= PROGRESS_LOG_INTERVAL:
+                    last_log = now
+                    logger.info(
+                        f"FFmpeg progress ({label}): frame={last_progress['frame']} "
+                        f"fps={last_progress['fps']} speed={last_progress['speed']}x "
+                        f"out_time={last_progress['out_time']}s bitrate={last_progress['bitrate_kbps']}kbps"
+                    )
+        except BaseException:
+            # Don't leave an orphaned encoder, a zombie or a dangling reader behind
+            process.kill()
+            process.wait()
+            stderr_thread.join()
+            raise
+
+        rusage = None
+        if hasattr(os, 'wait4'):
+            # Reap the child ourselves so we get its own rusage rather than an aggregate
+            _, status, rusage = os.wait4(process.pid, 0)
+            if os.WIFSIGNALED(status):
+                process.returncode = -os.WTERMSIG(status)
+            else:
+                process.returncode = os.WEXITSTATUS(status)
+        else:
+            process.wait()
+        stderr_thread.join()
+        wall_time = time.monotonic() - started
+
+        stats = {
+            'label': label,
+            'returncode': process.returncode,
+            'wall_time': wall_time,
+            'cpu_user': None,
+            'cpu_system': None,
+            'cpu_time': None,
+            'peak_rss_mb': None,
+            'frames': last_progress.get('frame'),
+            'speed': last_progress.get('speed'),
+            'progress': last_progress
+        }
+        if rusage is not None:
+            # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+            rss_divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+            stats.update({
+                'cpu_user': rusage.ru_utime,
+                'cpu_system': rusage.ru_stime,
+                'cpu_time': rusage.ru_utime + rusage.ru_stime,
+                'peak_rss_mb': rusage.ru_maxrss / rss_divisor
+            })
+
+        if process.returncode != 0:
+            raise RuntimeError(f"FFmpeg failed: {''.join(stderr_lines)}")
+
+        cpu_time = f"{stats['cpu_time']:.2f}s" if stats['cpu_time'] is not None else 'n/a'
+        peak_rss = f"{stats['peak_rss_mb']:.1f}MB" if stats['peak_rss_mb'] is not None else 'n/a'
+        logger.info(
+            f"FFmpeg finished ({label}) in {wall_time:.2f}s: frames={stats['frames']}, "
+            f"speed={stats['speed']}x, cpu={cpu_time}, peak_rss={peak_rss}"
+        )
+        return stats
+
     @staticmethod
     def get_video_info(video_path: str) -> Tuple[int, int, float, float]:
         """
@@ -60,20 +237,123 @@ class FFmpegUtils:
             raise
 
     @staticmethod
-    def extract_audio(video_path: str, output_path: str) -> None:
+    def probe_media(media_path: str) -> Dict:
+        """
+        Probe a media file for the stream information the pipeline needs
+        
+        Works on partial (sparse) files as long as the container header and
+        index are present, which is how S3Service.probe_header uses it.
+        
+        Args:
+            media_path: Path to the media file
+            
+        Returns:
+            Dictionary with width, height, duration, fps, has_audio,
+            video_codec, audio_codec and format_name
+        """
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-show_entries', 'stream=codec_type,codec_name,width,height,r_frame_rate',
+            '-show_entries', 'format=duration,format_name',
+            '-of', 'json',
+            media_path
+        ]
+        
+        logger.info(f"Running FFprobe command: {' '.join(cmd)}")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        
+        if result.returncode != 0:
+            raise RuntimeError(f"FFprobe failed: {result.stderr}")
+        
+        info = json.loads(result.stdout)
+        streams = info.get('streams', [])
+        video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+        audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+        
+        fps = None
+        if video and video.get('r_frame_rate'):
+            fps_str = video['r_frame_rate']
+            if '/' in fps_str:
+                num, den = map(int, fps_str.split('/'))
+                fps = num / den if den else None
+            else:
+                fps = float(fps_str)
+        
+        duration = info.get('format', {}).get('duration')
+        media_info = {
+            'width': int(video['width']) if video and video.get('width') else None,
+            'height': int(video['height']) if video and video.get('height') else None,
+            'duration': float(duration) if duration not in (None, 'N/A') else None,
+            'fps': fps,
+            'has_audio': audio is not None,
+            'video_codec': video.get('codec_name') if video else None,
+            'audio_codec': audio.get('codec_name') if audio else None,
+            'format_name': info.get('format', {}).get('format_name')
+        }
+        logger.info(f"Media info: {media_info}")
+        return media_info
+
+    @classmethod
+    def decodable_video_codecs(cls) -> Optional[frozenset]:
+        """
+        Names of the video codecs the local FFmpeg build can decode
+
+        Parsed from ``ffmpeg -codecs`` (the 'D' and 'V' capability flags) on
+        first use and cached for the life of the process.
+
+        Returns:
+            Set of codec names as ffprobe reports them in codec_name, or None
+            if FFmpeg couldn't be queried
+        """
+        with cls._decodable_lock:
+            if cls._decodable_video_codecs is not None:
+                return cls._decodable_video_codecs
+            try:
+                result = subprocess.run(['ffmpeg', '-hide_banner', '-codecs'], capture_output=True, text=True)
+                if result.returncode != 0:
+                    raise RuntimeError(result.stderr)
+            except Exception as e:
+                logger.warning(f"Could not list FFmpeg codecs: {str(e)}")
+                return None
+
+            codecs = set()
+            listing = result.stdout.split('-------', 1)[-1]
+            for line in listing.splitlines():
+                parts = line.split()
+                if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] == 'D' and parts[0][2] == 'V':
+                    codecs.add(parts[1])
+            cls._decodable_video_codecs = frozenset(codecs)
+            logger.info(f"FFmpeg can decode {len(codecs)} video codecs")
+            return cls._decodable_video_codecs
+
+    @staticmethod
+    def extract_audio(video_path: str, output_path: str,
+                      progress_callback: Optional[ProgressCallback] = None,
+                      media_info: Optional[Dict] = None) -> Dict:
         """
         Extract audio from video using FFmpeg
         
         Args:
             video_path: Path to the video file
             output_path: Path to save the audio file
+            progress_callback: Optional callback receiving FFmpeg progress updates
+            media_info: Result of probe_media, if already known, to skip probing again
+            
+        Returns:
+            Run statistics from FFmpegUtils.run_ffmpeg
         """
         try:
             # First check if the video has an audio stream
-            probe = ffmpeg.probe(video_path)
-            audio_streams = [stream for stream in probe['streams'] if stream['codec_type'] == 'audio']
+            if media_info is not None:
+                has_audio = media_info['has_audio']
+                duration = media_info.get('duration')
+            else:
+                probe = ffmpeg.probe(video_path)
+                has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
+                duration = float(probe['format']['duration']) if 'duration' in probe.get('format', {}) else None
             
-            if not audio_streams:
+            if not has_audio:
                 logger.warning(f"No audio stream found in video: {video_path}")
                 # Create an empty WAV file with silence
                 cmd = [
@@ -97,20 +377,23 @@ class FFmpegUtils:
                     output_path
                 ]
             
-            logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                raise RuntimeError(f"FFmpeg failed: {result.stderr}")
+            stats = FFmpegUtils.run_ffmpeg(
+                cmd,
+                progress_callback=progress_callback,
+                duration=duration if has_audio else None,
+                label='extract_audio'
+            )
             
             logger.info(f"Audio extracted successfully to: {output_path}")
+            return stats
             
         except Exception as e:
             logger.error(f"Error extracting audio: {str(e)}")
             raise
 
     @staticmethod
-    def preprocess_video(input_path: str, output_path: str, max_resolution: int = 1080) -> None:
+    def preprocess_video(input_path: str, output_path: str, max_resolution: int = 1080,
+                         progress_callback: Optional[ProgressCallback] = None) -> Dict:
         """Preprocess video to a more manageable size while maintaining quality"""
         try:
             # Get video info
@@ -141,7 +424,13 @@ class FFmpegUtils:
                                  video_bitrate='4M',
                                  audio_bitrate='192k')
             
-            ffmpeg.run(stream, overwrite_output=True)
+            duration = float(probe['format']['duration']) if 'duration' in probe.get('format', {}) else None
+            return FFmpegUtils.run_ffmpeg(
+                ffmpeg.compile(stream, overwrite_output=True),
+                progress_callback=progress_callback,
+                duration=duration,
+                label='preprocess_video'
+            )
         except Exception as e:
             logger.error(f"Error preprocessing video: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
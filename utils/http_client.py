@@ -0,0 +1,96 @@
+import os
+import asyncio
+import logging
+import threading
+from typing import Optional
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Connection pool sizing, shared by all outbound b-roll traffic
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+HTTP_LIMIT_PER_HOST = int(os.getenv('HTTP_LIMIT_PER_HOST', '20'))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '60'))
+
+# Request timeouts in seconds
+HTTP_TOTAL_TIMEOUT = float(os.getenv('HTTP_TOTAL_TIMEOUT', '30'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '20'))
+
+class HttpClient:
+    """
+    Process-wide pooled HTTP clients for outbound API and media traffic
+
+    The aiohttp session keeps connections alive per host, caches DNS lookups and
+    applies default timeouts. It is bound to the event loop it was created on and
+    is recreated transparently if used from a different loop (e.g. a CLI run with
+    asyncio.run after the API app). A pooled requests.Session covers sync callers.
+    """
+
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    _sync_session: Optional[requests.Session] = None
+    _sync_lock = threading.Lock()
+
+    @classmethod
+    async def get_session(cls) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            if cls._session is not None and not cls._session.closed and not cls._session_loop.is_closed():
+                logger.warning("Shared HTTP session belongs to another event loop, creating a new one")
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_LIMIT_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                use_dns_cache=True,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=HTTP_TOTAL_TIMEOUT,
+                connect=HTTP_CONNECT_TIMEOUT,
+                sock_read=HTTP_READ_TIMEOUT
+            )
+            cls._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            cls._session_loop = loop
+            logger.info(
+                f"Created shared HTTP session (limit={HTTP_POOL_LIMIT}, per_host={HTTP_LIMIT_PER_HOST}, "
+                f"dns_ttl={HTTP_DNS_CACHE_TTL}s)"
+            )
+        return cls._session
+
+    @classmethod
+    def get_sync_session(cls) -> requests.Session:
+        """Return the shared pooled requests session for synchronous callers"""
+        with cls._sync_lock:
+            if cls._sync_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_LIMIT_PER_HOST, pool_maxsize=HTTP_LIMIT_PER_HOST)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                cls._sync_session = session
+            return cls._sync_session
+
+    @classmethod
+    def sync_timeout(cls):
+        """(connect, read) timeout tuple for the requests session"""
+        return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared sessions; called on application shutdown"""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+            logger.info("Closed shared HTTP session")
+        cls._session = None
+        cls._session_loop = None
+
+        with cls._sync_lock:
+            if cls._sync_session is not None:
+                cls._sync_session.close()
+                cls._sync_session = None
@@ -0,0 +1,79 @@
+import logging
+from io import BytesIO
+from typing import List, Optional
+import numpy as np
+from PIL import Image
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+def dhash(image_data: bytes, hash_size: int = 8) -> Optional[str]:
+    """
+    Compute the difference hash (dHash) of an encoded image
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale grid and each
+    bit records whether a pixel is brighter than its right-hand neighbour, so the
+    hash survives recompression, rescaling and small colour shifts.
+
+    Args:
+        image_data: Encoded image bytes (JPEG, PNG, ...)
+        hash_size: Grid size; the hash has hash_size * hash_size bits
+
+    Returns:
+        The hash as a hex string, or None if the image can't be decoded
+    """
+    try:
+        image = Image.open(BytesIO(image_data))
+        image.draft('L', (hash_size * 4, hash_size * 4))
+        pixels = np.asarray(
+            image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX),
+            dtype=np.int16
+        )
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+        return np.packbits(bits).tobytes().hex()
+    except Exception as e:
+        logger.warning(f"Failed to hash image: {str(e)}")
+        return None
+
+def hash_distances(hashes: List[str]) -> np.ndarray:
+    """Pairwise Hamming distances between equally sized hex hashes"""
+    bits = np.unpackbits(
+        np.array([np.frombuffer(bytes.fromhex(h), dtype=np.uint8) for h in hashes]),
+        axis=1
+    ).astype(bool)
+    return (bits[:, None, :] != bits[None, :, :]).sum(axis=2)
+
+def cluster_hashes(hashes: List[Optional[str]], max_distance: int) -> List[List[int]]:
+    """
+    Group near-identical images by perceptual hash
+
+    Images are visited in order and join the first cluster whose leader is within
+    max_distance bits, so each cluster's first index is the earliest (highest
+    ranked) image. Images without a hash always get a cluster of their own.
+
+    Args:
+        hashes: One hex hash (or None) per image
+        max_distance: Largest Hamming distance still considered a duplicate
+
+    Returns:
+        List of clusters, each a list of image indices with the leader first
+    """
+    hashed = [i for i, h in enumerate(hashes) if h]
+    distances = hash_distances([hashes[i] for i in hashed]) if len(hashed) > 1 else None
+    position = {index: pos for pos, index in enumerate(hashed)}
+
+    clusters: List[List[int]] = []
+    leaders: List[int] = []
+    for i, h in enumerate(hashes):
+        if h and distances is not None:
+            for cluster, leader in zip(clusters, leaders):
+                if leader in position and distances[position[leader], position[i]] <= max_distance:
+                    cluster.append(i)
+                    break
+            else:
+                clusters.append([i])
+                leaders.append(i)
+        else:
+            clusters.append([i])
+            leaders.append(i)
+    return clusters
@@ -0,0 +1,66 @@
+import json
+import logging
+from typing import Any, List
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+class JsonArrayStream:
+    """
+    Incrementally extract the objects of a JSON array arriving in chunks
+
+    Text before the first '[' (e.g. a markdown fence or a wrapping key) is
+    skipped, and each top-level ``{...}`` element is returned by ``feed`` as
+    soon as its closing brace arrives, so callers can act on it before the rest
+    of the array has been generated. Elements that aren't objects are ignored.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.current: List[str] = []
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume the next chunk and return the objects it completed"""
+        objects = []
+        for char in text:
+            if self.finished:
+                break
+            if not self.started:
+                self.started = char == '['
+                continue
+
+            if self.depth == 0:
+                # Between elements: only the start of an object or the end of the array matter
+                if char == '{':
+                    self.depth = 1
+                    self.current = [char]
+                elif char == ']':
+                    self.finished = True
+                continue
+
+            self.current.append(char)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    raw = ''.join(self.current)
+                    self.current = []
+                    try:
+                        objects.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping malformed streamed JSON element: {str(e)}")
+        return objects
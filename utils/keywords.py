@@ -0,0 +1,194 @@
+import re
+import zlib
+from typing import List
+import numpy as np
+
+# Words whose trailing "s" is not a plural marker
+_KEEP_S = {'yoga', 'fitness', 'news', 'glass', 'grass', 'class', 'boss', 'bus', 'gas', 'lens', 'abs', 'series', 'species'}
+
+# Function words that never decide whether two keywords describe the same shot
+_GROUP_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'on', 'in', 'at', 'to', 'for', 'with', 'by', 'from', 'into',
+    'onto', 'over', 'under', 'near', 'while', 'some', 'his', 'her', 'their', 'its', 'our', 'my'
+}
+
+# Words naming the same thing on screen, mapped to one concept before comparing keywords
+_GROUP_SYNONYMS = {
+    'dumbbell': 'weight', 'barbell': 'weight', 'kettlebell': 'weight',
+    'training': 'workout', 'exercise': 'workout', 'exercising': 'workout',
+    'jogging': 'running', 'jog': 'running', 'sprinting': 'running',
+    'automobile': 'car', 'vehicle': 'car',
+    'laptop': 'computer', 'pc': 'computer',
+    'smartphone': 'phone', 'cellphone': 'phone',
+    'seaside': 'beach', 'shore': 'beach',
+    'kid': 'child', 'children': 'child', 'women': 'woman', 'men': 'man', 'people': 'person'
+}
+
+def _singularize(word: str) -> str:
+    """Very small rule-based plural stripper, good enough to merge stock search keywords"""
+    if word in _KEEP_S or len(word) <= 3:
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'ches', 'shes', 'xes', 'zes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Normalize a b-roll keyword for cache lookups and comparisons
+
+    Lowercases, strips punctuation, collapses whitespace and singularizes each
+    word, so "Gym  Workouts" and "gym workout" map to the same key.
+    """
+    words = re.findall(r"[a-z0-9']+", (keyword or '').lower())
+    return ' '.join(_singularize(word.strip("'")) for word in words if word.strip("'"))
+
+def _stem(word: str) -> str:
+    """Crude suffix stripper so "lifting", "lifted" and "lift" compare equal"""
+    for suffix in ('ing', 'ed', 'e'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+        # Undouble the consonant left by "running" / "stopped"
+        word = word[:-1]
+    return word
+
+def keyword_concepts(keyword: str) -> List[str]:
+    """
+    Content concepts of a keyword for grouping: stemmed words with synonyms merged
+
+    Function words are dropped and the remaining words are mapped through a
+    small synonym table, then stemmed, so "woman lifting weights" and
+    "lifting dumbbells" give ['woman', 'lift', 'weight'] and ['lift', 'weight'].
+    """
+    concepts = []
+    for word in normalize_keyword(keyword).split():
+        if word in _GROUP_STOPWORDS:
+            continue
+        concept = _stem(_GROUP_SYNONYMS.get(word, word))
+        if concept not in concepts:
+            concepts.append(concept)
+    return concepts
+
+def concept_vector(keyword: str, dim: int) -> np.ndarray:
+    """
+    Embed a keyword's concepts (see keyword_concepts) as an L2-normalised bag of hashed concepts
+
+    Unlike keyword_vector, a shared word only counts once as a whole: two
+    two-concept keywords sharing one concept score 0.5, while a keyword whose
+    concepts mostly overlap another's scores 0.8 or more.
+
+    Args:
+        keyword: Keyword text
+        dim: Number of hash buckets
+
+    Returns:
+        float32 vector of length dim (all zeros for a keyword with no content words)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for concept in keyword_concepts(keyword):
+        vector[zlib.crc32(concept.encode('utf-8')) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+def keyword_vector(keyword: str, dim: int) -> np.ndarray:
+    """
+    Embed a keyword as an L2-normalised vector of hashed character 3-grams and words
+
+    Features are hashed with CRC32 (stable across processes) into dim buckets with
+    a hash-derived sign, so similar spellings and shared words give a high cosine.
+
+    Args:
+        keyword: Keyword text; normalized with normalize_keyword first
+        dim: Number of hash buckets
+
+    Returns:
+        float32 vector of length dim (all zeros for an empty keyword)
+    """
+    normalized = normalize_keyword(keyword)
+    vector = np.zeros(dim, dtype=np.float32)
+    padded = f" {normalized} "
+    features = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    features += [f"w:{word}" for word in normalized.split()]
+    for feature in features:
+        digest = zlib.crc32(feature.encode('utf-8'))
+        vector[digest % dim] += -1.0 if digest & 0x80000000 else 1.0
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+class KeywordGrouper:
+    """
+    Incremental clustering of near-duplicate keywords by cosine similarity of their concept vectors
+
+    Each added keyword joins the cluster whose normalised centroid is most
+    similar, if that similarity reaches min_similarity; otherwise it starts a
+    new cluster. Centroids are kept up to date as members join, so feeding
+    keywords one at a time (e.g. as they stream in) clusters them exactly like
+    group_keywords does for the same order.
+    """
+
+    def __init__(self, min_similarity: float, dim: int = 1024):
+        self.min_similarity = min_similarity
+        self.dim = dim
+        self.clusters: List[List[int]] = []
+        self._sums: List[np.ndarray] = []
+        self._centroids: List[np.ndarray] = []
+        self._count = 0
+
+    def add(self, keyword: str) -> int:
+        """
+        Assign the next keyword to a cluster
+
+        Args:
+            keyword: Keyword text; its index is the number of keywords added before it
+
+        Returns:
+            Index of the cluster it joined (len(clusters) - 1 if it started a new one)
+        """
+        i = self._count
+        self._count += 1
+        vector = concept_vector(keyword, self.dim)
+        best, best_similarity = None, self.min_similarity
+        for c, centroid in enumerate(self._centroids):
+            similarity = float(centroid @ vector)
+            if similarity >= best_similarity:
+                best, best_similarity = c, similarity
+        if best is None or not vector.any():
+            self.clusters.append([i])
+            self._sums.append(vector.copy())
+            self._centroids.append(vector)
+            return len(self.clusters) - 1
+        self.clusters[best].append(i)
+        self._sums[best] += vector
+        norm = np.linalg.norm(self._sums[best])
+        self._centroids[best] = self._sums[best] / norm if norm > 0 else self._sums[best]
+        return best
+
+def group_keywords(keywords: List[str], min_similarity: float, dim: int = 1024) -> List[List[int]]:
+    """
+    Cluster near-duplicate keywords by cosine similarity of their concept vectors
+
+    Keywords are visited in order (so put the preferred ones first) and assigned
+    with KeywordGrouper.
+
+    Args:
+        keywords: Keywords to group
+        min_similarity: Smallest centroid cosine at which a keyword joins a cluster
+        dim: Number of hash buckets of the concept vectors
+
+    Returns:
+        List of clusters, each a list of keyword indices in visiting order
+    """
+    grouper = KeywordGrouper(min_similarity, dim)
+    for keyword in keywords:
+        grouper.add(keyword)
+    return grouper.clusters
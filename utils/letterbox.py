@@ -0,0 +1,114 @@
+import logging
+from typing import Tuple, Optional
+import numpy as np
+from PIL import Image
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Large downscales are first shrunk by a whole factor in Pillow's fast box reduce
+# until at most this much resampling is left for the filter (see Image.resize)
+REDUCING_GAP = 1.5
+
+def letterbox_geometry(source_size: Tuple[int, int], target_size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Compute the scaled size and offset of a frame letterboxed into a target size
+
+    Args:
+        source_size: (width, height) of the source frames
+        target_size: (width, height) of the output frames
+
+    Returns:
+        Tuple of (new_width, new_height, paste_x, paste_y)
+    """
+    original_width, original_height = source_size
+    target_width, target_height = target_size
+
+    target_ratio = target_width / target_height
+    original_ratio = original_width / original_height
+
+    if original_ratio > target_ratio:
+        # Image is wider than target
+        new_width = target_width
+        new_height = int(target_width / original_ratio)
+    else:
+        # Image is taller than target
+        new_height = target_height
+        new_width = int(target_height * original_ratio)
+
+    paste_x = (target_width - new_width) // 2
+    paste_y = (target_height - new_height) // 2
+    return new_width, new_height, paste_x, paste_y
+
+def letterbox_filter(width: int, height: int) -> str:
+    """
+    FFmpeg filter chain letterboxing frames into width x height inside the encoder
+
+    The scaled picture is kept to even dimensions so the padding stays valid for
+    yuv420p output; width and height should be even as well.
+    """
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease:force_divisible_by=2:flags=lanczos,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1"
+    )
+
+class LetterboxResizer:
+    """
+    Letterbox frames into a fixed size using geometry computed once per clip
+
+    Each frame costs a single resize in Pillow's C code (box-reducing large
+    downscales first, see REDUCING_GAP) plus one copy of the picture into a new
+    black canvas. Every call returns its own array, since moviepy consumers may
+    keep earlier frames around. For whole files, letterbox_filter does the same
+    inside FFmpeg.
+    """
+
+    def __init__(self, source_size: Tuple[int, int], target_size: Tuple[int, int],
+                 resample: int = Image.LANCZOS):
+        self.target_size = (int(target_size[0]), int(target_size[1]))
+        self.resample = resample
+        self.source_size: Optional[Tuple[int, int]] = None
+        self._configure(source_size)
+
+    def _configure(self, source_size: Tuple[int, int]) -> None:
+        """Precompute scaled size and picture window for a source frame size"""
+        self.source_size = (int(source_size[0]), int(source_size[1]))
+        self.new_width, self.new_height, self.paste_x, self.paste_y = letterbox_geometry(
+            self.source_size, self.target_size
+        )
+        logger.debug(
+            f"Letterbox geometry {self.source_size} -> {self.target_size}: "
+            f"{self.new_width}x{self.new_height} at ({self.paste_x}, {self.paste_y})"
+        )
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        """Letterbox a single RGB frame into a new target-sized array"""
+        height, width = frame.shape[:2]
+        if (width, height) != self.source_size:
+            self._configure((width, height))
+
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            frame = frame[:, :, :3]
+
+        canvas = np.zeros((self.target_size[1], self.target_size[0], 3), dtype=np.uint8)
+        window = canvas[
+            self.paste_y:self.paste_y + self.new_height,
+            self.paste_x:self.paste_x + self.new_width
+        ]
+        if (width, height) == (self.new_width, self.new_height):
+            window[...] = frame
+        else:
+            resized = Image.fromarray(frame).resize(
+                (self.new_width, self.new_height),
+                self.resample,
+                reducing_gap=REDUCING_GAP
+            )
+            window[...] = np.asarray(resized)
+        return canvas
+
+def letterbox_clip(clip, width: int, height: int):
+    """Return a moviepy clip letterboxed into width x height with one resizer per clip"""
+    resizer = LetterboxResizer(clip.size, (width, height))
+    return clip.fl_image(resizer)
@@ -0,0 +1,142 @@
+import re
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from .keywords import normalize_keyword
+from .transcript import compact_segments, precise_timestamp
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Words that split candidate phrases (RAKE phrase delimiters)
+STOPWORDS = frozenset("""
+a about above after again against all almost also always am an and another any anyone anything are around as at
+back be because been before being below between both but by can could did do does doing done don't down during
+each either else enough even ever every everyone everything few first for from get gets getting go goes going gonna
+got had has have having he her here hers herself him himself his how i i'm if in into is it it's its itself just
+kind know last let let's like little lot lots made make makes making many may me might more most much must my
+myself need never new next no nor not now of off okay on once one only or other our ours ourselves out over own
+pretty probably put quite rather really right said same say says see so some something sort still such sure take
+than that that's the their theirs them themselves then there there's these they they're thing things think this
+those though through to today too up us use used very want wanna was way we we're well were what when where which
+while who whom why will with without would yeah yes yet you you're your yours yourself yourselves
+across behind beside beneath near onto toward towards upon within
+""".split()) | frozenset([
+    # Channel talk that never makes good footage
+    'channel', 'comment', 'comments', 'forget', 'guys', 'subscribe', 'thank', 'thanks',
+    'video', 'videos', 'watch', 'watching', 'welcome'
+])
+
+# Concrete, filmable nouns that make good stock footage searches; phrases containing them rank higher
+VISUAL_VOCABULARY = frozenset("""
+airplane animal apartment beach bicycle bike bird boat book bridge building bus cafe camera car cat child children
+city classroom cliff cloud clouds coast coffee computer concert construction cooking crowd desert desk doctor dog
+drone factory family farm field fire fireworks fish flower flowers food forest friends garden gym highway hike hiking
+hospital house ice island kitchen lake laptop library market meeting money mountain mountains music night ocean
+office paper park party people phone piano plane rain restaurant river road robot running school sea shop shopping
+sky snow soccer space sport stadium street students sun sunrise sunset swimming team technology thunder traffic
+train travel tree trees truck university village walking water waves wedding wind winter workout yoga
+""".split())
+
+# Boost applied to a phrase per visual-vocabulary word it contains
+VISUAL_BOOST = 1.5
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+PHRASE_BREAK_PATTERN = re.compile(r"[.,;:!?()\"\-–—]+")
+
+def candidate_phrases(text: str, max_words: int = 3) -> List[List[str]]:
+    """Split text into runs of content words between stopwords and punctuation (RAKE candidates)"""
+    phrases = []
+    for chunk in PHRASE_BREAK_PATTERN.split(text.lower()):
+        current: List[str] = []
+        for word in WORD_PATTERN.findall(chunk):
+            word = word.strip("'")
+            if not word or word in STOPWORDS or word.isdigit() or len(word) < 3:
+                if current:
+                    phrases.append(current)
+                current = []
+                continue
+            current.append(word)
+        if current:
+            phrases.append(current)
+    # Overlong runs are usually run-on speech; keep their last words, closest to the head noun
+    return [phrase[-max_words:] for phrase in phrases]
+
+def extract_keywords(segments: List[Dict[str, Any]], min_gap_seconds: float = 8.0,
+                     max_keywords: Optional[int] = None, max_span_seconds: float = 15.0) -> List[Dict[str, Any]]:
+    """
+    Offline keyword extraction with the same record shape as the LLM suggestions
+
+    Phrases are scored with RAKE (sum of word degree/frequency over the whole
+    transcript) and boosted for every word in VISUAL_VOCABULARY. Each
+    sentence-level span proposes its best phrase; proposals are then taken best
+    first, keeping at least min_gap_seconds between suggestions.
+
+    Args:
+        segments: Dicts with 'start', 'end' and 'text', in time order
+        min_gap_seconds: Minimum spacing between chosen timestamps
+        max_keywords: Optional cap on the number of suggestions
+        max_span_seconds: Longest sentence-level span (see compact_segments)
+
+    Returns:
+        List of dicts with 'keyword', 'timestamp', 'confidence' and
+        'explanation', in time order
+    """
+    spans = compact_segments(segments, max_span_seconds)
+    span_phrases = [candidate_phrases(span['text']) for span in spans]
+
+    frequency: Dict[str, int] = defaultdict(int)
+    degree: Dict[str, int] = defaultdict(int)
+    for phrases in span_phrases:
+        for phrase in phrases:
+            for word in phrase:
+                frequency[word] += 1
+                degree[word] += len(phrase)
+
+    def score(phrase: List[str]) -> float:
+        rake = sum(degree[word] / frequency[word] for word in phrase)
+        visual = sum(1 for word in phrase if word in VISUAL_VOCABULARY)
+        return rake * (VISUAL_BOOST ** visual) if visual else rake
+
+    proposals = []
+    for span, phrases in zip(spans, span_phrases):
+        if not phrases:
+            continue
+        best = max(phrases, key=score)
+        keyword = ' '.join(best)
+        proposals.append({
+            'keyword': keyword,
+            'score': score(best),
+            'visual': any(word in VISUAL_VOCABULARY for word in best),
+            'timestamp': precise_timestamp([span], int(span['start']), keyword),
+            'context': span['text']
+        })
+    if not proposals:
+        return []
+
+    top_score = max(proposal['score'] for proposal in proposals)
+    chosen = []
+    used = set()
+    for proposal in sorted(proposals, key=lambda p: p['score'], reverse=True):
+        if max_keywords is not None and len(chosen) >= max_keywords:
+            break
+        normalized = normalize_keyword(proposal['keyword'])
+        if normalized in used:
+            continue
+        if any(abs(proposal['timestamp'] - other['timestamp']) < min_gap_seconds for other in chosen):
+            continue
+        used.add(normalized)
+        chosen.append(proposal)
+
+    suggestions = [
+        {
+            'keyword': proposal['keyword'],
+            'timestamp': proposal['timestamp'],
+            # Local phrases are a weaker signal than the model's picks, so confidence stays modest
+            'confidence': round(0.3 + 0.4 * proposal['score'] / top_score + (0.1 if proposal['visual'] else 0.0), 2),
+            'explanation': f"Key phrase of the transcript at this point: \"{proposal['context'][:80]}\""
+        }
+        for proposal in sorted(chosen, key=lambda p: p['timestamp'])
+    ]
+    logger.info(f"Local extraction produced {len(suggestions)} keyword suggestions from {len(spans)} spans")
+    return suggestions
@@ -0,0 +1,64 @@
+import struct
+import logging
+from typing import Callable, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Give up walking top-level boxes after this many (real files have a handful)
+MAX_TOP_LEVEL_BOXES = 64
+
+RangeReader = Callable[[int, int], bytes]
+
+def is_iso_bmff(header: bytes) -> bool:
+    """Whether the bytes start an MP4/MOV (ISO base media) file"""
+    return len(header) >= 8 and header[4:8] in (b'ftyp', b'wide', b'free', b'mdat', b'moov')
+
+def find_moov(header: bytes, size: int, read_range: RangeReader) -> Optional[Tuple[int, int]]:
+    """
+    Locate the moov box of an MP4/MOV file by walking its top-level boxes
+
+    Box headers inside the already-downloaded header are parsed directly; boxes
+    beyond it (typically the moov after a large mdat) are reached with small
+    ranged reads, so no media data is downloaded.
+
+    Args:
+        header: The first bytes of the file
+        size: Total size of the file in bytes
+        read_range: Callable returning the bytes in [start, end] (inclusive)
+
+    Returns:
+        Tuple of (offset, size) of the moov box, or None if it can't be found
+    """
+    offset = 0
+    for _ in range(MAX_TOP_LEVEL_BOXES):
+        if offset + 8 > size:
+            return None
+
+        if offset + 16 <= len(header):
+            box = header[offset:offset + 16]
+        else:
+            box = read_range(offset, min(size, offset + 16) - 1)
+        if len(box) < 8:
+            return None
+
+        box_size, box_type = struct.unpack('>I4s', box[:8])
+        if box_size == 1:
+            # 64-bit "largesize" follows the type
+            if len(box) < 16:
+                return None
+            box_size = struct.unpack('>Q', box[8:16])[0]
+        elif box_size == 0:
+            # Box extends to the end of the file
+            box_size = size - offset
+
+        if box_size < 8:
+            logger.warning(f"Invalid MP4 box size {box_size} at offset {offset}")
+            return None
+
+        if box_type == b'moov':
+            return offset, box_size
+
+        offset += box_size
+
+    return None
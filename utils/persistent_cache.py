@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Default location of the on-disk cache shared by all PersistentCache namespaces
+DEFAULT_CACHE_PATH = os.getenv('BROLL_CACHE_PATH', os.path.join('cache', 'broll_cache.sqlite3'))
+
+class PersistentCache:
+    """
+    Two-level key/value cache: an in-memory LRU in front of a SQLite table
+
+    Values must be JSON serialisable. Entries expire after ``ttl`` seconds in both
+    levels; the memory level also evicts least recently used entries beyond
+    ``max_entries``, and the disk level is pruned to ``max_disk_entries``.
+    Use ``PersistentCache.shared`` to get one process-wide instance per namespace.
+    """
+
+    _instances: Dict[str, 'PersistentCache'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, namespace: str, ttl: float = 7 * 24 * 3600, max_entries: int = 1000,
+                 max_disk_entries: int = 50000, path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = path
+        self.lock = threading.Lock()
+        self.memory: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self.metrics = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+        self.db = None
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self.db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+                self.db.execute('PRAGMA journal_mode=WAL')
+                self.db.execute(
+                    'CREATE TABLE IF NOT EXISTS cache ('
+                    'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                    'expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))'
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache unavailable for '{namespace}' at {path}, using memory only: {str(e)}")
+                self.db = None
+
+        logger.info(f"Initialized cache '{namespace}' (ttl={ttl}s, max_entries={max_entries}, disk={bool(self.db)})")
+
+    @classmethod
+    def shared(cls, namespace: str, **kwargs) -> 'PersistentCache':
+        """Get the process-wide cache for a namespace, creating it on first use"""
+        with cls._instances_lock:
+            if namespace not in cls._instances:
+                cls._instances[namespace] = cls(namespace, **kwargs)
+            return cls._instances[namespace]
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        """Insert into the memory level, evicting least recently used entries"""
+        self.memory[key] = (expires_at, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.metrics['evictions'] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if it is missing or expired"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self.memory.move_to_end(key)
+                    self.metrics['hits'] += 1
+                    self.metrics['memory_hits'] += 1
+                    return value
+                del self.memory[key]
+
+            if self.db is not None:
+                try:
+                    row = self.db.execute(
+                        'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?',
+                        (self.namespace, key)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Disk cache read failed for '{self.namespace}': {str(e)}")
+                    row = None
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.metrics['hits'] += 1
+                    self.metrics['disk_hits'] += 1
+                    return value
+
+            self.metrics['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serialisable value under key"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self._remember(key, expires_at, value)
+            self.metrics['sets'] += 1
+
+            if self.db is not None:
+                try:
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                        (self.namespace, key, json.dumps(value), expires_at)
+                    )
+                    # Prune occasionally rather than on every write
+                    if self.metrics['sets'] % 100 == 0:
+                        self._prune_disk()
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Disk cache write failed for '{self.namespace}': {str(e)}")
+
+    def _prune_disk(self) -> None:
+        """Drop expired rows and keep the namespace under max_disk_entries"""
+        self.db.execute(
+            'DELETE FROM cache WHERE namespace = ? AND expires_at <= ?',
+            (self.namespace, time.time())
+        )
+        self.db.execute(
+            'DELETE FROM cache WHERE namespace = ? AND key NOT IN ('
+            'SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at DESC LIMIT ?)',
+            (self.namespace, self.namespace, self.max_disk_entries)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this namespace"""
+        with self.lock:
+            stats = dict(self.metrics)
+            stats['memory_entries'] = len(self.memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,234 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Backoff cap when a 429 carries no Retry-After header
+MAX_BACKOFF = 30.0
+
+# Default ceiling on the total time one call waits out 429s before giving up
+MAX_THROTTLE_WAIT = 30.0
+
+class RateLimitedError(Exception):
+    """Raised by a scheduled call when the provider answered 429 Too Many Requests"""
+
+    def __init__(self, message: str = 'Rate limited', retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class RateLimitScheduler:
+    """
+    Priority queue in front of one provider's API, paced by a token bucket and AIMD concurrency
+
+    Each call needs a token (refilled at ``rate`` per second up to ``burst``) and
+    a concurrency slot. The concurrency limit grows by one per window of
+    successful calls and is halved, at most once per ``decrease_interval``, when
+    the provider returns 429 or latency exceeds ``latency_target``. A 429 also
+    pauses the whole provider for its Retry-After (or an exponential backoff)
+    and the call is retried instead of failing, unless that would take its total
+    wait past ``max_wait`` (e.g. an hourly quota resetting far in the future), in
+    which case the call fails fast. Waiters are served by priority, then FIFO. Use ``RateLimitScheduler.shared`` to get one scheduler per provider.
+    """
+
+    _instances: Dict[str, 'RateLimitScheduler'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name: str, rate: float, burst: float, max_concurrency: int, min_concurrency: int = 1,
+                 initial_concurrency: Optional[int] = None, latency_target: Optional[float] = None,
+                 max_retries: int = 5, decrease_factor: float = 0.5, decrease_interval: float = 2.0,
+                 max_wait: float = MAX_THROTTLE_WAIT):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.max_wait = max_wait
+
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.queue: list = []
+        self.sequence = itertools.count()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.metrics = {'calls': 0, 'throttled': 0, 'retries': 0, 'abandoned': 0, 'slow': 0, 'errors': 0}
+
+        logger.info(
+            f"Initialized rate limiter '{name}' (rate={rate:.3f}/s, burst={burst}, "
+            f"concurrency={min_concurrency}-{max_concurrency})"
+        )
+
+    @classmethod
+    def shared(cls, name: str, **kwargs) -> 'RateLimitScheduler':
+        """Get the process-wide scheduler for a provider, creating it on first use"""
+        with cls._instances_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(name, **kwargs)
+            return cls._instances[name]
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def _schedule_dispatch(self, delay: float) -> None:
+        """Wake the queue after delay unless an earlier wake-up is already pending"""
+        if self.timer is not None:
+            if self.timer.when() <= self.loop.time() + delay:
+                return
+            self.timer.cancel()
+        self.timer = self.loop.call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        """Hand tokens and slots to the highest-priority waiters that can run now"""
+        self.timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self.queue:
+            future = self.queue[0][2]
+            if future.done():
+                heapq.heappop(self.queue)
+                continue
+            if self.in_flight >= max(self.min_concurrency, int(self.limit)):
+                return
+            wait = self.blocked_until - now
+            if self.tokens < 1:
+                wait = max(wait, (1 - self.tokens) / self.rate)
+            if wait > 0:
+                self._schedule_dispatch(wait)
+                return
+            heapq.heappop(self.queue)
+            self.tokens -= 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Waiters and timers belong to one event loop; start afresh on a new one
+            self.loop, self.queue, self.timer, self.in_flight = loop, [], None, 0
+        future = loop.create_future()
+        heapq.heappush(self.queue, (priority, next(self.sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Cancelled after being granted a slot: give it back
+                self._release(0.0)
+            raise
+
+    def _decrease(self, now: float) -> None:
+        """Multiplicative decrease, at most once per decrease_interval"""
+        if now - self.last_decrease >= self.decrease_interval:
+            self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+            self.last_decrease = now
+            logger.info(f"Rate limiter '{self.name}' concurrency reduced to {int(self.limit)}")
+
+    def _release(self, latency: float, throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        """Free a slot and adapt the concurrency limit to the outcome of the call"""
+        now = time.monotonic()
+        self.in_flight = max(0, self.in_flight - 1)
+        if throttled:
+            self._decrease(now)
+            # Never park the queue longer than a call is allowed to wait
+            self.blocked_until = max(self.blocked_until, now + min(retry_after or 0.0, self.max_wait))
+        elif self.latency_target and latency > self.latency_target:
+            self.metrics['slow'] += 1
+            self._decrease(now)
+        else:
+            # Additive increase: about +1 per limit's worth of successful calls
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+        if self.loop is not None and not self.loop.is_closed():
+            self._dispatch()
+
+    async def run(self, call: Callable[[], Awaitable[Any]], priority: int = PRIORITY_NORMAL) -> Any:
+        """
+        Run an async call once a token and a concurrency slot are available
+
+        Args:
+            call: Zero-argument callable returning a fresh awaitable per attempt;
+                it should raise RateLimitedError when the provider returns 429
+            priority: Queue priority, lower runs first (see PRIORITY_*)
+
+        Returns:
+            The call's result
+
+        Raises:
+            RateLimitedError: If the provider is still throttling after max_retries,
+                or waiting it out would exceed max_wait
+        """
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority)
+            self.metrics['calls'] += 1
+            started = time.monotonic()
+            try:
+                result = await call()
+            except RateLimitedError as e:
+                self.metrics['throttled'] += 1
+                delay = e.retry_after if e.retry_after is not None else min(MAX_BACKOFF, 2.0 ** attempt)
+                self._release(time.monotonic() - started, throttled=True, retry_after=delay)
+                if attempt == self.max_retries:
+                    raise
+                waited += delay
+                if waited > self.max_wait:
+                    self.metrics['abandoned'] += 1
+                    logger.warning(f"'{self.name}' rate limited for {delay:.1f}s, past the {self.max_wait:g}s wait ceiling; giving up")
+                    raise
+                self.metrics['retries'] += 1
+                logger.warning(f"'{self.name}' rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                continue
+            except BaseException:
+                self.metrics['errors'] += 1
+                self._release(time.monotonic() - started)
+                raise
+            self._release(time.monotonic() - started)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current pacing state"""
+        stats = dict(self.metrics)
+        stats.update({
+            'concurrency_limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'queued': len(self.queue),
+            'tokens': round(self.tokens, 2),
+            'blocked_for': round(max(0.0, self.blocked_until - time.monotonic()), 2)
+        })
+        return stats
@@ -0,0 +1,105 @@
+import copy
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical async operations into one
+
+    The first caller for a key starts the operation as its own task; callers
+    arriving while it is in flight await the same result instead of repeating
+    it. Cancelling one caller never cancels the shared operation. Each caller
+    gets a deep copy of the result so nobody sees another caller's mutations.
+    Use ``SingleFlight.shared`` to get one process-wide group per namespace.
+    """
+
+    _instances: Dict[str, 'SingleFlight'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, namespace: str, copy_results: bool = True):
+        self.namespace = namespace
+        self.copy_results = copy_results
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.metrics = {'leaders': 0, 'joined': 0}
+
+    @classmethod
+    def shared(cls, namespace: str, **kwargs) -> 'SingleFlight':
+        """Get the process-wide group for a namespace, creating it on first use"""
+        with cls._instances_lock:
+            if namespace not in cls._instances:
+                cls._instances[namespace] = cls(namespace, **kwargs)
+            return cls._instances[namespace]
+
+    def claim(self, key: str) -> Tuple[asyncio.Future, bool]:
+        """
+        Join the in-flight operation for key, or register a new one
+
+        Returns:
+            Tuple of (future, is_leader). A leader must settle the future with
+            resolve() or fail(); everyone else just awaits it via wait().
+        """
+        loop = asyncio.get_running_loop()
+        future = self.in_flight.get(key)
+        if future is not None and not future.done() and future.get_loop() is loop:
+            self.metrics['joined'] += 1
+            logger.debug(f"Joined in-flight '{self.namespace}' operation for '{key}'")
+            return future, False
+
+        future = loop.create_future()
+        self.in_flight[key] = future
+        self.metrics['leaders'] += 1
+        return future, True
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+
+    def resolve(self, key: str, future: asyncio.Future, result: Any) -> None:
+        """Publish the leader's result to everyone waiting on key"""
+        self._release(key, future)
+        if not future.done():
+            future.set_result(result)
+
+    def fail(self, key: str, future: asyncio.Future, error: BaseException) -> None:
+        """Publish the leader's error to everyone waiting on key"""
+        self._release(key, future)
+        if not future.done():
+            future.set_exception(error)
+            # Mark retrieved so an error nobody else waited for isn't reported as unhandled
+            future.exception()
+
+    async def wait(self, future: asyncio.Future) -> Any:
+        """Await a claimed future without cancelling it for the other callers"""
+        result = await asyncio.shield(future)
+        return copy.deepcopy(result) if self.copy_results else result
+
+    async def do(self, key: Optional[str], factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once for all concurrent callers with the same key (None disables sharing)"""
+        if key is None:
+            return await factory()
+
+        future, leader = self.claim(key)
+        if leader:
+            task = asyncio.ensure_future(factory())
+
+            def settle(done: asyncio.Future) -> None:
+                if done.cancelled():
+                    self.fail(key, future, asyncio.CancelledError())
+                elif done.exception() is not None:
+                    self.fail(key, future, done.exception())
+                else:
+                    self.resolve(key, future, done.result())
+
+            task.add_done_callback(settle)
+        return await self.wait(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Leader/joined counters and the number of operations in flight"""
+        stats = dict(self.metrics)
+        stats['in_flight'] = len(self.in_flight)
+        return stats
@@ -0,0 +1,183 @@
+import re
+import math
+import bisect
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Hesitations that carry no meaning for keyword extraction
+FILLER_PATTERN = re.compile(r"\b(?:u+m+|u+h+|e+r+m*|a+h+|h+m+|m{2,})\b[,.]?\s*", re.IGNORECASE)
+
+# Immediately repeated words ("the the"), a common transcription stutter
+REPEAT_PATTERN = re.compile(r"\b(\w+)(?:\s+\1\b)+", re.IGNORECASE)
+
+# Whitespace following a sentence-ending mark
+SENTENCE_BREAK_PATTERN = re.compile(r"(?<=[.?!])\s+")
+
+# Words that must match for a suggestion to be pinned to a part of a span
+KEYWORD_TOKEN_PATTERN = re.compile(r"[a-z0-9']{3,}")
+
+def format_segments(segments: List[Dict[str, Any]]) -> str:
+    """Render segments as the '[start - end] text' lines the keyword prompt expects"""
+    return "\n".join([
+        f"[{segment['start']:.2f}s - {segment['end']:.2f}s] {segment['text']}"
+        for segment in segments
+    ])
+
+def strip_fillers(text: str) -> str:
+    """Remove filler words and stuttered repeats, collapsing whitespace"""
+    text = FILLER_PATTERN.sub('', text)
+    text = REPEAT_PATTERN.sub(r'\1', text)
+    return ' '.join(text.split())
+
+def _sentence_pieces(segment: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Split a segment at sentence ends, timing each piece by its first word"""
+    pieces = [piece for piece in SENTENCE_BREAK_PATTERN.split(segment.get('text', '').strip()) if piece]
+    if len(pieces) <= 1:
+        return [segment]
+    words = segment.get('words') or []
+    total = sum(len(piece.split()) for piece in pieces)
+    duration = segment['end'] - segment['start']
+    result = []
+    offset = 0
+    for piece in pieces:
+        if len(words) == total:
+            start = words[offset]['start']
+        else:
+            # No usable word timings: spread the segment evenly over its words
+            start = segment['start'] + duration * offset / total
+        result.append({'start': start, 'end': segment['end'], 'text': piece})
+        offset += len(piece.split())
+    for piece, following in zip(result, result[1:]):
+        piece['end'] = following['start']
+    return result
+
+def compact_segments(segments: List[Dict[str, Any]], max_span_seconds: float = 15.0, max_gap_seconds: float = 1.5) -> List[Dict[str, Any]]:
+    """
+    Merge caption-sized segments into sentence-level spans for prompting
+
+    Segments are first cut at sentence ends (timed by their words when
+    available), then joined until one ends a sentence, the span would
+    exceed max_span_seconds, or there is a pause longer than max_gap_seconds.
+    Fillers are stripped and spans left empty are dropped. Each span keeps its
+    parts (precise start and text) so a suggestion made against the span's
+    coarse timestamp can be mapped back with ``precise_timestamp``.
+
+    Args:
+        segments: Dicts with 'start', 'end' and 'text', in time order
+        max_span_seconds: Longest span to build
+        max_gap_seconds: Silence that always starts a new span
+
+    Returns:
+        List of dicts with 'start', 'end', 'text' and 'parts'
+    """
+    spans = []
+    current = None
+    for segment in (piece for segment in segments for piece in _sentence_pieces(segment)):
+        text = strip_fillers(segment.get('text', ''))
+        if current is not None and (
+            segment['start'] - current['end'] > max_gap_seconds
+            or segment['end'] - current['start'] > max_span_seconds
+        ):
+            spans.append(current)
+            current = None
+        if text:
+            if current is None:
+                current = {'start': segment['start'], 'end': segment['end'], 'text': text, 'parts': []}
+            else:
+                # Re-strip the joined text so stutters across a segment boundary go too
+                current['text'] = strip_fillers(f"{current['text']} {text}")
+                current['end'] = segment['end']
+            current['parts'].append({'start': segment['start'], 'text': text})
+        elif current is not None:
+            current['end'] = segment['end']
+        if current is not None and current['text'].endswith(('.', '?', '!')):
+            spans.append(current)
+            current = None
+    if current is not None:
+        spans.append(current)
+    return spans
+
+def format_spans(spans: List[Dict[str, Any]]) -> str:
+    """Render compacted spans as '[start] text' lines with whole-second timestamps"""
+    return "\n".join([f"[{int(span['start'])}s] {span['text']}" for span in spans])
+
+def precise_timestamp(spans: List[Dict[str, Any]], timestamp: float, keyword: Optional[str] = None) -> float:
+    """
+    Map a coarse timestamp answered against compacted spans back to a segment start
+
+    The span is the last one whose whole-second start is at or before
+    timestamp. Within it, the part mentioning most of the keyword's words is
+    chosen, falling back to the span's own start.
+    """
+    if not spans:
+        return timestamp
+    starts = [int(span['start']) for span in spans]
+    span = spans[max(0, bisect.bisect_right(starts, timestamp) - 1)]
+    if timestamp >= span['end'] + 1:
+        # Past the span (e.g. a pause or a window end): the model's value is the best we have
+        return timestamp
+    best_start = span['start']
+    tokens = set(KEYWORD_TOKEN_PATTERN.findall(keyword.lower())) if keyword else set()
+    if tokens:
+        best_score = 0
+        for part in span.get('parts', []):
+            score = len(tokens & set(KEYWORD_TOKEN_PATTERN.findall(part['text'].lower())))
+            if score > best_score:
+                best_start, best_score = part['start'], score
+    return best_start
+
+def transcript_windows(segments: List[Dict[str, Any]], window_seconds: float, overlap_seconds: float = 0.0,
+                       formatter: Callable[[List[Dict[str, Any]]], str] = format_segments) -> List[Dict[str, Any]]:
+    """
+    Split a timestamped transcript into consecutive time windows
+
+    Window k owns timestamps in [start, end); its text also includes the
+    segments within overlap_seconds on either side so the model sees the
+    surrounding context, but suggestions from the overlap belong to the
+    neighbouring window. The first window's start and the last window's end are
+    None (unbounded), so a transcript that fits in one window yields exactly one
+    window covering everything.
+
+    Args:
+        segments: Dicts with 'start', 'end' and 'text', in time order
+        window_seconds: Length of the time range each window owns
+        overlap_seconds: Extra context included on each side of a window
+        formatter: Renders a window's segments as prompt text
+
+    Returns:
+        List of dicts with 'start', 'end' (Optional[float]), 'text' and the
+        'segments' it was rendered from
+    """
+    if not segments:
+        return []
+    span = max(segment['end'] for segment in segments)
+    count = max(1, math.ceil(span / window_seconds)) if window_seconds > 0 else 1
+    if count == 1:
+        return [{'start': None, 'end': None, 'text': formatter(segments), 'segments': segments}]
+
+    windows = []
+    for k in range(count):
+        start: Optional[float] = k * window_seconds if k > 0 else None
+        end: Optional[float] = (k + 1) * window_seconds if k < count - 1 else None
+        low = (start if start is not None else 0.0) - overlap_seconds
+        high = end + overlap_seconds if end is not None else math.inf
+        window_segments = [
+            segment for segment in segments
+            if segment['end'] > low and segment['start'] < high
+        ]
+        if not window_segments:
+            continue
+        windows.append({'start': start, 'end': end, 'text': formatter(window_segments), 'segments': window_segments})
+    logger.debug(f"Split transcript spanning {span:.2f}s into {len(windows)} windows of {window_seconds:.0f}s")
+    return windows
+
+def window_owns(window: Dict[str, Any], timestamp: float) -> bool:
+    """Whether a suggestion at timestamp belongs to window rather than a neighbour"""
+    if window['start'] is not None and timestamp < window['start']:
+        return False
+    if window['end'] is not None and timestamp >= window['end']:
+        return False
+    return True